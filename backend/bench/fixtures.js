@@ -0,0 +1,92 @@
+// Synthetic inputs for the benchmarks. Deterministic (seeded) so runs are comparable.
+
+let seed = 42;
+const random = () => {
+    seed = (seed * 1664525 + 1013904223) >>> 0;
+    return seed / 0x100000000;
+};
+
+const FIRST_FIXTURE_ID = 1000000;
+
+// API-Football /fixtures response entry
+function apiFixture(id, elapsed = 30 + Math.floor(random() * 50)) {
+    return {
+        fixture: {
+            id,
+            date: '2026-01-01T15:00:00+00:00',
+            status: { short: elapsed < 45 ? '1H' : '2H', elapsed, extra: null }
+        },
+        league: { name: `League ${id % 40}`, logo: '' },
+        teams: {
+            home: { name: `Home ${id}`, logo: '' },
+            away: { name: `Away ${id}`, logo: '' }
+        },
+        goals: { home: Math.floor(random() * 3), away: Math.floor(random() * 3) }
+    };
+}
+
+function apiFixtures(count) {
+    const list = [];
+    for (let i = 0; i < count; i++) list.push(apiFixture(FIRST_FIXTURE_ID + i));
+    return list;
+}
+
+// Already adapted match (RealDataService shape)
+function liveMatch(id, elapsed = 30 + Math.floor(random() * 50)) {
+    return {
+        fixture: {
+            id,
+            date: '2026-01-01T15:00:00+00:00',
+            status: { short: 'IN_PLAY', raw: elapsed < 45 ? '1H' : '2H', period: elapsed < 45 ? '1H' : '2H', elapsed, second: 0, extra: null }
+        },
+        league: { name: `League ${id % 40}`, logo: '' },
+        teams: { home: { name: `Home ${id}`, logo: '' }, away: { name: `Away ${id}`, logo: '' } },
+        goals: { home: 0, away: 0 },
+        serverTimestamp: Date.now()
+    };
+}
+
+function liveMatches(count) {
+    const list = [];
+    for (let i = 0; i < count; i++) list.push(liveMatch(FIRST_FIXTURE_ID + i));
+    return list;
+}
+
+// Pending bets spread evenly over the fixtures, windows ending at `windowEnd`
+function bets(count, fixtures, windowEnd) {
+    const list = [];
+    for (let i = 0; i < count; i++) {
+        const matchId = FIRST_FIXTURE_ID + (i % fixtures);
+        list.push({
+            id: `bet-${i}`,
+            socketId: `socket-${i % 5000}`,
+            userId: `user_${i % 1000}`,
+            matchId,
+            marketId: `f1_${matchId}_${windowEnd - 1}`,
+            type: random() < 0.5 ? 'flash_1' : 'goal_period',
+            option: random() < 0.5 ? 'YES' : 'NO',
+            windowEnd,
+            initialScore: '0-0',
+            amount: 10,
+            odd: 2.5,
+            status: 'PENDING',
+            placedAt: Date.now()
+        });
+    }
+    return list;
+}
+
+// Wallet accounts for the users created by bets()
+function users(count = 1000) {
+    const db = {};
+    for (let i = 0; i < count; i++) db[`user_${i}`] = { balance: 1000 };
+    return db;
+}
+
+// Ledger that acknowledges immediately: settlement is measured without disk I/O
+const memoryLedger = {
+    append: () => Promise.resolve(),
+    appendBatch: () => Promise.resolve()
+};
+
+module.exports = { FIRST_FIXTURE_ID, apiFixture, apiFixtures, liveMatch, liveMatches, bets, users, memoryLedger };
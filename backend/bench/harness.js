@@ -0,0 +1,59 @@
+const v8 = require('v8');
+const { performance } = require('perf_hooks');
+
+// Runs one benchmark case:
+//   { name, iterations, prepare(i) -> state, fn(state) [async], items }
+// prepare() builds every iteration's input before timing starts, so only fn() is
+// measured. GC time and allocated bytes come from v8.GCProfiler over the timed loop:
+//   allocated = heap growth + bytes reclaimed by every GC that ran during it.
+
+const WARMUP_ITERATIONS = 3;
+
+async function runCase(benchCase) {
+  const iterations = benchCase.iterations || 50;
+
+  // Warm-up (JIT) with its own inputs
+  for (let i = 0; i < WARMUP_ITERATIONS; i++) {
+      await benchCase.fn(benchCase.prepare(i));
+  }
+
+  const states = [];
+  for (let i = 0; i < iterations; i++) states.push(benchCase.prepare(i));
+
+  if (global.gc) global.gc();
+  const heapBefore = process.memoryUsage().heapUsed;
+  const profiler = new v8.GCProfiler();
+  profiler.start();
+
+  const started = performance.now();
+  for (let i = 0; i < iterations; i++) {
+      await benchCase.fn(states[i]);
+      states[i] = null; // let inputs be collected as we go
+  }
+  const elapsedMs = performance.now() - started;
+
+  const { statistics } = profiler.stop();
+  const heapAfter = process.memoryUsage().heapUsed;
+
+  let gcMs = 0;
+  let reclaimed = 0;
+  statistics.forEach(gc => {
+      gcMs += gc.cost / 1000; // microseconds
+      reclaimed += Math.max(0, gc.beforeGC.heapStatistics.usedHeapSize - gc.afterGC.heapStatistics.usedHeapSize);
+  });
+  const allocated = Math.max(0, heapAfter - heapBefore) + reclaimed;
+
+  return {
+      name: benchCase.name,
+      iterations,
+      items: benchCase.items || 1,
+      opsPerSec: iterations / (elapsedMs / 1000),
+      msPerOp: elapsedMs / iterations,
+      allocPerOp: allocated / iterations,
+      gcMs,
+      gcCount: statistics.length,
+      gcShare: gcMs / elapsedMs
+  };
+}
+
+module.exports = { runCase };
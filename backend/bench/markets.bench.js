@@ -0,0 +1,53 @@
+const flashMarketService = require('../src/services/flashMarketService');
+const fixtures = require('./fixtures');
+
+// FlashMarketService.generateMarkets / evaluateMarkets / pricing for 1 .. 1000 fixtures.
+
+const FlashMarketService = flashMarketService.constructor;
+
+const cases = [];
+
+[1, 10, 100, 1000].forEach(fixtureCount => {
+    const label = `${fixtureCount} fixtures`;
+    const iterations = Math.max(200, 200000 / fixtureCount); // tiny cases need many runs to be stable
+    const matches = fixtures.liveMatches(fixtureCount);
+
+    const service = new FlashMarketService();
+    matches.forEach(match => service.startTracking(match.fixture.id, match));
+    const markets = [];
+    service.activeGames.forEach(gameState => markets.push(...service.getAllMarkets(gameState.markets)));
+
+    cases.push({
+        name: `generateMarkets (${label})`,
+        iterations,
+        items: fixtureCount,
+        prepare: () => matches,
+        fn: (list) => list.forEach(match => service.generateMarkets(match))
+    });
+
+    // Clock held still so the windows stay open and every market is evaluated
+    cases.push({
+        name: `evaluateMarkets (${label})`,
+        iterations,
+        items: fixtureCount,
+        prepare: () => service,
+        fn: (svc) => svc.activeGames.forEach(gameState => svc.evaluateMarkets(gameState))
+    });
+
+    // One pricing pass over every open market (what processTick does after evaluating)
+    cases.push({
+        name: `priceMarkets (${markets.length} markets)`,
+        iterations,
+        items: markets.length,
+        prepare: () => service,
+        fn: (svc) => {
+            svc.pricing.begin();
+            svc.activeGames.forEach(gameState => {
+                svc.getAllMarkets(gameState.markets).forEach(market => svc.addToPricing(gameState, market));
+            });
+            svc.pricing.run();
+        }
+    });
+});
+
+module.exports = cases;
@@ -0,0 +1,56 @@
+const realDataService = require('../src/services/realDataService');
+const fixtures = require('./fixtures');
+
+// RealDataService.adaptMatchData, the live=all merge (applyLiveMatches) and the clock heartbeat
+// (advanceClocks) for 1 .. 1000 fixtures.
+// The merge input keeps 90% of the cached fixtures live, drops 10% and adds 10% new ones.
+
+const cases = [];
+
+[1, 10, 100, 1000].forEach(fixtureCount => {
+    const label = `${fixtureCount} fixtures`;
+    const iterations = Math.max(200, 200000 / fixtureCount); // tiny cases need many runs to be stable
+    const feed = fixtures.apiFixtures(fixtureCount);
+    const existing = new Map(feed.map(m => [m.fixture.id, realDataService.adaptMatchData(m)]));
+
+    cases.push({
+        name: `adaptMatchData (${label})`,
+        iterations,
+        items: fixtureCount,
+        prepare: () => feed,
+        fn: (list) => list.forEach(m => realDataService.adaptMatchData(m, existing.get(m.fixture.id)))
+    });
+
+    cases.push({
+        name: `live=all merge (${label})`,
+        iterations: Math.max(100, 20000 / fixtureCount),
+        items: fixtureCount,
+        prepare: () => {
+            const dropped = Math.floor(fixtureCount / 10);
+            const cache = feed.map(m => realDataService.adaptMatchData(m));
+            const next = feed.slice(dropped).concat(fixtures.apiFixtures(dropped).map(m => {
+                m.fixture.id += fixtureCount; // new fixtures
+                return m;
+            }));
+            return { cache, next };
+        },
+        fn: ({ cache, next }) => {
+            realDataService.setCachedMatches(cache);
+            realDataService.applyLiveMatches(next);
+        }
+    });
+
+    // Every fixture in play: one heartbeat over the clock store
+    cases.push({
+        name: `advanceClocks (${label})`,
+        iterations: Math.max(50000, 2000000 / fixtureCount), // a few µs per pass: needs far more runs than the parsing cases
+        items: fixtureCount,
+        prepare: (i) => {
+            if (i === 0) realDataService.setCachedMatches(fixtures.liveMatches(fixtureCount));
+            return realDataService;
+        },
+        fn: (svc) => svc.advanceClocks()
+    });
+});
+
+module.exports = cases;
@@ -0,0 +1,120 @@
+// Micro-benchmarks for the settlement, market and match-data engines.
+//
+//   npm run bench                      run every suite, compare with bench/baseline.json
+//   npm run bench -- settlement        only some suites (settlement | markets | realdata | wire)
+//   npm run bench -- --filter merge    only cases whose name contains the text
+//   npm run bench -- --save            write the results into the baseline
+//   npm run bench -- --check           exit 1 if a case is slower than the baseline by more than --threshold (default 0.2)
+//                                      or has no baseline yet (so a new suite can't go unguarded); a suite that
+//                                      cannot load because a dependency is not installed fails the check too
+//
+// Baselines are only comparable on the same machine and Node version; re-save after changing either.
+
+process.env.LOG_LEVEL = process.env.LOG_LEVEL || 'warn';
+
+const fs = require('fs');
+const path = require('path');
+const { runCase } = require('./harness');
+
+const SUITES = ['settlement', 'markets', 'realdata', 'wire'];
+const BASELINE_FILE = path.join(__dirname, 'baseline.json');
+
+function parseArgs(argv) {
+    const args = { suites: [], save: false, check: false, filter: null, threshold: 0.2 };
+    for (let i = 0; i < argv.length; i++) {
+        const arg = argv[i];
+        if (arg === '--save') args.save = true;
+        else if (arg === '--check') args.check = true;
+        else if (arg === '--filter') args.filter = argv[++i];
+        else if (arg === '--threshold') args.threshold = parseFloat(argv[++i]);
+        else args.suites.push(arg);
+    }
+    if (args.suites.length === 0) args.suites = SUITES;
+    return args;
+}
+
+const fmt = (value, digits = 0) => value.toLocaleString('en-US', { maximumFractionDigits: digits, minimumFractionDigits: digits });
+
+async function main() {
+    const args = parseArgs(process.argv.slice(2));
+    const baseline = fs.existsSync(BASELINE_FILE) ? JSON.parse(fs.readFileSync(BASELINE_FILE, 'utf8')) : { results: {} };
+    const results = {};
+    const regressions = [];
+    const unguarded = [];
+    const unloaded = [];
+
+    if (!global.gc) console.log('(run with --expose-gc for steadier allocation numbers)\n');
+    console.log(`${'case'.padEnd(60)} ${'ops/s'.padStart(10)} ${'ms/op'.padStart(9)} ${'alloc/op'.padStart(10)} ${'gc ms'.padStart(8)} ${'gc%'.padStart(5)}  vs baseline`);
+
+    for (const suite of args.suites) {
+        console.log(`\n[${suite}]`);
+        let cases;
+        try {
+            cases = require(`./${suite}.bench`);
+        } catch (error) {
+            // A missing package (not a missing source file) means `npm install` has not been run
+            const missing = error.code === 'MODULE_NOT_FOUND' && /Cannot find module '([^'./][^']*)'/.exec(error.message);
+            if (!missing) throw error;
+            console.log(`not run: dependency '${missing[1]}' is not installed (npm install)`);
+            unloaded.push(suite);
+            continue;
+        }
+
+        for (const benchCase of cases) {
+            if (args.filter && !benchCase.name.includes(args.filter)) continue;
+
+            const result = await runCase(benchCase);
+            results[result.name] = {
+                opsPerSec: Math.round(result.opsPerSec * 10) / 10,
+                msPerOp: Math.round(result.msPerOp * 1e4) / 1e4,
+                allocPerOp: Math.round(result.allocPerOp),
+                gcShare: Math.round(result.gcShare * 1e4) / 1e4
+            };
+
+            let versus = '';
+            const base = baseline.results[result.name];
+            if (base) {
+                const change = result.opsPerSec / base.opsPerSec - 1;
+                versus = `${change >= 0 ? '+' : ''}${(change * 100).toFixed(1)}%`;
+                if (change < -args.threshold) {
+                    versus += '  REGRESSION';
+                    regressions.push(result.name);
+                }
+            } else {
+                versus = 'no baseline';
+                unguarded.push(result.name);
+            }
+
+            console.log(
+                `${result.name.padEnd(60)} ${fmt(result.opsPerSec, 1).padStart(10)} ${fmt(result.msPerOp, 3).padStart(9)} ` +
+                `${(fmt(result.allocPerOp / 1024, 1) + 'K').padStart(10)} ${fmt(result.gcMs, 1).padStart(8)} ` +
+                `${(result.gcShare * 100).toFixed(1).padStart(5)}  ${versus}`
+            );
+        }
+    }
+
+    if (args.save) {
+        const saved = {
+            node: process.version,
+            savedAt: new Date().toISOString(),
+            results: { ...baseline.results, ...results }
+        };
+        fs.writeFileSync(BASELINE_FILE, JSON.stringify(saved, null, 2) + '\n');
+        console.log(`\nBaseline saved to ${path.relative(process.cwd(), BASELINE_FILE)}`);
+    }
+
+    if (args.check && !args.save && (regressions.length > 0 || unguarded.length > 0 || unloaded.length > 0)) {
+        if (regressions.length > 0) console.error(`\n${regressions.length} case(s) regressed more than ${args.threshold * 100}%`);
+        if (unguarded.length > 0) console.error(`\n${unguarded.length} case(s) have no baseline; record them with --save`);
+        if (unloaded.length > 0) console.error(`\nSuite(s) not run, dependencies missing: ${unloaded.join(', ')}`);
+        process.exit(1);
+    }
+
+    // Services keep their polling timers alive
+    process.exit(0);
+}
+
+main().catch(error => {
+    console.error(error);
+    process.exit(1);
+});
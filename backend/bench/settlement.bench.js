@@ -0,0 +1,82 @@
+const betService = require('../src/services/betService');
+const walletService = require('../src/services/walletService');
+const fixtures = require('./fixtures');
+
+// BetService.resolveBets / settleBet over 10 .. 100k pending bets on 1 .. 1000 fixtures.
+// The ledger acknowledges in memory and there is no io, so this is the settlement
+// engine itself: indexing, due-prefix scan, evaluation, per-user credit batching.
+
+const BetService = betService.constructor;
+const WINDOW_END = 10;
+
+walletService.setLedger(fixtures.memoryLedger);
+walletService.load(fixtures.users());
+
+// Drain the settlement promise chain (journal -> credits -> emit)
+const settled = () => new Promise(resolve => setImmediate(resolve));
+
+function serviceWith(pending) {
+    const service = new BetService();
+    service.setWallet(walletService);
+    service.setLedger(fixtures.memoryLedger);
+    service.restoreBets(pending);
+    return service;
+}
+
+const iterationsFor = (bets) => (bets >= 100000 ? 5 : bets >= 10000 ? 20 : 50);
+
+const cases = [];
+
+[[10, 1], [1000, 10], [10000, 100], [100000, 1000]].forEach(([betCount, fixtureCount]) => {
+    const label = `${betCount} bets / ${fixtureCount} fixtures`;
+
+    cases.push({
+        name: `resolveBets all due (${label})`,
+        iterations: iterationsFor(betCount),
+        items: betCount,
+        prepare: () => ({
+            service: serviceWith(fixtures.bets(betCount, fixtureCount, WINDOW_END)),
+            matches: fixtures.liveMatches(fixtureCount).map(m => {
+                m.fixture.status.elapsed = WINDOW_END + 1;
+                return m;
+            })
+        }),
+        fn: async ({ service, matches }) => {
+            service.resolveBets(matches);
+            await settled();
+        }
+    });
+
+    // Every tick the clock moves but nothing is due yet: the common steady state
+    let idle = null;
+    cases.push({
+        name: `resolveBets tick, nothing due (${label})`,
+        iterations: Math.max(200, 200000 / fixtureCount),
+        items: betCount,
+        prepare: (i) => {
+            if (!idle) idle = serviceWith(fixtures.bets(betCount, fixtureCount, WINDOW_END));
+            const matches = fixtures.liveMatches(fixtureCount);
+            matches.forEach(m => { m.fixture.status.elapsed = i % WINDOW_END; });
+            return { service: idle, matches };
+        },
+        fn: ({ service, matches }) => service.resolveBets(matches)
+    });
+
+    if (betCount <= 10000) {
+        cases.push({
+            name: `settleBet one by one (${label})`,
+            iterations: iterationsFor(betCount),
+            items: betCount,
+            prepare: () => ({
+                service: serviceWith([]),
+                bets: fixtures.bets(betCount, fixtureCount, WINDOW_END)
+            }),
+            fn: async ({ service, bets }) => {
+                bets.forEach(bet => service.settleBet(bet, '1-0'));
+                await settled();
+            }
+        });
+    }
+});
+
+module.exports = cases;
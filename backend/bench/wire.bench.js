@@ -0,0 +1,64 @@
+const flashMarketService = require('../src/services/flashMarketService');
+const lobbyService = require('../src/services/lobbyService');
+const wireCodec = require('../src/services/wireCodec');
+const fixtures = require('./fixtures');
+
+// Serializing the hot room streams: JSON text (default) vs the compact MessagePack layouts
+// (opt-in binary codec). Bytes per message are printed once per case pair.
+
+const FlashMarketService = flashMarketService.constructor;
+
+const cases = [];
+
+const matches = fixtures.liveMatches(100);
+const service = new FlashMarketService();
+matches.forEach(match => {
+    service.startTracking(match.fixture.id, match);
+    match.markets = service.activeGames.get(match.fixture.id).markets;
+});
+
+// One tick of flash patches: every market's odds moved
+const patches = matches.map((match, i) => ({
+    fixtureId: match.fixture.id,
+    seq: i,
+    timer: match.fixture.status.elapsed * 60,
+    changes: service.getAllMarkets(match.markets).map(market => ({ id: market.id, progress: 42.5, odds: market.odds }))
+}));
+
+// Lobby patch that adds every fixture (a client's first patch after a busy minute)
+const lobbyPatch = {
+    serverTimestamp: Date.now(),
+    added: matches.map(match => lobbyService.project(match)),
+    changed: [],
+    removed: []
+};
+
+const streams = [
+    { event: 'match_update', label: '100 matches', payloads: matches },
+    { event: 'flash_patch', label: '100 patches', payloads: patches },
+    { event: 'lobby_patch', label: '100 added', payloads: [lobbyPatch] }
+];
+
+streams.forEach(({ event, label, payloads }) => {
+    const jsonBytes = payloads.reduce((sum, p) => sum + Buffer.byteLength(JSON.stringify(p)), 0);
+    const packedBytes = payloads.reduce((sum, p) => sum + wireCodec.encode(event, p).length, 0);
+    console.log(`  ${event}: ${jsonBytes} B json, ${packedBytes} B msgpack`);
+
+    cases.push({
+        name: `${event} json (${label})`,
+        iterations: 2000,
+        items: payloads.length,
+        prepare: () => payloads,
+        fn: (list) => list.forEach(p => JSON.stringify(p))
+    });
+
+    cases.push({
+        name: `${event} msgpack (${label})`,
+        iterations: 2000,
+        items: payloads.length,
+        prepare: () => payloads,
+        fn: (list) => list.forEach(p => wireCodec.encode(event, p))
+    });
+});
+
+module.exports = cases;
@@ -0,0 +1,44 @@
+require('dotenv').config();
+const cluster = require('cluster');
+const os = require('os');
+const log = require('./services/logger').child('CLUSTER');
+
+// Cluster mode: one shard per worker process, all listening on PORT.
+// The primary only forks workers and relays ShardRouter messages between them.
+// Clients must use the websocket transport (no sticky sessions are set up).
+
+const WORKERS = parseInt(process.env.CLUSTER_WORKERS) || os.cpus().length;
+
+if (cluster.isPrimary) {
+    cluster.setupPrimary({ serialization: 'advanced' }); // structured clone for bus payloads
+
+    const workers = new Array(WORKERS);
+
+    const relay = (from, msg) => {
+        if (!msg || msg.bus !== 'shard') return;
+
+        if (msg.to === 'others') {
+            workers.forEach((worker, index) => {
+                if (index !== from && worker && worker.isConnected()) worker.send(msg);
+            });
+        } else {
+            const target = workers[msg.to];
+            if (target && target.isConnected()) target.send(msg);
+        }
+    };
+
+    const fork = (index) => {
+        const worker = cluster.fork({ SHARD_INDEX: index, SHARD_COUNT: WORKERS });
+        workers[index] = worker;
+        worker.on('message', (msg) => relay(index, msg));
+        worker.on('exit', (code, signal) => {
+            log.error('Shard exited, restarting', { index, code, signal });
+            fork(index); // Same index -> same fixtures and ledger directory
+        });
+    };
+
+    log.info('Starting shards', { workers: WORKERS });
+    for (let i = 0; i < WORKERS; i++) fork(i);
+} else {
+    require('./server');
+}
@@ -3,6 +3,15 @@ const express = require('express');
 const http = require('http');
 const { Server } = require('socket.io');
 const cors = require('cors');
+const { performance } = require('perf_hooks');
+const shardRouter = require('./services/shardRouter');
+const { createClusterAdapter } = require('./services/clusterAdapter');
+const backpressure = require('./services/backpressure');
+const log = require('./services/logger').child('SERVER');
+const betLog = log.child('BET');
+
+// High-resolution wall clock, comparable between shards (bet latency spans two processes)
+const wallClock = () => performance.timeOrigin + performance.now();
 
 const app = express();
 const server = http.createServer(app);
@@ -12,11 +21,19 @@ app.use(cors());
 app.use(express.json());
 
 // Socket.io Setup
+// In cluster mode (src/cluster.js) broadcasts fan out to every shard and clients
+// connect over websocket only, so no sticky sessions are needed.
+// Local delivery skips congested sockets for superseded state streams (see backpressure.js).
+const BackpressureAdapter = backpressure.createAdapter();
 const io = new Server(server, {
   cors: {
     origin: "*", // Allow all origins for MVP
     methods: ["GET", "POST"]
-  }
+  },
+  adapter: shardRouter.clustered ? createClusterAdapter(shardRouter, BackpressureAdapter) : BackpressureAdapter,
+  ...(shardRouter.clustered && {
+    transports: ['websocket']
+  })
 });
 
 const PORT = process.env.PORT || 3001;
@@ -26,132 +43,286 @@ const marketService = require('./services/marketService');
 const realDataService = require('./services/realDataService');
 const flashMarketService = require('./services/flashMarketService');
 const betService = require('./services/betService');
+const tickScheduler = require('./services/tickScheduler');
+const ledger = require('./services/ledger');
+const metrics = require('./services/metrics');
+const walletService = require('./services/walletService');
+const betIntake = require('./services/betIntake');
+const lobbyService = require('./services/lobbyService');
+const matchListCache = require('./services/matchListCache');
+const subscriptions = require('./services/subscriptionService');
+const eventIngest = require('./services/eventIngest');
+const matchEvents = require('./services/matchEvents');
+const broadcaster = require('./services/broadcaster');
+
+// Wallet: balances and pending bets are rebuilt from this shard's ledger (snapshot + WAL tail)
+const recovered = ledger.recover();
+walletService.setLedger(ledger);
+walletService.load(recovered.users);
+
+// Single User for MVP
+walletService.ensureUser("user_1", 1000.00);
 
-// Mock Database (Single User for MVP)
-const usersDb = { "user_1": { balance: 1000.00 } };
+// Scrape-time gauges: sockets, rooms and open markets on this shard
+metrics.instrumentAdapter(io.of('/').adapter);
+metrics.addCollector(() => {
+    const adapter = io.of('/').adapter;
+    metrics.connectedSockets.set(io.of('/').sockets.size);
+    let rooms = 0;
+    adapter.rooms.forEach((sockets, room) => {
+        if (!adapter.sids.has(room)) rooms++;
+    });
+    metrics.rooms.set(rooms);
+
+    metrics.watchedFixtures.set(subscriptions.watchedCount);
+    metrics.congestedSockets.set(backpressure.congestedCount);
+    metrics.trackedFixtures.set(flashMarketService.activeGames.size);
+
+    metrics.openMarkets.reset();
+    flashMarketService.activeGames.forEach((gameState, fixtureId) => {
+        const open = flashMarketService.getAllMarkets(gameState.markets).filter(m => m.status === 'OPEN').length;
+        metrics.openMarkets.set(open, fixtureId);
+    });
+});
+shardRouter.on('metrics:collect', () => metrics.collect());
 
 // Start services
+broadcaster.setIo(io);
+broadcaster.setBackpressure(backpressure);
+backpressure.setIo(io);
 marketService.setIo(io);
 realDataService.setIo(io);
 flashMarketService.setIo(io);
 betService.setIo(io);
-betService.setUsersDb(usersDb); // Inject DB into BetService for settlements
+betService.setWallet(walletService); // Payouts are credited on the user's shard
+betService.setLedger(ledger);
+betService.restoreBets(Object.values(recovered.bets));
+betService.resumeCredits(recovered.unpaid);
 
 // Wire Services
 realDataService.setFlashService(flashMarketService);
 realDataService.setBetService(betService);
+betIntake.setIo(io);
+betIntake.setMatchService(realDataService);
+betIntake.setBetService(betService);
+betIntake.setFlashService(flashMarketService);
+betIntake.setWallet(walletService);
+betIntake.setLedger(ledger);
+lobbyService.setIo(io);
+lobbyService.setMatchService(realDataService);
+matchListCache.setMatchService(realDataService);
+eventIngest.setMatchService(realDataService);
+
+// Typed feed events (goal, card, VAR, penalty) suspend or resolve markets in the tick they arrive in
+// (the leader diffs them out of the fixtures it fetches anyway, see RealDataService)
+matchEvents.on('event', event => flashMarketService.handleEvent(event));
+
+// Single 1s tick: clock advance -> feed events, market generation/evaluation -> settlement -> broadcast
+// Each shard ticks the fixtures it owns; the simulator markets run on the leader only.
+tickScheduler.register('clock', 'realData.advanceClocks', () => realDataService.advanceClocks());
+tickScheduler.register('markets', 'events.dispatch', () => eventIngest.dispatch());
+tickScheduler.register('markets', 'realData.syncMarkets', () => realDataService.syncMarkets());
+if (shardRouter.isLeader()) {
+    tickScheduler.register('markets', 'market.expireMarkets', () => marketService.expireMarkets());
+    tickScheduler.register('markets', 'market.updateOdds', () => marketService.updateOdds());
+}
+tickScheduler.register('settlement', 'realData.settleBets', () => realDataService.settleBets());
+tickScheduler.register('broadcast', 'backpressure.sweep', () => backpressure.sweep());
+tickScheduler.register('broadcast', 'flash.broadcast', () => flashMarketService.broadcast());
+tickScheduler.register('broadcast', 'realData.broadcast', () => realDataService.broadcast());
+tickScheduler.register('broadcast', 'lobby.publish', () => lobbyService.publish());
+if (shardRouter.isLeader()) {
+    tickScheduler.register('broadcast', 'market.broadcastOdds', () => marketService.broadcastOdds());
+}
+tickScheduler.start(1000);
+
+// --- Fixture-owner handlers (called in-process, or over IPC from another shard) ---
+
+shardRouter.on('game:join', ({ fixtureId, socketId }, fromShard) => {
+    subscriptions.join(fixtureId, socketId);
+
+    const match = realDataService.getMatch(fixtureId);
+    if (match) {
+        // First viewer builds the market state (startTracking is a no-op when already tracked)
+        // Join snapshot: the room only gets full match objects when minute, score or status move.
+        // It goes out from the socket's shard, in the socket's codec.
+        shardRouter.send(fromShard, 'game:matchSnapshot', { fixtureId, socketId, match });
+        flashMarketService.startTracking(fixtureId, match);
+        flashMarketService.sendSnapshot(fixtureId, socketId);
+    }
+});
+
+// A congested socket gets it from the room's drain resync instead
+shardRouter.on('game:matchSnapshot', ({ fixtureId, socketId, match }) => {
+    const socket = io.of('/').sockets.get(socketId);
+    if (socket) broadcaster.send(socket, 'match_update', match, `game_${fixtureId}`);
+});
+
+// Last viewer gone: the fixture is torn down by RealDataService once its idle grace period ends
+shardRouter.on('game:leave', ({ fixtureId, socketId }) => {
+    subscriptions.leave(fixtureId, socketId);
+});
+
+shardRouter.on('game:resync', ({ fixtureId, socketId }) => {
+    flashMarketService.sendSnapshot(fixtureId, socketId);
+});
+
+// A drained socket gets the current state of every stream it missed while congested
+const fixtureOfRoom = (room) => parseInt(room.slice('game_'.length));
+backpressure.setResync('match_update', (socket, room) => {
+    const match = room && realDataService.getMatch(fixtureOfRoom(room));
+    if (match) broadcaster.send(socket, 'match_update', match);
+});
+const resyncFlash = (socket, room) => {
+    if (!room) return;
+    const fixtureId = fixtureOfRoom(room);
+    shardRouter.send(shardRouter.ownerOfFixture(fixtureId), 'game:resync', { fixtureId, socketId: socket.id });
+};
+backpressure.setResync('flash_patch', resyncFlash);
+backpressure.setResync('flash_update', resyncFlash);
+backpressure.setResync('lobby_patch', (socket) => lobbyService.subscribe(socket));
+
+shardRouter.on('bet:place', ({ data, socketId, userId, receivedAt }) => betIntake.submit(data, socketId, userId, receivedAt));
+shardRouter.on('bet:status', (betIds) => betIntake.statusOf(betIds));
+
+// Debits this wallet journaled for bets on other shards that never confirmed them
+walletService.reconcile();
 
 // Endpoints
 app.get('/', (req, res) => {
   res.send('Micro-Betting API is running');
 });
 
-app.get('/matches', (req, res) => {
-  res.json(realDataService.getMatches());
+// List projection, cached per list version: ?status=live&league=<id|name>&limit=<n>&cursor=<next>
+app.get('/matches', async (req, res) => {
+  const query = matchListCache.parseQuery(req.query);
+  if (query.error) return res.status(400).json({ error: query.error });
+
+  const page = matchListCache.get(query);
+  const encoding = req.acceptsEncodings('br', 'gzip', 'identity') || 'identity';
+  const etag = matchListCache.etag(page, encoding);
+
+  res.set('Vary', 'Accept-Encoding');
+  res.set('Cache-Control', 'no-cache'); // always revalidate; unchanged lists cost a 304
+  res.set('ETag', etag);
+  if (page.nextCursor) {
+      res.set('X-Next-Cursor', page.nextCursor);
+      const next = new URLSearchParams({ ...req.query, cursor: page.nextCursor });
+      res.set('Link', `<${req.path}?${next}>; rel="next"`);
+  }
+
+  const ifNoneMatch = req.headers['if-none-match'];
+  if (ifNoneMatch && ifNoneMatch.split(',').some(tag => tag.trim() === etag)) {
+      return res.status(304).end();
+  }
+
+  try {
+      const body = await matchListCache.encode(page, encoding);
+      if (encoding !== 'identity') res.set('Content-Encoding', encoding);
+      res.type('application/json').send(body);
+  } catch (error) {
+      log.error('Match list compression failed', { encoding, error });
+      res.set('ETag', matchListCache.etag(page, 'identity'));
+      res.type('application/json').send(page.body);
+  }
+});
+
+// Per-phase tick timing (last / max / avg ms)
+app.get('/stats/tick', (req, res) => {
+  res.json(tickScheduler.getStats());
+});
+
+// Prometheus scrape. In cluster mode any worker answers for all shards (shard label).
+app.get('/metrics', async (req, res) => {
+  try {
+    let familiesList;
+    if (shardRouter.count > 1) {
+        const shards = [...Array(shardRouter.count).keys()];
+        const collected = await Promise.all(shards.map(shard => shardRouter.request(shard, 'metrics:collect')));
+        familiesList = collected.map((families, shard) => ({ families, extraLabel: `shard="${shard}"` }));
+    } else {
+        familiesList = [{ families: metrics.collect() }];
+    }
+    res.set('Content-Type', 'text/plain; version=0.0.4');
+    res.send(metrics.render(familiesList));
+  } catch (error) {
+    log.error('Metrics collection failed', { error });
+    res.status(500).send(error.message);
+  }
 });
 
 // Socket.io Connection
 io.on('connection', (socket) => {
-  console.log('New client connected:', socket.id);
+  log.debug('Client connected', { socketId: socket.id });
 
   // Auto-login for MVP
   const userId = "user_1";
   socket.userId = userId;
 
+  // Fixtures this socket watches, so leave_game and disconnect release exactly those
+  socket.data.fixtures = new Set();
+
+  // Opt-in binary frames for the hot state streams (auth.codec); JSON otherwise
+  broadcaster.negotiate(socket);
+
+  const leaveGame = (fixtureId) => {
+    socket.data.fixtures.delete(fixtureId);
+    broadcaster.leave(socket, `game_${fixtureId}`);
+    realDataService.stopMonitoring(fixtureId);
+    shardRouter.send(shardRouter.ownerOfFixture(fixtureId), 'game:leave', { fixtureId, socketId: socket.id });
+  };
+
   socket.on('disconnect', () => {
-    console.log('Client disconnected:', socket.id);
+    log.debug('Client disconnected', { socketId: socket.id });
+    socket.data.fixtures.forEach(leaveGame);
+  });
+
+  // List view: snapshot now, throttled lobby_patch diffs while subscribed
+  socket.on('lobby_subscribe', () => {
+    lobbyService.subscribe(socket);
+  });
+
+  socket.on('lobby_unsubscribe', () => {
+    lobbyService.unsubscribe(socket);
   });
 
   socket.on('join_game', (fixtureId) => {
-    console.log(`Client ${socket.id} joined game ${fixtureId}`);
-    socket.join(`game_${fixtureId}`);
+    log.debug('Client joined game', { socketId: socket.id, fixtureId });
+    fixtureId = parseInt(fixtureId);
+    socket.data.fixtures.add(fixtureId);
+    broadcaster.join(socket, `game_${fixtureId}`);
     realDataService.startMonitoring(fixtureId);
 
-    const match = realDataService.getMatches().find(m => m.fixture.id === parseInt(fixtureId));
-    if (match) {
-        flashMarketService.startTracking(fixtureId, match);
-    }
+    // Flash markets live on the fixture's owning shard
+    shardRouter.send(shardRouter.ownerOfFixture(fixtureId), 'game:join', { fixtureId, socketId: socket.id });
+  });
+
+  // Client detected a gap in the flash_patch sequence
+  socket.on('flash_resync', (fixtureId) => {
+    shardRouter.send(shardRouter.ownerOfFixture(fixtureId), 'game:resync', { fixtureId, socketId: socket.id });
   });
 
   socket.on('leave_game', (fixtureId) => {
-    console.log(`Client ${socket.id} left game ${fixtureId}`);
-    socket.leave(`game_${fixtureId}`);
-    realDataService.stopMonitoring(fixtureId);
+    log.debug('Client left game', { socketId: socket.id, fixtureId });
+    leaveGame(parseInt(fixtureId));
   });
 
   socket.on('place_bet', (data) => {
-      console.log('\n==================================');
-      console.log('🚨 NOVA APOSTA RECEBIDA NO SERVIDOR!');
-      console.log('Dados:', data);
-      console.log('User:', socket.userId, 'Balance:', usersDb[socket.userId].balance);
-      console.log('==================================\n');
-
-      const userId = socket.userId;
-      const user = usersDb[userId];
-
-      // 1. Validate Match & Data
-      let match = null;
-      if (data.matchId) {
-          match = realDataService.getMatch(data.matchId);
-      } else if (data.marketId) {
-          const fixtureId = data.marketId.split('_')[1];
-          match = realDataService.getMatch(fixtureId);
-          data.matchId = fixtureId;
-      }
-
-      if (!match) {
-          console.error(`[BET ERROR] Match not found.`);
-          io.to(socket.id).emit('bet_rejected', { reason: "Jogo não encontrado." });
-          return;
-      }
-
-      data.currentScore = `${match.goals.home}-${match.goals.away}`;
-
-      // 2. Validate Game Status & Time
-      const isLive = ['IN_PLAY'].includes(match.fixture.status.short);
-      const currentMinute = match.fixture.status.elapsed;
-
-      // Strict Time Check: Must be BEFORE window starts/ends (depending on market type logic)
-      // For MVP, simplistic check: minute < windowEnd
-      if (!isLive || currentMinute >= data.windowEnd) {
-           console.error(`[BET ERROR] Time expired. Game: ${currentMinute}', Window End: ${data.windowEnd}`);
-           io.to(socket.id).emit('bet_rejected', { reason: "Tempo esgotado ou jogo parado." });
-           return;
-      }
-
-      // 3. Validate Balance & Amount
-      if (data.amount <= 0) {
-           console.error(`[BET ERROR] Invalid amount: ${data.amount}`);
-           io.to(socket.id).emit('bet_rejected', { reason: "Valor inválido." });
-           return;
-      }
-
-      if (user.balance < data.amount) {
-           console.error(`[BET ERROR] Insufficient balance. Has: ${user.balance}, Needs: ${data.amount}`);
-           io.to(socket.id).emit('bet_rejected', { reason: "Saldo insuficiente." });
-           return;
-      }
-
-      // 4. Process Transaction
-      user.balance -= data.amount;
-
-      // 5. Register Bet
-      // Pass userId to BetService so it knows who to refund/pay later
-      data.userId = userId;
-      betService.placeBet(data, socket.id);
-
-      // 6. Success Response
-      io.to(socket.id).emit('bet_accepted', {
-          amount: data.amount,
-          newBalance: user.balance,
-          marketId: data.marketId
+      betLog.debug('Bet received', { socketId: socket.id, userId: socket.userId, data });
+
+      // Validated and settled by the shard that owns the fixture
+      const fixtureId = data.matchId || (data.marketId && data.marketId.split('_')[1]);
+      shardRouter.send(shardRouter.ownerOfFixture(fixtureId), 'bet:place', {
+          data,
+          socketId: socket.id,
+          userId: socket.userId,
+          receivedAt: wallClock()
       });
-      console.log(`[BET SUCCESS] Bet placed. New Balance: ${user.balance}`);
   });
 });
 
 server.listen(PORT, () => {
-  console.log(`Server running on port ${PORT}`);
+  log.info('Server running', { port: PORT, shards: shardRouter.count });
 });
 
 module.exports = { app, server, io };
@@ -0,0 +1,198 @@
+const https = require('https');
+const axios = require('axios');
+const log = require('./logger').child('API');
+const { performance } = require('perf_hooks');
+const metrics = require('./metrics');
+
+// HTTP client for API-Football:
+//  - one keep-alive agent pool for every request
+//  - identical in-flight requests share one promise
+//  - calls are queued against a per-minute and per-day quota
+//  - 429/5xx responses back off exponentially (Retry-After wins when present)
+
+const API_HOST = 'v3.football.api-sports.io';
+const MAX_RETRIES = 4;
+const BACKOFF_BASE_MS = 1000;
+const BACKOFF_MAX_MS = 60 * 1000;
+const FIXTURES_PER_REQUEST = 20; // API-Football limit for fixtures?ids=
+
+class ApiFootballClient {
+  constructor({
+      apiKey = process.env.API_SPORTS_KEY,
+      perMinute = parseInt(process.env.API_FOOTBALL_PER_MINUTE) || 30,
+      perDay = parseInt(process.env.API_FOOTBALL_PER_DAY) || 7500,
+      maxSockets = parseInt(process.env.API_FOOTBALL_MAX_SOCKETS) || 4
+  } = {}) {
+    this.apiKey = apiKey;
+    this.perMinute = perMinute;
+    this.perDay = perDay;
+
+    this.http = axios.create({
+        baseURL: `https://${API_HOST}/`,
+        headers: { 'x-apisports-key': apiKey, 'x-apisports-host': API_HOST },
+        httpsAgent: new https.Agent({ keepAlive: true, maxSockets })
+    });
+
+    this.inFlight = new Map(); // endpoint -> promise
+    this.queue = []; // [{ endpoint, attempt, resolve, reject }]
+    this.minuteCalls = []; // timestamps of calls in the last 60s
+    this.dayCalls = 0;
+    this.dayStamp = this.utcDay();
+    this.pausedUntil = 0; // set by 429/5xx backoff
+    this.pumpTimer = null;
+  }
+
+  utcDay() {
+    return new Date().toISOString().slice(0, 10);
+  }
+
+  request(endpoint) {
+    if (this.inFlight.has(endpoint)) return this.inFlight.get(endpoint);
+
+    const promise = new Promise((resolve, reject) => {
+        this.queue.push({ endpoint, attempt: 0, resolve, reject });
+    }).finally(() => this.inFlight.delete(endpoint));
+
+    this.inFlight.set(endpoint, promise);
+    this.pump();
+    return promise;
+  }
+
+  // How long until the budget allows another call (0 = now)
+  waitMs(now) {
+    if (this.utcDay() !== this.dayStamp) {
+        this.dayStamp = this.utcDay();
+        this.dayCalls = 0;
+    }
+    if (this.dayCalls >= this.perDay) {
+        const midnight = new Date(`${this.dayStamp}T00:00:00.000Z`).getTime() + 24 * 60 * 60 * 1000;
+        return midnight - now;
+    }
+
+    while (this.minuteCalls.length > 0 && now - this.minuteCalls[0] >= 60 * 1000) this.minuteCalls.shift();
+    const minuteWait = this.minuteCalls.length >= this.perMinute ? this.minuteCalls[0] + 60 * 1000 - now : 0;
+
+    return Math.max(minuteWait, this.pausedUntil - now, 0);
+  }
+
+  pump() {
+    if (this.pumpTimer) return;
+
+    while (this.queue.length > 0) {
+        const now = Date.now();
+        const wait = this.waitMs(now);
+        if (wait > 0) {
+            this.pumpTimer = setTimeout(() => {
+                this.pumpTimer = null;
+                this.pump();
+            }, wait);
+            return;
+        }
+
+        this.minuteCalls.push(now);
+        this.dayCalls++;
+        this.send(this.queue.shift());
+    }
+  }
+
+  async send(job) {
+    const kind = job.endpoint.replace(/=[^&]*/g, ''); // 'fixtures?ids=1-2' -> 'fixtures?ids'
+    const started = performance.now();
+    try {
+        const response = await this.http.get(job.endpoint);
+        metrics.upstreamDuration.labels(kind).observe((performance.now() - started) / 1000);
+        this.syncQuota(response.headers);
+        job.resolve(response.data);
+    } catch (error) {
+        const status = error.response?.status;
+        metrics.upstreamDuration.labels(kind).observe((performance.now() - started) / 1000);
+        metrics.upstreamErrors.labels(kind, status || 'network').inc();
+        const retryable = status === 429 || (status >= 500 && status < 600);
+
+        if (!retryable || job.attempt >= MAX_RETRIES) {
+            job.reject(error);
+            return;
+        }
+
+        const retryAfter = parseInt(error.response.headers?.['retry-after']) * 1000;
+        const delay = retryAfter || Math.min(BACKOFF_MAX_MS, BACKOFF_BASE_MS * 2 ** job.attempt);
+        log.warn('Upstream error, backing off', { status, endpoint: job.endpoint, delayMs: delay, attempt: job.attempt + 1, maxRetries: MAX_RETRIES });
+
+        this.pausedUntil = Math.max(this.pausedUntil, Date.now() + delay);
+        job.attempt++;
+        this.queue.unshift(job);
+        this.pump();
+    }
+  }
+
+  // API-Football reports the remaining budget; trust it over our own counters
+  syncQuota(headers = {}) {
+    const dayRemaining = parseInt(headers['x-ratelimit-requests-remaining']);
+    if (!Number.isNaN(dayRemaining)) {
+        this.dayCalls = Math.max(this.dayCalls, this.perDay - dayRemaining);
+    }
+  }
+
+  getQuota() {
+    return {
+        perMinute: this.perMinute,
+        perDay: this.perDay,
+        usedLastMinute: this.minuteCalls.length,
+        usedToday: this.dayCalls,
+        queued: this.queue.length,
+        pausedUntil: this.pausedUntil
+    };
+  }
+}
+
+// Collects per-fixture lookups made in the same turn and issues them as
+// fixtures?ids=a-b-c requests against any feed (live, recording or replay).
+class FixtureBatcher {
+  constructor(feed, delayMs = 25) {
+    this.feed = feed;
+    this.delayMs = delayMs;
+    this.waiting = new Map(); // fixtureId -> { promise, resolve, reject } not yet sent
+    this.pending = new Map(); // fixtureId -> promise (queued or in flight)
+    this.flushTimer = null;
+  }
+
+  getFixture(fixtureId) {
+    const id = parseInt(fixtureId);
+    if (this.pending.has(id)) return this.pending.get(id);
+
+    let entry;
+    const promise = new Promise((resolve, reject) => {
+        entry = { resolve, reject };
+    }).finally(() => this.pending.delete(id));
+
+    this.waiting.set(id, entry);
+    this.pending.set(id, promise);
+
+    if (!this.flushTimer) {
+        this.flushTimer = setTimeout(() => this.flush(), this.delayMs);
+    }
+    return promise;
+  }
+
+  flush() {
+    this.flushTimer = null;
+    const batch = this.waiting;
+    this.waiting = new Map();
+
+    const ids = [...batch.keys()];
+    for (let i = 0; i < ids.length; i += FIXTURES_PER_REQUEST) {
+        const chunk = ids.slice(i, i + FIXTURES_PER_REQUEST);
+
+        this.feed.get(`fixtures?ids=${chunk.join('-')}`)
+            .then(body => {
+                const byId = new Map((body.response || []).map(m => [m.fixture.id, m]));
+                chunk.forEach(id => batch.get(id).resolve(byId.get(id) || null));
+            })
+            .catch(error => {
+                chunk.forEach(id => batch.get(id).reject(error));
+            });
+    }
+  }
+}
+
+module.exports = { ApiFootballClient, FixtureBatcher };
@@ -0,0 +1,161 @@
+const { Adapter } = require('socket.io-adapter');
+const metrics = require('./metrics');
+const log = require('./logger').child('BACKPRESSURE');
+
+// Per-socket backpressure for slow clients (bad mobile links).
+//
+// sweep() runs first in the 'broadcast' phase and measures every local socket's unsent bytes
+// (engine.io write buffer + WebSocket bufferedAmount):
+//   > BACKPRESSURE_HIGH_BYTES        the socket is congested
+//   <= BACKPRESSURE_LOW_BYTES        a congested socket has drained: it gets the latest state once
+//   > BACKPRESSURE_DISCONNECT_BYTES  or congested longer than BACKPRESSURE_MAX_STALL_MS: disconnected
+//
+// While congested, the socket is left out of broadcasts of superseded state streams (each frame
+// replaces the previous one): match_update, flash_patch, flash_update, lobby_patch. Frames it
+// misses are counted and the streams remembered, and on drain the resync hooks (set in server.js)
+// send the current state: a match snapshot, a flash snapshot from the owner, the lobby snapshot.
+// Everything else (bet_accepted, bets_resolved, ...) is always queued, never dropped.
+//
+// The filter lives in the adapter's local delivery, so it also applies to broadcasts that arrive
+// from other shards (ClusterAdapter builds on it).
+
+const HIGH_BYTES = parseInt(process.env.BACKPRESSURE_HIGH_BYTES) || 256 * 1024;
+const LOW_BYTES = parseInt(process.env.BACKPRESSURE_LOW_BYTES) || 64 * 1024;
+const DISCONNECT_BYTES = parseInt(process.env.BACKPRESSURE_DISCONNECT_BYTES) || 4 * 1024 * 1024;
+const MAX_STALL_MS = parseInt(process.env.BACKPRESSURE_MAX_STALL_MS) || 30 * 1000;
+
+const SUPERSEDED = new Set(['match_update', 'flash_patch', 'flash_update', 'lobby_patch']);
+const BINARY_SUFFIX = '#bin'; // broadcaster's per-codec twin rooms resync like the plain room
+
+class Backpressure {
+  constructor() {
+    this.io = null;
+    this.congested = new Map(); // socketId -> { since, missed: Map "event|room" -> [event, room] }
+    this.resyncs = new Map(); // event -> fn(socket, room)
+  }
+
+  setIo(io) {
+    this.io = io;
+  }
+
+  setResync(event, fn) {
+    this.resyncs.set(event, fn);
+  }
+
+  get congestedCount() {
+    return this.congested.size;
+  }
+
+  bufferedBytes(socket) {
+    const conn = socket.conn;
+    let bytes = 0;
+    for (const packet of conn.writeBuffer) {
+        const data = packet.data;
+        if (typeof data === 'string') bytes += data.length;
+        else if (data) bytes += data.byteLength || 0;
+    }
+    const ws = conn.transport && conn.transport.socket;
+    if (ws && typeof ws.bufferedAmount === 'number') bytes += ws.bufferedAmount;
+    return bytes;
+  }
+
+  // 'broadcast' phase, before anything is emitted
+  sweep(now = Date.now()) {
+    if (!this.io) return;
+    const sockets = this.io.of('/').sockets;
+
+    // Gone since the last sweep
+    this.congested.forEach((state, socketId) => {
+        if (!sockets.has(socketId)) this.congested.delete(socketId);
+    });
+
+    sockets.forEach(socket => {
+        const bytes = this.bufferedBytes(socket);
+        const state = this.congested.get(socket.id);
+
+        if (!state) {
+            if (bytes > HIGH_BYTES) {
+                this.congested.set(socket.id, { since: now, missed: new Map() });
+                log.debug('Socket congested', { socketId: socket.id, bytes });
+            }
+            return;
+        }
+
+        if (bytes > DISCONNECT_BYTES || now - state.since > MAX_STALL_MS) {
+            const reason = bytes > DISCONNECT_BYTES ? 'buffer' : 'stall';
+            log.warn('Disconnecting slow client', { socketId: socket.id, bytes, congestedMs: now - state.since, reason });
+            metrics.slowClientDisconnects.labels(reason).inc();
+            this.congested.delete(socket.id);
+            socket.disconnect(true);
+        } else if (bytes <= LOW_BYTES) {
+            this.congested.delete(socket.id);
+            this.resync(socket, state.missed);
+        }
+    });
+  }
+
+  resync(socket, missed) {
+    log.debug('Socket drained, resyncing', { socketId: socket.id, streams: missed.size });
+    missed.forEach(([event, room]) => {
+        const fn = this.resyncs.get(event);
+        if (fn) fn(socket, room);
+    });
+  }
+
+  // A superseded frame sent to the socket directly (join snapshot): while congested it is
+  // recorded as missed in `room` like a dropped broadcast, and sent by that room's resync on drain
+  defer(socket, event, room) {
+    const state = this.congested.get(socket.id);
+    if (!state || !SUPERSEDED.has(event)) return false;
+
+    state.missed.set(`${event}|${room}`, [event, room]);
+    metrics.droppedFrames.labels(event).inc();
+    return true;
+  }
+
+  // Local delivery: congested sockets this superseded frame would reach are left out
+  filter(adapter, packet, opts) {
+    const event = packet.data && packet.data[0];
+    if (!SUPERSEDED.has(event)) return opts;
+
+    let except = null;
+    this.congested.forEach((state, socketId) => {
+        const room = this.targetRoom(adapter, socketId, opts);
+        if (room === undefined) return;
+
+        if (!except) except = new Set(opts.except);
+        except.add(socketId);
+        state.missed.set(`${event}|${room}`, [event, room]);
+        metrics.droppedFrames.labels(event).inc();
+    });
+
+    return except ? { ...opts, except } : opts;
+  }
+
+  // The room through which the broadcast reaches the socket (null = all sockets), undefined if it doesn't
+  targetRoom(adapter, socketId, opts) {
+    const rooms = adapter.sids.get(socketId);
+    if (!rooms) return undefined;
+    for (const room of opts.except) {
+        if (rooms.has(room)) return undefined;
+    }
+    if (opts.rooms.size === 0) return null;
+    for (const room of opts.rooms) {
+        if (rooms.has(room)) return room.endsWith(BINARY_SUFFIX) ? room.slice(0, -BINARY_SUFFIX.length) : room;
+    }
+    return undefined;
+  }
+
+  // In-memory adapter with the congestion filter on local delivery
+  createAdapter() {
+    const backpressure = this;
+    return class BackpressureAdapter extends Adapter {
+      broadcast(packet, opts) {
+        if (backpressure.congested.size > 0) opts = backpressure.filter(this, packet, opts);
+        super.broadcast(packet, opts);
+      }
+    };
+  }
+}
+
+module.exports = new Backpressure();
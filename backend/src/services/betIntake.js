@@ -0,0 +1,324 @@
+const { performance } = require('perf_hooks');
+const { v4: uuidv4 } = require('uuid');
+const shardRouter = require('./shardRouter');
+const metrics = require('./metrics');
+const log = require('./logger').child('INTAKE');
+
+// Bet intake on the fixture's owning shard: place_bet -> validate -> queue -> micro-batch commit.
+//
+//  - Idempotency: a client-supplied idempotencyKey is remembered (per user) in a bounded
+//    TTL cache. A retry of a bet still in flight waits for the original; a retry of a
+//    finished one gets the original bet_accepted/bet_rejected replayed, never a second debit.
+//    Rejections caused by infrastructure failures are not remembered: retrying those is the point.
+//  - Per-user ordering: while a user has bets in a committing batch, their newer bets stay
+//    queued for the next batch, so debits of one user are applied strictly in order.
+//  - Micro-batching: every BET_BATCH_MS the queue is committed together: one wallet debit
+//    request per other wallet shard and one ledger group commit for all the opened bets.
+//    Stakes of this shard's users are journaled in the same record as their bet (bet_placed);
+//    debits on other shards are confirmed once the bet is durable, or refunded when it isn't.
+
+const BATCH_MS = parseInt(process.env.BET_BATCH_MS) || 5;
+const IDEMPOTENCY_TTL_MS = parseInt(process.env.BET_IDEMPOTENCY_TTL_MS) || 10 * 60 * 1000;
+const IDEMPOTENCY_MAX = parseInt(process.env.BET_IDEMPOTENCY_MAX) || 100000;
+
+// High-resolution wall clock, comparable between shards (bet latency spans two processes)
+const wallClock = () => performance.timeOrigin + performance.now();
+
+class BetIntake {
+  constructor() {
+    this.io = null;
+    this.matchService = null;
+    this.betService = null;
+    this.flashService = null;
+    this.wallet = null;
+    this.ledger = null;
+
+    this.queue = []; // validated entries waiting for the next batch
+    this.busyUsers = new Set(); // users with bets in the batch being committed
+    this.opening = new Set(); // ids of bets debited on another shard whose bet_opened is not durable yet
+    this.flushTimer = null;
+    this.idempotency = new Map(); // "userId:key" -> { expiresAt, socketIds, response } (insertion = age order)
+  }
+
+  setIo(io) {
+    this.io = io;
+  }
+
+  setMatchService(service) {
+    this.matchService = service;
+  }
+
+  setBetService(service) {
+    this.betService = service;
+  }
+
+  setFlashService(service) {
+    this.flashService = service;
+  }
+
+  setWallet(wallet) {
+    this.wallet = wallet;
+  }
+
+  setLedger(ledger) {
+    this.ledger = ledger;
+  }
+
+  // --- Intake ---
+
+  submit(data, socketId, userId, receivedAt = wallClock()) {
+    const entry = { data, socketId, userId, receivedAt, cacheKey: null };
+
+    if (data.idempotencyKey) {
+        entry.cacheKey = `${userId}:${data.idempotencyKey}`;
+        if (this.replayDuplicate(entry.cacheKey, socketId)) return;
+        this.remember(entry.cacheKey, socketId);
+    }
+
+    const reason = this.validate(data);
+    if (reason) {
+        this.finish(entry, 'bet_rejected', { reason });
+        return;
+    }
+
+    entry.amount = parseFloat(data.amount);
+    entry.betId = uuidv4();
+    this.queue.push(entry);
+    this.scheduleFlush();
+  }
+
+  validate(data) {
+    // 1. Validate Match & Data
+    let match = null;
+    if (data.matchId) {
+        match = this.matchService.getMatch(data.matchId);
+    } else if (data.marketId) {
+        const fixtureId = data.marketId.split('_')[1];
+        match = this.matchService.getMatch(fixtureId);
+        data.matchId = fixtureId;
+    }
+
+    if (!match) {
+        log.warn('Rejected: match not found', { matchId: data.matchId });
+        return "Jogo não encontrado.";
+    }
+
+    data.currentScore = `${match.goals.home}-${match.goals.away}`;
+
+    // Feed events act on the market before the score or clock catch up:
+    // suspended (VAR, penalty, red card) or already decided by a goal
+    const market = this.flashService && data.marketId
+        ? this.flashService.findMarket(match.fixture.id, data.marketId)
+        : null;
+    if (market && market.status !== 'OPEN') {
+        log.warn('Rejected: market not open', { marketId: data.marketId, status: market.status });
+        return market.status === 'SUSPENDED' ? "Mercado suspenso." : "Mercado encerrado.";
+    }
+
+    // 2. Validate Game Status & Time
+    const isLive = ['IN_PLAY'].includes(match.fixture.status.short);
+    const currentMinute = match.fixture.status.elapsed;
+
+    // Strict Time Check: Must be BEFORE window starts/ends (depending on market type logic)
+    // For MVP, simplistic check: minute < windowEnd
+    if (!isLive || currentMinute >= data.windowEnd) {
+        log.warn('Rejected: window closed', { minute: currentMinute, windowEnd: data.windowEnd });
+        return "Tempo esgotado ou jogo parado.";
+    }
+
+    // 3. Validate Amount (balance is checked by the wallet when the batch commits)
+    if (!(parseFloat(data.amount) > 0)) {
+        log.warn('Rejected: invalid amount', { amount: data.amount });
+        return "Valor inválido.";
+    }
+
+    return null;
+  }
+
+  // --- Micro-batching ---
+
+  scheduleFlush() {
+    if (this.flushTimer) return;
+    this.flushTimer = setTimeout(() => {
+        this.flushTimer = null;
+        this.flush();
+    }, BATCH_MS);
+  }
+
+  flush() {
+    const batch = [];
+    const deferred = [];
+    this.queue.forEach(entry => {
+        if (this.busyUsers.has(entry.userId)) deferred.push(entry);
+        else batch.push(entry);
+    });
+    this.queue = deferred;
+    if (batch.length === 0) return;
+
+    batch.forEach(entry => this.busyUsers.add(entry.userId));
+    metrics.intakeBatchSize.observe(batch.length);
+
+    this.commit(batch)
+        .catch(error => {
+            log.error('Batch commit failed', { bets: batch.length, error });
+            batch.forEach(entry => this.finish(entry, 'bet_rejected', { reason: "Erro ao registrar aposta." }, true));
+        })
+        .finally(() => {
+            batch.forEach(entry => this.busyUsers.delete(entry.userId));
+            if (this.queue.length > 0) this.scheduleFlush();
+        });
+  }
+
+  async commit(batch) {
+    // 4. Process Transaction: stakes of this shard's users are reserved here, other wallet
+    //    shards get one debit request each; users' order is kept inside every group
+    const byShard = new Map();
+    batch.forEach(entry => {
+        entry.shard = shardRouter.ownerOfUser(entry.userId);
+        if (!byShard.has(entry.shard)) byShard.set(entry.shard, []);
+        byShard.get(entry.shard).push(entry);
+    });
+
+    await Promise.all([...byShard].map(async ([shard, entries]) => {
+        const debits = entries.map(e => ({ userId: e.userId, amount: e.amount, betId: e.betId, fixtureId: parseInt(e.data.matchId) }));
+        let results;
+        if (shard === shardRouter.index) {
+            results = this.wallet.reserve(debits);
+        } else {
+            try {
+                results = await this.wallet.debitBatch(shard, debits);
+            } catch (error) {
+                // A timed-out request may still have been journaled there
+                log.error('Wallet unavailable', { shard, error });
+                this.wallet.refund(shard, debits.map(d => d.betId))
+                    .catch(refundError => log.error('Refund failed', { shard, error: refundError }));
+                results = entries.map(() => ({ ok: false, reason: "Erro ao registrar aposta.", transient: true }));
+            }
+        }
+        entries.forEach((entry, i) => { entry.debit = results[i]; });
+    }));
+
+    const accepted = [];
+    batch.forEach(entry => {
+        if (entry.debit.ok) accepted.push(entry);
+        else this.finish(entry, 'bet_rejected', { reason: entry.debit.reason }, entry.debit.transient);
+    });
+    if (accepted.length === 0) return;
+
+    // 5. Register Bets
+    // Pass userId to BetService so it knows who to refund/pay later
+    const bets = accepted.map(entry => {
+        entry.data.userId = entry.userId;
+        entry.data.betId = entry.betId;
+        return this.betService.placeBet(entry.data, entry.socketId);
+    });
+
+    // 6. Journal every opened bet in one group commit (with its stake when the wallet is here),
+    //    then Success Responses
+    const remote = new Map(); // wallet shard -> bet ids debited there
+    const records = accepted.map((entry, i) => {
+        if (entry.shard === shardRouter.index) {
+            return { type: 'bet_placed', userId: entry.userId, amount: entry.amount, bet: bets[i] };
+        }
+        if (!remote.has(entry.shard)) remote.set(entry.shard, []);
+        remote.get(entry.shard).push(entry.betId);
+        this.opening.add(entry.betId);
+        return { type: 'bet_opened', bet: bets[i] };
+    });
+
+    try {
+        await this.ledger.appendBatch(records);
+    } catch (error) {
+        log.error('Ledger write failed', { bets: bets.length, error });
+        accepted.forEach((entry, i) => this.betService.cancelBet(bets[i]));
+        accepted.forEach(entry => {
+            if (entry.shard === shardRouter.index) this.wallet.release(entry.userId, entry.amount);
+        });
+        remote.forEach((betIds, shard) => {
+            this.wallet.refund(shard, betIds)
+                .catch(refundError => log.error('Refund failed', { shard, bets: betIds.length, error: refundError }));
+        });
+        accepted.forEach(entry => this.finish(entry, 'bet_rejected', { reason: "Erro ao registrar aposta." }, true));
+        return;
+    } finally {
+        remote.forEach(betIds => betIds.forEach(betId => this.opening.delete(betId)));
+    }
+
+    remote.forEach((betIds, shard) => this.wallet.confirm(shard, betIds));
+
+    accepted.forEach(entry => {
+        this.finish(entry, 'bet_accepted', {
+            amount: entry.data.amount,
+            newBalance: entry.debit.balance,
+            marketId: entry.data.marketId
+        });
+    });
+  }
+
+  // Fixture-shard side of WalletService.reconcile(): what this shard knows of each bet
+  // ('open', 'settling' = closed with the credit not acknowledged yet, 'unknown' = never opened)
+  statusOf(betIds) {
+    const { bets, unpaid } = this.ledger.state;
+    return betIds.map(betId => {
+        if (bets[betId] || this.opening.has(betId)) return 'open';
+        return unpaid[betId] ? 'settling' : 'unknown';
+    });
+  }
+
+  // transient: an infrastructure failure (wallet shard, ledger) rather than a verdict on the bet.
+  // Its rejection is not cached, so a retry with the same idempotencyKey is processed again.
+  finish(entry, event, payload, transient = false) {
+    if (entry.data.idempotencyKey) payload.idempotencyKey = entry.data.idempotencyKey;
+
+    const outcome = event === 'bet_accepted' ? 'accepted' : 'rejected';
+    metrics.betLatency.labels(outcome).observe((wallClock() - entry.receivedAt) / 1000);
+
+    const cached = entry.cacheKey ? this.idempotency.get(entry.cacheKey) : null;
+    if (cached) {
+        cached.response = { event, payload };
+        cached.socketIds.forEach(socketId => this.emit(socketId, event, payload));
+        cached.socketIds = null;
+        if (transient) this.idempotency.delete(entry.cacheKey);
+    } else {
+        this.emit(entry.socketId, event, payload);
+    }
+  }
+
+  emit(socketId, event, payload) {
+    if (this.io) this.io.to(socketId).emit(event, payload);
+  }
+
+  // --- Idempotency cache ---
+
+  // Returns true when the key was seen before (the retry is answered or parked)
+  replayDuplicate(cacheKey, socketId) {
+    const cached = this.idempotency.get(cacheKey);
+    if (!cached) return false;
+    if (cached.expiresAt <= Date.now()) {
+        this.idempotency.delete(cacheKey);
+        return false;
+    }
+
+    metrics.betDuplicates.inc();
+    if (cached.response) {
+        this.emit(socketId, cached.response.event, cached.response.payload);
+    } else {
+        cached.socketIds.add(socketId); // answered together with the original
+    }
+    return true;
+  }
+
+  remember(cacheKey, socketId) {
+    const now = Date.now();
+
+    // Map iteration is insertion order, so expired (and, over the cap, oldest) keys are at the head
+    for (const [key, cached] of this.idempotency) {
+        if (cached.expiresAt > now && this.idempotency.size < IDEMPOTENCY_MAX) break;
+        this.idempotency.delete(key);
+    }
+
+    this.idempotency.set(cacheKey, { expiresAt: now + IDEMPOTENCY_TTL_MS, socketIds: new Set([socketId]), response: null });
+  }
+}
+
+module.exports = new BetIntake();
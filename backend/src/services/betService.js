@@ -1,23 +1,71 @@
 const { v4: uuidv4 } = require('uuid');
+const { performance } = require('perf_hooks');
+const shardRouter = require('./shardRouter');
+const metrics = require('./metrics');
+const log = require('./logger').child('BET');
+const judgeLog = log.child('JUIZ');
+
+// Compatibility: also emit the old one-event-per-bet 'bet_resolved' next to the batched 'bets_resolved'
+const LEGACY_BET_RESOLVED = process.env.LEGACY_BET_RESOLVED === 'true';
+
+// Settlement journal/credit failures are retried until they go through, backing off up to the max
+const SETTLE_RETRY_BASE_MS = 1000;
+const SETTLE_RETRY_MAX_MS = 60 * 1000;
+
+// "Goal in ...?" markets: any goal after the bet was placed decides them (YES wins, NO loses)
+const isGoalMarket = (type) => !!type && (type.includes('goal') || type === 'flash_1' || type === 'stoppage_goal');
+
+const parseScore = (scoreStr) => {
+    const parts = scoreStr.split('-').map(s => parseInt(s.trim()));
+    return { home: parts[0], away: parts[1] };
+};
+
+// A goal counts only when a side's tally went up: a score that drops back (VAR cancelled
+// a goal that was already in when the bet was placed) is not a goal after the bet
+const scoredSince = (initial, current) => current.home > initial.home || current.away > initial.away;
 
 class BetService {
     constructor() {
-        this.activeBets = [];
+        this.pendingByMatch = new Map(); // matchId -> pending bets sorted by windowEnd
+        this.pendingByMarket = new Map(); // matchId -> Map marketId -> pending bets (early settlement lookup)
+        this.lastMatchState = new Map(); // matchId -> "elapsed|status|score" seen on last pass
+        this.lastScore = new Map(); // matchId -> score seen on last pass
         this.io = null;
-        this.usersDb = null;
+        this.wallet = null;
+        this.ledger = null;
     }
 
     setIo(io) {
         this.io = io;
     }
 
-    setUsersDb(db) {
-        this.usersDb = db;
+    setWallet(wallet) {
+        this.wallet = wallet;
+    }
+
+    setLedger(ledger) {
+        this.ledger = ledger;
+    }
+
+    // Re-index pending bets recovered from the ledger after a restart
+    restoreBets(bets) {
+        bets.forEach(bet => this.indexBet(bet));
+        if (bets.length > 0) log.info('Restored pending bets', { count: bets.length });
+    }
+
+    // Undo placeBet (e.g. the ledger write failed before the bet was acknowledged)
+    cancelBet(bet) {
+        const bucket = this.pendingByMatch.get(bet.matchId);
+        if (!bucket) return;
+        const index = bucket.indexOf(bet);
+        if (index !== -1) bucket.splice(index, 1);
+        this.unindexMarket(bet);
+        if (bucket.length === 0) this.dropMatch(bet.matchId);
     }
 
     placeBet(betData, socketId) {
         const bet = {
-            id: uuidv4(),
+            id: betData.betId || uuidv4(),
             socketId: socketId,
             userId: betData.userId, // Link to user account
             matchId: parseInt(betData.matchId),
@@ -32,59 +80,167 @@ class BetService {
             placedAt: Date.now()
         };
 
-        this.activeBets.push(bet);
-        console.log(`[BET] New Bet Placed: ${bet.id} on Match ${bet.matchId} (${bet.type} - ${bet.option}) by ${bet.userId}`);
+        this.indexBet(bet);
+        log.debug('Bet placed', { betId: bet.id, matchId: bet.matchId, type: bet.type, option: bet.option, userId: bet.userId });
 
         return bet;
     }
 
+    indexBet(bet) {
+        let bucket = this.pendingByMatch.get(bet.matchId);
+        if (!bucket) {
+            bucket = [];
+            this.pendingByMatch.set(bet.matchId, bucket);
+        }
+
+        // Binary insert keeps the bucket ordered by windowEnd (stoppage bets have none -> last)
+        const end = this.windowEndOf(bet);
+        let lo = 0, hi = bucket.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >>> 1;
+            if (this.windowEndOf(bucket[mid]) <= end) lo = mid + 1;
+            else hi = mid;
+        }
+        bucket.splice(lo, 0, bet);
+
+        let markets = this.pendingByMarket.get(bet.matchId);
+        if (!markets) {
+            markets = new Map();
+            this.pendingByMarket.set(bet.matchId, markets);
+        }
+        const marketKey = bet.marketId || bet.type;
+        if (!markets.has(marketKey)) markets.set(marketKey, []);
+        markets.get(marketKey).push(bet);
+
+        // Force a re-check of this match on the next pass
+        this.lastMatchState.delete(bet.matchId);
+    }
+
+    unindexMarket(bet) {
+        const markets = this.pendingByMarket.get(bet.matchId);
+        if (!markets) return;
+        const marketKey = bet.marketId || bet.type;
+        const bets = markets.get(marketKey);
+        if (!bets) return;
+        const index = bets.indexOf(bet);
+        if (index !== -1) bets.splice(index, 1);
+        if (bets.length === 0) markets.delete(marketKey);
+        if (markets.size === 0) this.pendingByMarket.delete(bet.matchId);
+    }
+
+    dropMatch(matchId) {
+        this.pendingByMatch.delete(matchId);
+        this.pendingByMarket.delete(matchId);
+        this.lastMatchState.delete(matchId);
+        this.lastScore.delete(matchId);
+    }
+
+    windowEndOf(bet) {
+        return typeof bet.windowEnd === 'number' ? bet.windowEnd : Infinity;
+    }
+
     hasPendingBetsForMatch(matchId) {
-        return this.activeBets.some(b => b.matchId === matchId && b.status === 'PENDING');
+        return this.pendingByMatch.has(matchId);
     }
 
-    resolveBets(liveMatches) {
-        if (this.activeBets.length === 0) return;
+    pendingMatchIds() {
+        return this.pendingByMatch.keys();
+    }
 
-        let resolvedCount = 0;
+    resolveBets(liveMatches) {
+        if (this.pendingByMatch.size === 0) return;
 
-        this.activeBets.forEach(bet => {
-            if (bet.status !== 'PENDING') return;
+        const batch = []; // every bet that becomes due in this pass, settled together
 
-            const match = liveMatches.find(m => m.fixture.id === bet.matchId);
-            if (!match) return;
+        liveMatches.forEach(match => {
+            const matchId = match.fixture.id;
+            const bucket = this.pendingByMatch.get(matchId);
+            if (!bucket) return;
 
             const currentMinute = match.fixture.status.elapsed;
             const currentScore = `${match.goals.home}-${match.goals.away}`;
-            const isFinished = ['FINISHED', 'FT', 'AET', 'PEN'].includes(match.fixture.status.short);
+            const statusShort = match.fixture.status.short;
 
-            if (currentMinute > bet.windowEnd || isFinished) {
-                console.log(`\n⚖️ [JUIZ] RESOLVENDO APOSTA: ${bet.id}`);
-                console.log(`Placar Inicial: ${bet.initialScore} | Placar Atual: ${currentScore}`);
+            // Skip fixtures whose clock, score and status did not move since the last pass
+            const stateKey = `${currentMinute}|${statusShort}|${currentScore}`;
+            if (this.lastMatchState.get(matchId) === stateKey) return;
+            this.lastMatchState.set(matchId, stateKey);
 
-                this.settleBet(bet, currentScore);
-                resolvedCount++;
+            const isFinished = ['FINISHED', 'FT', 'AET', 'PEN'].includes(statusShort);
+
+            const scoreChanged = this.lastScore.get(matchId) !== currentScore;
+            this.lastScore.set(matchId, currentScore);
+
+            // Bets are ordered by windowEnd, so the due ones form a prefix of the bucket
+            let due = 0;
+            if (isFinished) {
+                due = bucket.length;
+            } else {
+                while (due < bucket.length && currentMinute > this.windowEndOf(bucket[due])) due++;
+            }
+
+            const settled = bucket.splice(0, due);
+            settled.forEach(bet => this.unindexMarket(bet));
+
+            // Early settlement: a new score decides the goal markets of bets placed before it
+            if (scoreChanged && bucket.length > 0) {
+                const decided = this.decidedByScore(matchId, currentScore);
+                if (decided.size > 0) {
+                    let kept = 0;
+                    for (let i = 0; i < bucket.length; i++) {
+                        if (decided.has(bucket[i])) settled.push(bucket[i]);
+                        else bucket[kept++] = bucket[i];
+                    }
+                    bucket.length = kept; // still ordered by windowEnd
+                    judgeLog.debug('Goal decided bets early', { matchId, score: currentScore, bets: decided.size });
+                }
             }
+
+            if (settled.length === 0) return;
+            if (bucket.length === 0) this.dropMatch(matchId);
+
+            settled.forEach(bet => batch.push({ bet, finalScore: currentScore }));
         });
 
-        if (resolvedCount > 0) {
-            this.activeBets = this.activeBets.filter(b => b.status === 'PENDING');
-        }
+        if (batch.length > 0) this.settleBatch(batch);
+    }
+
+    // Pending goal-market bets of the match whose outcome this score already fixes (removed from the market index)
+    decidedByScore(matchId, currentScore) {
+        const decided = new Set();
+        const markets = this.pendingByMarket.get(matchId);
+        if (!markets) return decided;
+
+        const current = parseScore(currentScore);
+        markets.forEach((bets, marketKey) => {
+            if (!isGoalMarket(bets[0].type)) return;
+
+            let kept = 0;
+            for (let i = 0; i < bets.length; i++) {
+                if (scoredSince(parseScore(bets[i].initialScore), current)) decided.add(bets[i]);
+                else bets[kept++] = bets[i];
+            }
+            bets.length = kept;
+            if (kept === 0) markets.delete(marketKey);
+        });
+
+        if (markets.size === 0) this.pendingByMarket.delete(matchId);
+        return decided;
     }
 
     settleBet(bet, finalScore) {
-        let isWin = false;
+        this.settleBatch([{ bet, finalScore }]);
+    }
 
-        const parseScore = (scoreStr) => {
-            const parts = scoreStr.split('-').map(s => parseInt(s.trim()));
-            return { home: parts[0], away: parts[1] };
-        };
+    evaluateBet(bet, finalScore) {
+        let isWin = false;
 
         const initial = parseScore(bet.initialScore);
         const final = parseScore(finalScore);
 
-        const goalHappened = (final.home !== initial.home) || (final.away !== initial.away);
+        const goalHappened = scoredSince(initial, final);
 
-        if (bet.type.includes('goal') || bet.type === 'flash_1' || bet.type === 'stoppage_goal') {
+        if (isGoalMarket(bet.type)) {
              if (bet.option === 'YES' && goalHappened) isWin = true;
              else if (bet.option === 'NO' && !goalHappened) isWin = true;
         }
@@ -97,25 +253,141 @@ class BetService {
         }
 
         bet.status = isWin ? 'WIN' : 'LOSS';
-        const payout = isWin ? (bet.amount * bet.odd) : 0;
+        return isWin ? (bet.amount * bet.odd) : 0;
+    }
+
+    settleBatch(entries) {
+        const started = performance.now();
+        metrics.settlementBatchSize.observe(entries.length);
 
-        // Credit to "Bank" (Users DB)
-        let newBalance = 0;
-        if (this.usersDb && bet.userId && this.usersDb[bet.userId]) {
-            if (isWin) {
-                this.usersDb[bet.userId].balance += payout;
+        // 1. Decide every bet and sum payouts per user
+        const creditsByUser = new Map(); // userId -> total payout (0 for users who only lost)
+        const betIdsByUser = new Map(); // userId -> settled bet ids
+        const resultsBySocket = new Map(); // socketId -> { userId, results: [] }
+        const records = []; // ledger journal for this batch
+        let wins = 0;
+        let totalPayout = 0;
+
+        entries.forEach(({ bet, finalScore }) => {
+            const payout = this.evaluateBet(bet, finalScore);
+            if (payout > 0) {
+                wins++;
+                totalPayout += payout;
             }
-            newBalance = this.usersDb[bet.userId].balance;
-        }
+            creditsByUser.set(bet.userId, (creditsByUser.get(bet.userId) || 0) + payout);
+            if (!betIdsByUser.has(bet.userId)) betIdsByUser.set(bet.userId, []);
+            betIdsByUser.get(bet.userId).push(bet.id);
+
+            let socketEntry = resultsBySocket.get(bet.socketId);
+            if (!socketEntry) {
+                socketEntry = { userId: bet.userId, results: [] };
+                resultsBySocket.set(bet.socketId, socketEntry);
+            }
+            socketEntry.results.push({ bet, payout, finalScore });
+            // Same shard as the wallet: payout and closing in one record; otherwise the closed bet
+            // stays 'unpaid' in the ledger until the wallet shard acknowledges the credit
+            records.push(shardRouter.ownsUser(bet.userId)
+                ? { type: 'bet_settled', userId: bet.userId, betId: bet.id, status: bet.status, payout }
+                : { type: 'bet_closed', betId: bet.id, status: bet.status, payout, userId: bet.userId });
+        });
+
+        judgeLog.info('Settled bets', { bets: entries.length, wins, payout: parseFloat(totalPayout.toFixed(2)), users: creditsByUser.size });
 
-        console.log(`Resultado: ${bet.status} | Payout: R$ ${payout} | User Balance: ${newBalance}`);
+        // 2. Journal the settlements (one group commit), then pay each user once and notify
+        //    with the balance. Users of this shard were paid by the journal itself; the others
+        //    are credited on their wallet's shard.
+        //    The bets are already out of the pending index, so neither step may give up: both
+        //    retry with backoff. If the process dies before the journal, the ledger still has the
+        //    bets open and they are settled again after recovery; if it dies before a credit is
+        //    acknowledged, the bets are still 'unpaid' there and resumeCredits() sends it again.
+        const settlement = { resultsBySocket, notified: new Set(), started };
+        this.withRetry('journal settlements', () => this.ledger ? this.ledger.appendBatch(records) : Promise.resolve(),
+            () => this.notifyPending(settlement, [...creditsByUser.keys()]))
+            .then(() => Promise.all([...creditsByUser].map(([userId, credit]) => {
+                if (shardRouter.ownsUser(userId)) {
+                    this.notifySettled(settlement, userId, this.wallet.applyPayout(userId, credit));
+                    return undefined;
+                }
+                return this.creditRemote(userId, credit, betIdsByUser.get(userId), () => this.notifyPending(settlement, [userId]))
+                    .then(balance => this.notifySettled(settlement, userId, balance));
+            })))
+            .then(() => metrics.settlementDuration.observe((performance.now() - started) / 1000));
+    }
+
+    // Credit on the user's shard until it goes through, then mark the bets paid
+    creditRemote(userId, credit, betIds, onFirstFailure = () => {}) {
+        return this.withRetry('credit payout', () => this.wallet.credit(userId, credit, betIds), onFirstFailure, { userId, credit })
+            .then(balance => {
+                if (this.ledger) {
+                    this.ledger.append({ type: 'credit_confirmed', betIds })
+                        .catch(error => judgeLog.error('Credit acknowledgement not journaled', { betIds, error })); // re-sent after a restart, the wallet skips it
+                }
+                return balance;
+            });
+    }
+
+    // Recovery: closed bets whose credit was never acknowledged, re-sent one by one
+    // (the wallet keys credits by bet id and skips the ones it already applied)
+    resumeCredits(unpaid) {
+        const betIds = Object.keys(unpaid);
+        if (betIds.length === 0) return;
+        judgeLog.info('Resuming unacknowledged credits', { bets: betIds.length });
+        betIds.forEach(betId => this.creditRemote(unpaid[betId].userId, unpaid[betId].payout, [betId]));
+    }
+
+    // Resolves with fn()'s result; onFirstFailure runs once, when the first attempt fails
+    withRetry(what, fn, onFirstFailure, context = {}) {
+        return new Promise(resolve => {
+            const attempt = (n) => {
+                fn().then(resolve, error => {
+                    const delayMs = Math.min(SETTLE_RETRY_MAX_MS, SETTLE_RETRY_BASE_MS * 2 ** n);
+                    judgeLog.error(`Failed to ${what}, retrying`, { ...context, attempt: n + 1, delayMs, error });
+                    if (n === 0) onFirstFailure();
+                    setTimeout(() => attempt(n + 1), delayMs);
+                });
+            };
+            attempt(0);
+        });
+    }
 
+    // The outcome goes out right away even while the payout is still being retried;
+    // the balance follows in a results-less 'bets_resolved' once the credit lands
+    notifyPending(settlement, userIds) {
+        const users = new Set(userIds);
+        const pending = new Map();
+        settlement.resultsBySocket.forEach((entry, socketId) => {
+            if (!users.has(entry.userId) || settlement.notified.has(socketId)) return;
+            settlement.notified.add(socketId);
+            pending.set(socketId, entry);
+        });
+        this.emitResults(pending, new Map());
+    }
+
+    notifySettled(settlement, userId, balance) {
+        if (!this.io) return;
+        settlement.resultsBySocket.forEach((entry, socketId) => {
+            if (entry.userId !== userId) return;
+            if (settlement.notified.has(socketId)) {
+                this.io.to(socketId).emit('bets_resolved', { results: [], newBalance: balance });
+            } else {
+                this.emitResults(new Map([[socketId, entry]]), new Map([[userId, balance]]));
+            }
+        });
+    }
+
+    emitResults(resultsBySocket, balances) {
+        // One payload per socket carrying the final authoritative balance
         if (this.io) {
-            this.io.to(bet.socketId).emit('bet_resolved', {
-                bet: bet,
-                payout: payout,
-                finalScore: finalScore,
-                newBalance: newBalance // Sync authoritative balance
+            resultsBySocket.forEach(({ userId, results }, socketId) => {
+                const newBalance = balances.get(userId); // undefined while the credit is still retrying
+
+                this.io.to(socketId).emit('bets_resolved', { results, newBalance });
+
+                if (LEGACY_BET_RESOLVED) {
+                    results.forEach(({ bet, payout, finalScore }) => {
+                        this.io.to(socketId).emit('bet_resolved', { bet, payout, finalScore, newBalance });
+                    });
+                }
             });
         }
     }
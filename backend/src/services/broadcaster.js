@@ -0,0 +1,84 @@
+const wireCodec = require('./wireCodec');
+const shardRouter = require('./shardRouter');
+const log = require('./logger').child('WIRE');
+
+// Room emits of the hot state streams, per negotiated codec.
+// A socket that connects with auth { codec: 'msgpack/1' } gets match_update, flash_patch,
+// flash_update and lobby_patch as compact MessagePack frames (wireCodec.js); everyone else,
+// and every other event, stays on JSON. Binary sockets are in each room twice: `room` for
+// everything and `room#bin` for the packed streams, which the JSON emit excludes.
+// A payload is serialized once per codec per emit, never per socket.
+
+const BINARY_SUFFIX = '#bin';
+
+class Broadcaster {
+  constructor() {
+    this.io = null;
+    this.backpressure = null;
+  }
+
+  setIo(io) {
+    this.io = io;
+  }
+
+  setBackpressure(backpressure) {
+    this.backpressure = backpressure;
+  }
+
+  // Connection time: picks the codec and tells the client which one it got
+  negotiate(socket) {
+    const requested = socket.handshake.auth?.codec;
+    socket.data.codec = requested === wireCodec.CODEC ? wireCodec.CODEC : 'json';
+    if (requested && requested !== socket.data.codec) {
+        log.debug('Unsupported codec requested, using JSON', { socketId: socket.id, requested });
+    }
+    socket.emit('wire_codec', { codec: socket.data.codec });
+    return socket.data.codec;
+  }
+
+  isBinary(socket) {
+    return socket.data.codec === wireCodec.CODEC;
+  }
+
+  join(socket, room) {
+    socket.join(room);
+    if (this.isBinary(socket)) socket.join(room + BINARY_SUFFIX);
+  }
+
+  leave(socket, room) {
+    socket.leave(room);
+    if (this.isBinary(socket)) socket.leave(room + BINARY_SUFFIX);
+  }
+
+  emit(room, event, payload) {
+    if (!this.io) return;
+
+    const binaryRoom = room + BINARY_SUFFIX;
+    if (!wireCodec.hasLayout(event) || !this.hasBinarySockets(binaryRoom)) {
+        this.io.to(room).emit(event, payload);
+        return;
+    }
+
+    this.io.to(room).except(binaryRoom).emit(event, payload);
+    this.io.to(binaryRoom).emit(event, wireCodec.encode(event, payload));
+  }
+
+  // One socket (resyncs, snapshots): the frame in the codec it negotiated. A frame for `room`
+  // that a congested socket would have dropped is left to the room's drain resync instead.
+  send(socket, event, payload, room = null) {
+    if (room && this.backpressure && this.backpressure.defer(socket, event, room)) return;
+
+    if (this.isBinary(socket) && wireCodec.hasLayout(event)) {
+        socket.emit(event, wireCodec.encode(event, payload));
+    } else {
+        socket.emit(event, payload);
+    }
+  }
+
+  // Rooms of other shards aren't visible here, so clustered emits always serialize both ways
+  hasBinarySockets(binaryRoom) {
+    return shardRouter.count > 1 || this.io.of('/').adapter.rooms.has(binaryRoom);
+  }
+}
+
+module.exports = new Broadcaster();
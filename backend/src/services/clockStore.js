@@ -0,0 +1,234 @@
+// Live clock state of every cached fixture, kept as struct-of-arrays indexed by slot.
+// The per-second heartbeat advances the typed arrays in one loop without touching the
+// nested API-Football-shaped match objects; those are only brought up to date
+// (materialize) when something actually hands them out: GET /matches, a join snapshot,
+// the settlement pass, or a minute/score/status change that goes to clients anyway.
+//
+// Slot layout: fixtureId, status (STATUS code), raw (index into the raw status table),
+// elapsed, second, extra (-1 = none), goals, updatedAt (serverTimestamp) and flags.
+// `version` moves on every change; `dirty` is set by minute/score/status changes only.
+// `listVersion` (whole store) moves when the fixture set or a list-level field changes.
+
+const STATUS = ['SCHEDULED', 'IN_PLAY', 'PAUSED', 'FINISHED'];
+const STATUS_CODE = new Map(STATUS.map((status, code) => [status, code]));
+const IN_PLAY = STATUS_CODE.get('IN_PLAY');
+const PAUSED = STATUS_CODE.get('PAUSED');
+
+// Slot flags
+const ACTIVE = 1;
+const OWNED = 2; // this shard ticks it
+const SIMULATED = 4; // clock driven by the owner (debug fixture), not incremented here
+
+class ClockStore {
+  constructor(capacity = 1024) {
+    this.size = 0; // high-water mark of used slots
+    this.free = []; // released slots
+    this.slots = new Map(); // fixtureId -> slot
+    this.matches = []; // slot -> match object (materialization target)
+
+    // Raw API status codes ('1H', 'HT', ...), interned
+    this.rawNames = [];
+    this.rawCodes = new Map();
+
+    this.tickedCount = 0;
+    this.listVersion = 0;
+    this.allocate(capacity);
+  }
+
+  allocate(capacity) {
+    const grow = (Type, previous) => {
+        const next = new Type(capacity);
+        if (previous) next.set(previous);
+        return next;
+    };
+
+    this.capacity = capacity;
+    this.fixtureId = grow(Int32Array, this.fixtureId);
+    this.status = grow(Uint8Array, this.status);
+    this.raw = grow(Uint8Array, this.raw);
+    this.elapsed = grow(Int16Array, this.elapsed);
+    this.second = grow(Uint8Array, this.second);
+    this.extra = grow(Int16Array, this.extra);
+    this.homeGoals = grow(Uint16Array, this.homeGoals);
+    this.awayGoals = grow(Uint16Array, this.awayGoals);
+    this.updatedAt = grow(Float64Array, this.updatedAt);
+    this.flags = grow(Uint8Array, this.flags);
+    this.dirty = grow(Uint8Array, this.dirty);
+    this.version = grow(Uint32Array, this.version);
+    this.materialized = grow(Uint32Array, this.materialized);
+
+    this.ticked = grow(Int32Array, this.ticked); // slots ticked by the last advance() (reused buffer)
+  }
+
+  rawCode(name) {
+    let code = this.rawCodes.get(name);
+    if (code === undefined) {
+        code = this.rawNames.length;
+        this.rawNames.push(name);
+        this.rawCodes.set(name, code);
+    }
+    return code;
+  }
+
+  slotOf(fixtureId) {
+    const slot = this.slots.get(fixtureId);
+    return slot === undefined ? -1 : slot;
+  }
+
+  // Load (or reload) a match object's clock into its slot
+  // (dirty = false: the caller already broadcast this state, the tick shouldn't again)
+  upsert(match, owned, simulated = false, dirty = true) {
+    const fixtureId = match.fixture.id;
+    let slot = this.slots.get(fixtureId);
+
+    const status = match.fixture.status;
+    const statusCode = STATUS_CODE.get(status.short) ?? 0;
+    const rawCode = this.rawCode(status.raw || status.short);
+    const elapsed = status.elapsed || 0;
+    const extra = typeof status.extra === 'number' ? status.extra : -1;
+    const home = match.goals.home || 0;
+    const away = match.goals.away || 0;
+
+    if (slot === undefined) {
+        this.listVersion++;
+        if (this.free.length > 0) {
+            slot = this.free.pop();
+        } else {
+            if (this.size === this.capacity) this.allocate(this.capacity * 2);
+            slot = this.size++;
+        }
+        this.slots.set(fixtureId, slot);
+        this.fixtureId[slot] = fixtureId;
+    } else if (statusCode !== this.status[slot] || rawCode !== this.raw[slot] || elapsed !== this.elapsed[slot] ||
+        extra !== this.extra[slot] || home !== this.homeGoals[slot] || away !== this.awayGoals[slot]) {
+        this.listVersion++;
+    }
+
+    this.matches[slot] = match;
+    this.status[slot] = statusCode;
+    this.raw[slot] = rawCode;
+    this.elapsed[slot] = elapsed;
+    this.second[slot] = status.second || 0;
+    this.extra[slot] = extra;
+    this.homeGoals[slot] = home;
+    this.awayGoals[slot] = away;
+    this.updatedAt[slot] = match.serverTimestamp || 0;
+    this.flags[slot] = ACTIVE | (owned ? OWNED : 0) | (simulated ? SIMULATED : 0);
+    this.dirty[slot] = dirty ? 1 : 0;
+    this.version[slot]++;
+    this.materialized[slot] = this.version[slot]; // the object is the source of these values
+    return slot;
+  }
+
+  remove(fixtureId) {
+    const slot = this.slots.get(fixtureId);
+    if (slot === undefined) return;
+    this.slots.delete(fixtureId);
+    this.matches[slot] = null;
+    this.flags[slot] = 0;
+    this.dirty[slot] = 0;
+    this.free.push(slot);
+    this.listVersion++;
+  }
+
+  // Keep only the given fixture ids (plus simulated slots)
+  retain(fixtureIds) {
+    this.slots.forEach((slot, fixtureId) => {
+        if (!fixtureIds.has(fixtureId) && !(this.flags[slot] & SIMULATED)) this.remove(fixtureId);
+    });
+  }
+
+  // Heartbeat: in-play clocks gain a second (capped at :59 until the feed moves the minute),
+  // on every shard so any of them can answer a snapshot. The owned live (or simulated)
+  // slots are the ones this shard drives; returns their count, listed in this.ticked.
+  advance() {
+    const { flags, status, second, version } = this;
+    let count = 0;
+
+    for (let slot = 0; slot < this.size; slot++) {
+        const f = flags[slot];
+        if (!(f & ACTIVE)) continue;
+
+        const code = status[slot];
+        if (!(f & SIMULATED) && code === IN_PLAY && second[slot] < 59) {
+            second[slot]++;
+            version[slot]++;
+        }
+
+        if ((f & OWNED) && ((f & SIMULATED) || code === IN_PLAY || code === PAUSED)) {
+            this.ticked[count++] = slot;
+        }
+    }
+
+    this.tickedCount = count;
+    return count;
+  }
+
+  // Write a simulated clock (debug fixture) into its slot
+  setClock(slot, statusName, rawName, elapsed, second, now) {
+    const status = STATUS_CODE.get(statusName) ?? 0;
+    const raw = this.rawCode(rawName);
+    if (status !== this.status[slot] || raw !== this.raw[slot] || elapsed !== this.elapsed[slot]) {
+        this.dirty[slot] = 1;
+        this.listVersion++;
+    }
+    this.status[slot] = status;
+    this.raw[slot] = raw;
+    this.elapsed[slot] = elapsed;
+    this.second[slot] = second;
+    this.updatedAt[slot] = now;
+    this.version[slot]++;
+  }
+
+  // Bring the slot's match object up to date and return it
+  materialize(slot) {
+    const match = this.matches[slot];
+    if (!match || this.materialized[slot] === this.version[slot]) return match;
+
+    const status = match.fixture.status;
+    const rawName = this.rawNames[this.raw[slot]];
+    status.short = STATUS[this.status[slot]];
+    status.raw = rawName;
+    status.period = rawName;
+    status.elapsed = this.elapsed[slot];
+    status.second = this.second[slot];
+    status.extra = this.extra[slot] >= 0 ? this.extra[slot] : null;
+    match.goals.home = this.homeGoals[slot];
+    match.goals.away = this.awayGoals[slot];
+    match.serverTimestamp = this.updatedAt[slot];
+
+    this.materialized[slot] = this.version[slot];
+    return match;
+  }
+
+  materializeAll() {
+    for (let slot = 0; slot < this.size; slot++) {
+        if (this.flags[slot] & ACTIVE) this.materialize(slot);
+    }
+  }
+
+  get(fixtureId) {
+    const slot = this.slots.get(fixtureId);
+    return slot === undefined ? null : this.materialize(slot);
+  }
+
+  isActive(slot) {
+    return (this.flags[slot] & ACTIVE) !== 0;
+  }
+
+  isOwned(slot) {
+    return (this.flags[slot] & OWNED) !== 0;
+  }
+
+  statusName(slot) {
+    return STATUS[this.status[slot]];
+  }
+
+  rawName(slot) {
+    return this.rawNames[this.raw[slot]];
+  }
+}
+
+ClockStore.STATUS = STATUS;
+
+module.exports = ClockStore;
@@ -0,0 +1,52 @@
+const { Adapter } = require('socket.io-adapter');
+
+// Socket.IO adapter that fans broadcasts out to every shard through the ShardRouter bus,
+// so io.to(room).emit(...) on one worker reaches sockets connected to any worker.
+// Each worker delivers to its own sockets with the in-memory Base adapter (stock Adapter,
+// or one that filters local delivery, like the backpressure adapter).
+
+function createClusterAdapter(router, Base = Adapter) {
+  const adapters = new Map(); // namespace name -> adapter on this shard
+
+  router.on('io:broadcast', ({ nsp, packet, rooms, except, flags }) => {
+      const adapter = adapters.get(nsp);
+      if (!adapter) return;
+      Base.prototype.broadcast.call(adapter, packet, {
+          rooms: new Set(rooms),
+          except: new Set(except),
+          flags
+      });
+  });
+
+  return class ClusterAdapter extends Base {
+    constructor(nsp) {
+      super(nsp);
+      adapters.set(nsp.name, this);
+    }
+
+    broadcast(packet, opts) {
+      const flags = opts.flags || {};
+
+      // Targets that are all socket ids connected here never need to leave this worker
+      const allLocal = opts.rooms.size > 0 && [...opts.rooms].every(room => this.sids.has(room));
+
+      if (!flags.local && !allLocal) {
+          router.publish('io:broadcast', {
+              nsp: this.nsp.name,
+              packet,
+              rooms: [...opts.rooms],
+              except: [...opts.except],
+              flags
+          }, { includeSelf: false });
+      }
+
+      super.broadcast(packet, opts);
+    }
+
+    serverCount() {
+      return Promise.resolve(router.count);
+    }
+  };
+}
+
+module.exports = { createClusterAdapter };
@@ -0,0 +1,151 @@
+const matchEvents = require('./matchEvents');
+const shardRouter = require('./shardRouter');
+const metrics = require('./metrics');
+const log = require('./logger').child('INGEST');
+
+// Incremental fixture events ingest.
+//
+// API-Football embeds a fixture's events in the fixture objects the leader already fetches
+// (fixtures?live=all every poll, fixtures?ids=a-b-c for watched fixtures live=all doesn't
+// carry), so events cost no request of their own: RealDataService hands every fixture it
+// receives to ingest(), which diffs the events of the watched ones.
+// Events carry no id and are appended in order, except when VAR rewrites the list, so the
+// cursor per fixture is (events seen, key of the last one) plus the keys seen: a list with
+// the same length and last key is skipped without reading it, an append is read from the
+// cursor on, anything else is diffed against the keys seen.
+// The first list of a fixture only sets the cursor; history is not replayed into markets.
+//
+// New events are typed (goal, card, var, penalty; substitutions are dropped) and published
+// as 'feed:events' to every shard. Shards queue them and dispatch() puts them on the
+// MatchEventBus at the start of the 'markets' phase, so the tick that receives them also
+// evaluates and broadcasts the markets they suspended or resolved.
+
+const eventKey = (apiEvent) => {
+  const time = apiEvent.time || {};
+  const player = apiEvent.player || {};
+  return `${time.elapsed}|${time.extra ?? ''}|${apiEvent.team?.id ?? ''}|${player.id ?? player.name ?? ''}|${apiEvent.type}|${apiEvent.detail}`;
+};
+
+// API-Football type/detail -> bus type (null = not published)
+const typeOf = (apiEvent) => {
+  const type = String(apiEvent.type || '').toLowerCase();
+  const detail = String(apiEvent.detail || '').toLowerCase();
+  if (type === 'goal') return detail.includes('missed') ? 'penalty' : 'goal';
+  if (type === 'card') return 'card';
+  if (type === 'var') return detail.includes('penalty') ? 'penalty' : 'var';
+  return null;
+};
+
+class EventIngest {
+  constructor() {
+    this.matchService = null;
+    this.cursors = new Map(); // Leader: fixtureId -> { count, lastKey, seen: Set of event keys }
+    this.queue = []; // typed events waiting for the next 'markets' phase
+
+    shardRouter.on('feed:events', events => {
+        for (const event of events) this.queue.push(event);
+    });
+  }
+
+  setMatchService(service) {
+    this.matchService = service;
+  }
+
+  // Leader only: fixture objects from the upstream feed (raw API-Football shape)
+  ingest(apiMatches) {
+    const watched = this.matchService.activeMonitors;
+
+    // Fixtures that stopped being watched start from a fresh baseline if they come back
+    this.cursors.forEach((cursor, fixtureId) => {
+        if (!watched.has(fixtureId)) this.cursors.delete(fixtureId);
+    });
+
+    let published = [];
+    for (const apiMatch of apiMatches) {
+        const fixtureId = apiMatch.fixture.id;
+        if (!watched.has(fixtureId) || !Array.isArray(apiMatch.events)) continue;
+
+        const events = this.diff(fixtureId, apiMatch.events, apiMatch);
+        if (events.length > 0) {
+            log.debug('New fixture events', { fixtureId, events: events.length });
+            published = published.concat(events);
+        }
+    }
+
+    if (published.length > 0) shardRouter.publish('feed:events', published);
+  }
+
+  // Typed events not seen before (none for the first response of a fixture)
+  diff(fixtureId, apiEvents, match) {
+    const count = apiEvents.length;
+    const lastKey = count > 0 ? eventKey(apiEvents[count - 1]) : null;
+    const cursor = this.cursors.get(fixtureId);
+
+    if (!cursor) {
+        this.cursors.set(fixtureId, { count, lastKey, seen: new Set(apiEvents.map(eventKey)) });
+        return [];
+    }
+    if (count === cursor.count && lastKey === cursor.lastKey) return [];
+
+    // Appended: the event under the old cursor is still the one we saw last
+    const appended = count > cursor.count &&
+        (cursor.count === 0 || eventKey(apiEvents[cursor.count - 1]) === cursor.lastKey);
+
+    const fresh = [];
+    for (let i = appended ? cursor.count : 0; i < count; i++) {
+        const key = eventKey(apiEvents[i]);
+        if (cursor.seen.has(key)) continue;
+        cursor.seen.add(key);
+
+        const event = this.toTyped(fixtureId, apiEvents[i], key, match);
+        if (event) fresh.push(event);
+    }
+
+    cursor.count = count;
+    cursor.lastKey = lastKey;
+    return fresh;
+  }
+
+  toTyped(fixtureId, apiEvent, key, match) {
+    const type = typeOf(apiEvent);
+    if (!type) return null;
+
+    const teamId = apiEvent.team?.id;
+    let team = null;
+    if (teamId !== undefined && teamId !== null) {
+        if (teamId === match.teams.home.id) team = 'Home';
+        else if (teamId === match.teams.away.id) team = 'Away';
+    }
+
+    const detail = apiEvent.detail || '';
+    const lowerDetail = detail.toLowerCase();
+    return {
+        fixtureId,
+        type,
+        team,
+        minute: apiEvent.time?.elapsed || 0,
+        extra: apiEvent.time?.extra ?? null,
+        detail,
+        player: apiEvent.player?.name || null,
+        card: type === 'card'
+            ? (lowerDetail.includes('red') || lowerDetail.includes('second yellow') ? 'red' : 'yellow')
+            : null,
+        missed: type === 'penalty' && lowerDetail.includes('missed'),
+        key
+    };
+  }
+
+  // 'markets' phase, before the fixtures are evaluated
+  dispatch() {
+    if (this.queue.length === 0) return;
+    const events = this.queue;
+    this.queue = [];
+
+    events.forEach(event => {
+        metrics.feedEvents.labels(event.type).inc();
+        matchEvents.publish(event);
+    });
+  }
+}
+
+module.exports = new EventIngest();
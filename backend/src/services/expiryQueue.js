@@ -0,0 +1,100 @@
+// Min-heap of deadlines for market windows.
+// Deadlines are plain numbers in whatever clock the owner advances it with
+// (wall-clock ms for MarketService, game-clock seconds for FlashMarketService).
+// Closing costs O(expired · log n) per advance instead of a scan of every open market;
+// cancelled entries are dropped lazily and compacted when they pile up.
+
+class ExpiryQueue {
+  constructor() {
+    this.heap = [];
+    this.cancelledCount = 0;
+  }
+
+  get size() {
+    return this.heap.length - this.cancelledCount;
+  }
+
+  schedule(deadline, callback) {
+    const handle = { deadline, callback, cancelled: false, fired: false };
+    this.heap.push(handle);
+    this.siftUp(this.heap.length - 1);
+    return handle;
+  }
+
+  cancel(handle) {
+    if (!handle || handle.cancelled || handle.fired) return;
+    handle.cancelled = true;
+    this.cancelledCount++;
+
+    if (this.cancelledCount > 32 && this.cancelledCount > this.heap.length / 2) {
+        this.compact();
+    }
+  }
+
+  // Fire every callback whose deadline is <= now, earliest first
+  advance(now) {
+    let fired = 0;
+    while (this.heap.length > 0 && this.heap[0].deadline <= now) {
+        const handle = this.pop();
+        if (handle.cancelled) {
+            this.cancelledCount--;
+            continue;
+        }
+        handle.fired = true;
+        handle.callback();
+        fired++;
+    }
+    return fired;
+  }
+
+  clear() {
+    this.heap.forEach(handle => { handle.cancelled = true; });
+    this.heap = [];
+    this.cancelledCount = 0;
+  }
+
+  compact() {
+    this.heap = this.heap.filter(handle => !handle.cancelled);
+    this.cancelledCount = 0;
+    for (let i = (this.heap.length >>> 1) - 1; i >= 0; i--) this.siftDown(i);
+  }
+
+  pop() {
+    const top = this.heap[0];
+    const last = this.heap.pop();
+    if (this.heap.length > 0) {
+        this.heap[0] = last;
+        this.siftDown(0);
+    }
+    return top;
+  }
+
+  siftUp(i) {
+    const heap = this.heap;
+    const item = heap[i];
+    while (i > 0) {
+        const parent = (i - 1) >>> 1;
+        if (heap[parent].deadline <= item.deadline) break;
+        heap[i] = heap[parent];
+        i = parent;
+    }
+    heap[i] = item;
+  }
+
+  siftDown(i) {
+    const heap = this.heap;
+    const n = heap.length;
+    const item = heap[i];
+    while (true) {
+        let child = 2 * i + 1;
+        if (child >= n) break;
+        if (child + 1 < n && heap[child + 1].deadline < heap[child].deadline) child++;
+        if (heap[child].deadline >= item.deadline) break;
+        heap[i] = heap[child];
+        i = child;
+    }
+    heap[i] = item;
+  }
+}
+
+module.exports = ExpiryQueue;
@@ -0,0 +1,146 @@
+const fs = require('fs');
+const path = require('path');
+const { ApiFootballClient } = require('./apiFootballClient');
+const log = require('./logger').child('FEED');
+
+// Upstream feed adapters. Every feed exposes:
+//   isAvailable()   -> whether get() can return data
+//   get(endpoint)   -> API-Football body ({ response: [...] }) for e.g. 'fixtures?live=all'
+//   speed           -> how much faster than real time the feed runs (polling intervals divide by it)
+//
+// FEED_MODE selects the implementation:
+//   live    (default) HTTP against v3.football.api-sports.io through the pooled, quota-aware client
+//   record  live HTTP, appending every response to FEED_RECORD_DIR/matchday-<ts>.jsonl
+//   replay  plays FEED_REPLAY_FILE back at FEED_REPLAY_SPEED (1-100x)
+
+class LiveFeed {
+  constructor(apiKey = process.env.API_SPORTS_KEY) {
+    this.name = 'live';
+    this.apiKey = apiKey;
+    this.speed = 1;
+    this.client = new ApiFootballClient({ apiKey });
+  }
+
+  isAvailable() {
+    return !!this.apiKey;
+  }
+
+  get(endpoint) {
+    return this.client.request(endpoint);
+  }
+}
+
+class RecordingFeed {
+  constructor(inner, dir) {
+    this.name = 'record';
+    this.inner = inner;
+    this.speed = 1;
+
+    fs.mkdirSync(dir, { recursive: true });
+    this.file = path.join(dir, `matchday-${new Date().toISOString().replace(/[:.]/g, '-')}.jsonl`);
+    this.writes = Promise.resolve(); // appends are chained so lines never interleave
+    log.info('Recording upstream responses', { file: this.file });
+  }
+
+  isAvailable() {
+    return this.inner.isAvailable();
+  }
+
+  async get(endpoint) {
+    const body = await this.inner.get(endpoint);
+    const line = JSON.stringify({ t: Date.now(), endpoint, body }) + '\n';
+
+    this.writes = this.writes
+        .then(() => fs.promises.appendFile(this.file, line))
+        .catch(error => log.error('Failed to record response', { error }));
+
+    return body;
+  }
+}
+
+class ReplayFeed {
+  constructor(file, speed = 1) {
+    this.name = 'replay';
+    this.speed = Math.min(100, Math.max(1, speed));
+    this.byEndpoint = new Map(); // endpoint -> [{ t, body }] in time order
+    this.finished = false;
+
+    let recordStart = Infinity;
+    let recordEnd = -Infinity;
+
+    fs.readFileSync(file, 'utf8').split('\n').forEach(line => {
+        if (!line.trim()) return;
+        const { t, endpoint, body } = JSON.parse(line);
+        if (!this.byEndpoint.has(endpoint)) this.byEndpoint.set(endpoint, []);
+        this.byEndpoint.get(endpoint).push({ t, body });
+        recordStart = Math.min(recordStart, t);
+        recordEnd = Math.max(recordEnd, t);
+    });
+
+    this.byEndpoint.forEach(entries => entries.sort((a, b) => a.t - b.t));
+    this.recordStart = recordStart;
+    this.recordEnd = recordEnd;
+    this.startedAt = Date.now();
+
+    log.info('Replaying recording', { file, speed: this.speed, recordedSeconds: Math.round((recordEnd - recordStart) / 1000) });
+  }
+
+  isAvailable() {
+    return this.byEndpoint.size > 0;
+  }
+
+  // Recording timestamp that corresponds to "now" in the replay
+  now() {
+    const t = this.recordStart + (Date.now() - this.startedAt) * this.speed;
+    if (t >= this.recordEnd && !this.finished) {
+        this.finished = true;
+        log.info('Replay reached the end of the recording. Holding last responses.');
+    }
+    return Math.min(t, this.recordEnd);
+  }
+
+  // Latest recorded response for the endpoint at or before t (binary search)
+  latest(endpoint, t) {
+    const entries = this.byEndpoint.get(endpoint);
+    if (!entries || entries.length === 0 || entries[0].t > t) return null;
+
+    let lo = 0, hi = entries.length - 1;
+    while (lo < hi) {
+        const mid = (lo + hi + 1) >>> 1;
+        if (entries[mid].t <= t) lo = mid;
+        else hi = mid - 1;
+    }
+    return entries[lo];
+  }
+
+  async get(endpoint) {
+    const t = this.now();
+    const hit = this.latest(endpoint, t);
+    if (hit) return hit.body;
+
+    // Per-fixture polls that were never recorded are served from the live=all snapshot
+    const byIds = endpoint.match(/^fixtures\?ids?=([\d-]+)$/);
+    if (byIds) {
+        const all = this.latest('fixtures?live=all', t);
+        const wanted = new Set(byIds[1].split('-').map(id => parseInt(id)));
+        const fixtures = all ? (all.body.response || []).filter(f => wanted.has(f.fixture.id)) : [];
+        return { response: fixtures };
+    }
+
+    return { response: [] };
+  }
+}
+
+function createFeed() {
+  const mode = process.env.FEED_MODE || 'live';
+
+  if (mode === 'replay') {
+      return new ReplayFeed(process.env.FEED_REPLAY_FILE, parseFloat(process.env.FEED_REPLAY_SPEED) || 1);
+  }
+  if (mode === 'record') {
+      return new RecordingFeed(new LiveFeed(), process.env.FEED_RECORD_DIR || 'recordings');
+  }
+  return new LiveFeed();
+}
+
+module.exports = { LiveFeed, RecordingFeed, ReplayFeed, createFeed };
@@ -1,10 +1,30 @@
+const ExpiryQueue = require('./expiryQueue');
+const PricingEngine = require('./pricingEngine');
+const broadcaster = require('./broadcaster');
+const log = require('./logger').child('FLASH');
+
+// Compatibility: keep broadcasting the full 'flash_update' snapshot every tick next to the delta stream
+const LEGACY_FLASH_UPDATE = process.env.LEGACY_FLASH_UPDATE === 'true';
+
+// Assumed stoppage length when the feed doesn't announce it yet (minutes)
+const DEFAULT_STOPPAGE_MINUTES = 4;
+
+// How long a VAR check, penalty or red card keeps the fixture's markets suspended (wall clock)
+const EVENT_SUSPEND_MS = parseInt(process.env.EVENT_SUSPEND_MS) || 30 * 1000;
+
+// "Goal in ...?" markets, decided YES by any goal inside their window
+const GOAL_MARKETS = ['flash_1', 'flash_goal', 'goal_period', 'stoppage_goal'];
+
+// Open or suspended: still to be decided by a goal or the window end
+const isUnsettled = (market) => market.status === 'OPEN' || market.status === 'SUSPENDED';
+
 class FlashMarketService {
   constructor() {
     this.activeGames = new Map(); // fixtureId -> { timer, currentMarket, nextMarket, ... }
     this.io = null;
+    this.pricing = new PricingEngine(); // reprices every open market once per tick
 
-    // High frequency ticker (1s)
-    setInterval(() => this.processTick(), 1000);
+    // Driven by the TickScheduler: processTick in the 'markets' phase, broadcast in 'broadcast'
   }
 
   setIo(io) {
@@ -16,11 +36,11 @@ class FlashMarketService {
 
     // Safety: Don't track FINISHED games
     if (['FINISHED', 'AWARDED', 'FT'].includes(matchData.fixture.status.short)) {
-        console.log(`[FLASH] Skipping finished game ${fixtureId}`);
+        log.debug('Skipping finished game', { fixtureId });
         return;
     }
 
-    console.log(`[FLASH] Starting Flash Markets for Game ${fixtureId}`);
+    log.info('Starting flash markets', { fixtureId });
 
     // Initialize Game State
     // Calculate initial 5-min window
@@ -30,16 +50,26 @@ class FlashMarketService {
         fixtureId,
         timer: elapsed * 60, // seconds
         lastApiUpdate: Date.now(),
-        markets: matchData.markets || this.generateMarkets(matchData)
+        goals: matchData.goals || { home: 0, away: 0 }, // score state for pricing
+        extra: matchData.fixture.status.extra || 0, // announced stoppage minutes
+        markets: matchData.markets || this.generateMarkets(matchData),
+        marketKey: this.marketKey(matchData), // (minute, period, stoppage) the markets were built for
+        suspendedUntil: 0, // wall clock ms until which feed events keep the markets suspended
+        seq: 0, // delta stream sequence number
+        sentTimer: null, // last timer put on the wire
+        sentMarkets: null, // marketId -> { status, progress, odds } last put on the wire
+        expiry: new ExpiryQueue(), // window deadlines in game-clock seconds
+        expiryHandles: new Map() // marketId -> ExpiryQueue handle
     };
 
     this.activeGames.set(fixtureId, gameState);
-    this.emitUpdate(gameState);
+    this.syncExpiries(gameState);
   }
 
   stopTracking(fixtureId) {
     if (this.activeGames.has(fixtureId)) {
-        console.log(`[FLASH] Stopping Flash Markets for Game ${fixtureId}`);
+        log.info('Stopping flash markets', { fixtureId });
+        this.activeGames.get(fixtureId).expiry.clear();
         this.activeGames.delete(fixtureId);
     }
   }
@@ -62,6 +92,9 @@ class FlashMarketService {
               gameState.markets = matchData.markets;
           }
 
+          if (matchData.goals) gameState.goals = matchData.goals;
+          gameState.extra = matchData.fixture.status.extra || 0;
+
           // Tight sync: If updates are coming, we trust the API timestamp more
           // Sync if off by > 5 seconds
           const diff = Math.abs((apiElapsed * 60) - gameState.timer);
@@ -70,60 +103,178 @@ class FlashMarketService {
               gameState.timer = apiElapsed * 60;
           }
 
-          // Regenerate markets based on latest match state (handles Stoppage/Standard transition)
-          gameState.markets = this.generateMarkets(matchData);
-          this.emitUpdate(gameState);
+          // Regenerate markets only when minute/period/stoppage state moved (handles Stoppage/Standard transition).
+          // Within the same key the existing objects (and their drifted odds) are kept.
+          // Emission happens once per tick in broadcast()
+          const key = this.marketKey(matchData);
+          if (key !== gameState.marketKey) {
+              gameState.markets = this.reuseMarkets(gameState.markets, this.generateMarkets(matchData));
+              gameState.marketKey = key;
+              if (gameState.suspendedUntil > 0) this.suspendOpenMarkets(gameState); // new windows open suspended too
+              this.syncExpiries(gameState);
+          }
 
       } else {
           this.startTracking(fixtureId, matchData);
       }
   }
 
+  marketKey(match) {
+      const status = match.fixture.status;
+      const rawStatus = status.raw || status.short;
+      return `${status.elapsed}|${rawStatus}|${status.short}|${(status.extra || 0) > 0}`;
+  }
+
+  // Keep the previous object for any market id that survives a regeneration
+  reuseMarkets(previous, next) {
+      const byId = new Map(this.getAllMarkets(previous).map(m => [m.id, m]));
+      if (byId.size === 0) return next;
+
+      Object.keys(next).forEach(group => {
+          next[group] = next[group].map(market => byId.get(market.id) || market);
+      });
+      return next;
+  }
+
   closeStoppageMarkets(gameState) {
       const allMarkets = this.getAllMarkets(gameState.markets);
-      let changed = false;
       allMarkets.forEach(market => {
-          if (market?.type?.startsWith('stoppage_') && market.status === 'OPEN') {
-              console.log(`[FLASH] Closing Stoppage Market: ${market.id}`);
+          if (market?.type?.startsWith('stoppage_') && isUnsettled(market)) {
+              log.debug('Closing stoppage market', { marketId: market.id });
               this.resolveMarket(market, 'LOSS'); // Default to LOSS if event didn't happen
               market.status = 'CLOSED';
-              changed = true;
           }
       });
-      if (changed) this.emitUpdate(gameState);
   }
 
-  handleGoal(fixtureId) {
+  // Typed feed events (MatchEventBus), dispatched at the start of the 'markets' phase
+  handleEvent(event) {
+      const gameState = this.activeGames.get(event.fixtureId);
+      if (!gameState) return;
+
+      if (event.type === 'goal') {
+          this.handleGoal(event.fixtureId, event.minute);
+      } else if (event.missed) {
+          // The penalty was taken: whatever it suspended is over
+          if (gameState.suspendedUntil > 0) this.resumeMarkets(gameState);
+      } else if (event.type === 'var' || event.type === 'penalty' || (event.type === 'card' && event.card === 'red')) {
+          this.suspendMarkets(gameState, event.type);
+      }
+  }
+
+  // minute (optional): the goal's minute; windowed markets it falls outside of are left alone
+  handleGoal(fixtureId, minute) {
       const gameState = this.activeGames.get(fixtureId);
       if (!gameState) return;
 
       const allMarkets = this.getAllMarkets(gameState.markets);
-      let changed = false;
 
       allMarkets.forEach(market => {
-          if (market.status !== 'OPEN') return;
-
-          // Resolve Goal Markets
-          if (market.type.includes('goal') || market.type === '1x2_period' || market.type === 'over_under_period') {
-             if (market.type === 'flash_goal' || market.type === 'goal_period' || market.type === 'stoppage_goal') {
-                 console.log(`[FLASH] Goal! Resolving ${market.id}`);
-                 this.resolveMarket(market, 'WIN');
-                 market.status = 'WIN';
-                 changed = true;
-             }
+          if (!isUnsettled(market)) return;
+          if (typeof minute === 'number' && typeof market.windowStart === 'number' &&
+              (minute < market.windowStart || minute >= market.windowEnd)) return;
+
+          // Resolve Goal Markets (YES wins)
+          if (GOAL_MARKETS.includes(market.type)) {
+              log.debug('Goal, resolving market', { marketId: market.id });
+              this.resolveMarket(market, 'WIN');
+              market.status = 'WIN';
+              this.cancelExpiry(gameState, market.id);
           }
       });
-
-      if (changed) this.emitUpdate(gameState);
+      // The status changes go out with the next broadcast()
   }
 
   resolveMarket(market, result) {
       market.status = result;
   }
 
+  // --- Event Suspension ---
+  // A VAR check, penalty or red card suspends every open market of the fixture for
+  // EVENT_SUSPEND_MS (extended by later events); evaluateMarkets reopens them after that.
+
+  suspendMarkets(gameState, reason) {
+      gameState.suspendedUntil = Math.max(gameState.suspendedUntil, Date.now() + EVENT_SUSPEND_MS);
+      const suspended = this.suspendOpenMarkets(gameState);
+      log.debug('Markets suspended', { fixtureId: gameState.fixtureId, reason, suspended });
+  }
+
+  suspendOpenMarkets(gameState) {
+      let suspended = 0;
+      this.getAllMarkets(gameState.markets).forEach(market => {
+          if (market.status === 'OPEN') {
+              market.status = 'SUSPENDED';
+              suspended++;
+          }
+      });
+      return suspended;
+  }
+
+  resumeMarkets(gameState) {
+      gameState.suspendedUntil = 0;
+      this.getAllMarkets(gameState.markets).forEach(market => {
+          if (market.status === 'SUSPENDED') market.status = 'OPEN';
+      });
+      log.debug('Markets reopened', { fixtureId: gameState.fixtureId });
+  }
+
+  findMarket(fixtureId, marketId) {
+      const gameState = this.activeGames.get(parseInt(fixtureId));
+      if (!gameState) return null;
+      return this.getAllMarkets(gameState.markets).find(m => m.id === marketId) || null;
+  }
+
+  // --- Window Expiry ---
+  // Open windowed markets are registered once per market id; the queue is advanced
+  // with the game clock, so a tick only pays for the windows that actually closed.
+
+  syncExpiries(gameState) {
+      const live = new Set();
+
+      this.getAllMarkets(gameState.markets).forEach(market => {
+          if (!isUnsettled(market) || typeof market.windowEnd !== 'number') return;
+          live.add(market.id);
+          if (gameState.expiryHandles.has(market.id)) return;
+
+          const handle = gameState.expiry.schedule(market.windowEnd * 60, () => this.expireMarket(gameState, market.id));
+          gameState.expiryHandles.set(market.id, handle);
+      });
+
+      // Rotated-out markets no longer need their deadline
+      gameState.expiryHandles.forEach((handle, marketId) => {
+          if (!live.has(marketId)) this.cancelExpiry(gameState, marketId);
+      });
+  }
+
+  cancelExpiry(gameState, marketId) {
+      const handle = gameState.expiryHandles.get(marketId);
+      if (handle) {
+          gameState.expiry.cancel(handle);
+          gameState.expiryHandles.delete(marketId);
+      }
+  }
+
+  expireMarket(gameState, marketId) {
+      gameState.expiryHandles.delete(marketId);
+
+      const market = this.getAllMarkets(gameState.markets).find(m => m.id === marketId);
+      if (market && isUnsettled(market)) {
+          this.resolveMarket(market, 'LOSS');
+          market.status = 'CLOSED';
+          // Rotation is now handled by generateMarkets on update
+      }
+  }
+
   processTick() {
-      this.activeGames.forEach((gameState, fixtureId) => {
+      this.pricing.begin();
+      this.activeGames.forEach(gameState => {
           this.evaluateMarkets(gameState);
+      });
+      this.pricing.run();
+  }
+
+  broadcast() {
+      this.activeGames.forEach(gameState => {
           this.emitUpdate(gameState);
       });
   }
@@ -131,61 +282,65 @@ class FlashMarketService {
   evaluateMarkets(gameState) {
       if (gameState.timer > 120 * 60) return; // Game over
 
+      // Expiration: close every window whose end the game clock has reached
+      gameState.expiry.advance(gameState.timer);
+
+      if (gameState.suspendedUntil > 0 && Date.now() >= gameState.suspendedUntil) {
+          this.resumeMarkets(gameState);
+      }
+
       const allMarkets = this.getAllMarkets(gameState.markets);
 
       allMarkets.forEach(market => {
           if (market.status !== 'OPEN') return;
 
-          // Expiration
-          if (market.windowEnd) {
+          // Progress
+          if (market.type.startsWith('stoppage_')) {
+              market.progress = 99; // Keep full bar to show active
+          } else if (market.windowStart !== undefined && market.windowEnd !== undefined) {
+              const startSec = market.windowStart * 60;
               const endSec = market.windowEnd * 60;
-              if (gameState.timer >= endSec) {
-                  this.resolveMarket(market, 'LOSS');
-                  market.status = 'CLOSED';
-                  // Rotation is now handled by generateMarkets on update
-              }
-          }
+              const durationSec = endSec - startSec;
+              const secondsInWindow = gameState.timer - startSec;
 
-          // Progress
-          if (market.status === 'OPEN') {
-              if (market.type.startsWith('stoppage_')) {
-                  market.progress = 99; // Keep full bar to show active
-              } else if (market.windowStart !== undefined && market.windowEnd !== undefined) {
-                  const startSec = market.windowStart * 60;
-                  const endSec = market.windowEnd * 60;
-                  const durationSec = endSec - startSec;
-                  const secondsInWindow = gameState.timer - startSec;
-
-                  if (secondsInWindow >= 0) {
-                      market.progress = Math.min(100, Math.max(0, (secondsInWindow / durationSec) * 100));
-                  } else {
-                      market.progress = 0;
-                  }
+              if (secondsInWindow >= 0) {
+                  market.progress = Math.min(100, Math.max(0, (secondsInWindow / durationSec) * 100));
+              } else {
+                  market.progress = 0;
               }
           }
 
-          // Odds Fluctuation
-          if (market.status === 'OPEN') {
-              this.fluctuateOdds(market);
-          }
+          // Odds: priced for every game at once by processTick()
+          this.addToPricing(gameState, market);
       });
   }
 
-  fluctuateOdds(market) {
-      const change = (Math.random() * 0.04) - 0.02;
-
-      if (market.odds.yes) {
-          market.odds.yes = Math.max(1.01, parseFloat((market.odds.yes + change).toFixed(2)));
-          if (market.odds.no) market.odds.no = Math.max(1.01, parseFloat((market.odds.no - change).toFixed(2)));
-      } else if (market.odds.home) {
-          ['home', 'draw', 'away'].forEach(k => {
-              const delta = (Math.random() * 0.02) - 0.01;
-              market.odds[k] = Math.max(1.01, parseFloat((market.odds[k] + delta).toFixed(2)));
-          });
-      } else if (market.odds.over) {
-          market.odds.over = Math.max(1.01, parseFloat((market.odds.over + change).toFixed(2)));
-          market.odds.under = Math.max(1.01, parseFloat((market.odds.under - change).toFixed(2)));
+  addToPricing(gameState, market) {
+      const kind = PricingEngine.kindOf(market);
+      if (kind < 0) return;
+
+      const clock = gameState.timer / 60;
+      const home = gameState.goals.home || 0;
+      const away = gameState.goals.away || 0;
+      const period = market.type.endsWith('_period');
+
+      let windowStart = clock;
+      let windowEnd = 90; // markets without a window run to full time
+      if (market.type.startsWith('stoppage_')) {
+          const periodEnd = clock < 60 ? 45 : 90;
+          windowEnd = Math.max(clock + 0.5, periodEnd + (gameState.extra || DEFAULT_STOPPAGE_MINUTES));
+      } else if (typeof market.windowStart === 'number' && typeof market.windowEnd === 'number') {
+          windowStart = market.windowStart;
+          windowEnd = market.windowEnd;
       }
+
+      // Window markets (1x2_period, over_under_period) only count the goals inside the window
+      const base = kind === PricingEngine.KIND.RESULT
+          ? (period ? 0 : home - away)
+          : (period ? 0 : home + away);
+      const line = typeof market.line === 'number' ? market.line : base + 0.5;
+
+      this.pricing.add(market, kind, windowStart, windowEnd, clock, home - away, base, line);
   }
 
   getAllMarkets(marketsStructure) {
@@ -198,9 +353,102 @@ class FlashMarketService {
       return flat;
   }
 
+  // --- Delta Stream ---
+  // Clients get a full 'flash_snapshot' on join (or resync) and then 'flash_patch'
+  // messages with a gapless seq. A patch carries the timer, the fields of markets
+  // that changed, or the whole markets object when the layout itself changed.
+
+  snapshotMarkets(markets) {
+      const sent = new Map();
+      this.getAllMarkets(markets).forEach(market => {
+          sent.set(market.id, { status: market.status, progress: market.progress, odds: { ...market.odds } });
+      });
+      return sent;
+  }
+
+  sameLayout(markets, sentMarkets) {
+      const allMarkets = this.getAllMarkets(markets);
+      if (allMarkets.length !== sentMarkets.size) return false;
+      return allMarkets.every(market => sentMarkets.has(market.id));
+  }
+
+  diffMarkets(markets, sentMarkets) {
+      const changes = [];
+      this.getAllMarkets(markets).forEach(market => {
+          const prev = sentMarkets.get(market.id);
+          const change = { id: market.id };
+          let changed = false;
+
+          if (market.status !== prev.status) {
+              change.status = market.status;
+              changed = true;
+          }
+          if (market.progress !== prev.progress) {
+              change.progress = market.progress;
+              changed = true;
+          }
+          for (const k in market.odds) {
+              if (market.odds[k] !== prev.odds[k]) {
+                  change.odds = market.odds;
+                  changed = true;
+                  break;
+              }
+          }
+
+          if (changed) changes.push(change);
+      });
+      return changes;
+  }
+
+  buildSnapshot(gameState) {
+      return {
+          fixtureId: gameState.fixtureId,
+          seq: gameState.seq,
+          timer: gameState.timer,
+          markets: gameState.markets
+      };
+  }
+
+  sendSnapshot(fixtureId, socketId) {
+      const gameState = this.activeGames.get(parseInt(fixtureId)) || this.activeGames.get(fixtureId);
+      if (!gameState || !this.io) return;
+      this.io.to(socketId).emit('flash_snapshot', this.buildSnapshot(gameState));
+  }
+
   emitUpdate(gameState) {
-      if (this.io) {
-          this.io.to(`game_${gameState.fixtureId}`).emit('flash_update', {
+      if (!this.io) return;
+
+      const patch = { fixtureId: gameState.fixtureId };
+      let changed = false;
+
+      if (gameState.timer !== gameState.sentTimer) {
+          patch.timer = gameState.timer;
+          changed = true;
+      }
+
+      if (!gameState.sentMarkets || !this.sameLayout(gameState.markets, gameState.sentMarkets)) {
+          patch.markets = gameState.markets;
+          changed = true;
+      } else {
+          const changes = this.diffMarkets(gameState.markets, gameState.sentMarkets);
+          if (changes.length > 0) {
+              patch.changes = changes;
+              changed = true;
+          }
+      }
+
+      if (!changed) return;
+
+      gameState.seq++;
+      patch.seq = gameState.seq;
+      gameState.sentTimer = gameState.timer;
+      gameState.sentMarkets = this.snapshotMarkets(gameState.markets);
+
+      const room = `game_${gameState.fixtureId}`;
+      broadcaster.emit(room, 'flash_patch', patch);
+
+      if (LEGACY_FLASH_UPDATE) {
+          broadcaster.emit(room, 'flash_update', {
               timer: gameState.timer,
               markets: gameState.markets // Send array directly
           });
@@ -227,7 +475,7 @@ class FlashMarketService {
           return;
       }
 
-      console.log(`[FLASH] New Bet Accepted! R$ ${amount} on ${selection} @ ${odd}`);
+      log.debug('Bet accepted', { marketId, amount, selection, odd });
       if (this.io) {
           this.io.to(socketId).emit('bet_accepted', {
               marketId, selection, odd, amount, timestamp: new Date()
@@ -0,0 +1,288 @@
+const fs = require('fs');
+const path = require('path');
+const shardRouter = require('./shardRouter');
+const log = require('./logger').child('LEDGER');
+
+// Append-only money ledger (write-ahead log + snapshots).
+//
+// Every debit/credit is a JSON line in LEDGER_DIR/wal-<firstSeq>.log. Lines appended
+// while a write is in flight are grouped into the next write + fdatasync, so many
+// bets share one fsync. Records are applied to `state` only once they are durable, so it
+// is exactly what recovery would rebuild. Every LEDGER_SNAPSHOT_EVERY records that state
+// is written to snapshot.json and older segments are dropped; startup loads the snapshot
+// and replays only the records after it.
+//
+// In cluster mode every shard keeps its own ledger under LEDGER_DIR/shard-<index>.
+// A bet whose user is on the fixture's shard is one record per money change (bet_placed,
+// bet_settled). Otherwise the money record lives on the user's shard and the bet record on
+// the fixture's shard, and the state keeps what is needed to pair them after a crash:
+// debits whose bet the fixture shard has not confirmed yet (user's shard), closed bets whose
+// credit has not been acknowledged yet (fixture's shard), and recently credited bet ids
+// (user's shard), so a credit re-sent after recovery is not paid twice.
+//
+// Record types:
+//   user_created     { userId, balance }
+//   bet_placed       { userId, amount, bet }                -> stake taken + pending bet
+//   bet_settled      { userId, betId, status, payout }      -> payout added + bet closed
+//   debit            { userId, amount, betId, fixtureId }   -> stake taken for a bet on another shard
+//   debit_confirmed  { betIds }                             -> the fixture shard has those bets
+//   credit           { userId, amount, betIds }             -> payouts (or refunds) added to the wallet
+//   bet_opened       { bet }                                -> pending bet of a user on another shard
+//   bet_closed       { betId, status, payout, userId }      -> bet settled, credit still to be acknowledged
+//   credit_confirmed { betIds }                             -> the user's shard has the credit
+
+const BASE_DIR = process.env.LEDGER_DIR || path.join(__dirname, '../../data/ledger');
+const LEDGER_DIR = shardRouter.count > 1 ? path.join(BASE_DIR, `shard-${shardRouter.index}`) : BASE_DIR;
+const SNAPSHOT_EVERY = parseInt(process.env.LEDGER_SNAPSHOT_EVERY) || 10000;
+// Credited bet ids are kept this long: a shard that restarts re-sends its unacknowledged credits well within it
+const CREDIT_RETENTION_MS = parseInt(process.env.LEDGER_CREDIT_RETENTION_MS) || 24 * 60 * 60 * 1000;
+
+const emptyState = () => ({ users: {}, bets: {}, debits: {}, unpaid: {}, credited: {} });
+
+class Ledger {
+  constructor() {
+    this.dir = LEDGER_DIR;
+    this.fd = null;
+    this.seq = 0; // last assigned
+    this.durableSeq = 0; // last applied to `state`
+    this.state = emptyState(); // durable: { users, bets, debits, unpaid, credited }
+    this.buffer = []; // serialized lines waiting for the next group commit
+    this.records = []; // the same records, applied to `state` once durable
+    this.waiters = []; // resolve/reject pairs for the buffered lines
+    this.flushing = false;
+    this.flushScheduled = false;
+    this.recordsSinceSnapshot = 0;
+    this.snapshotting = false;
+  }
+
+  // --- Recovery ---
+
+  // Returns the recovered state for the services to own; the ledger keeps its own copy
+  recover() {
+    fs.mkdirSync(this.dir, { recursive: true });
+
+    const state = emptyState();
+    let snapshotSeq = 0;
+
+    const snapshotFile = path.join(this.dir, 'snapshot.json');
+    if (fs.existsSync(snapshotFile)) {
+        const snapshot = JSON.parse(fs.readFileSync(snapshotFile, 'utf8'));
+        snapshotSeq = snapshot.seq;
+        Object.keys(state).forEach(key => { if (snapshot[key]) state[key] = snapshot[key]; });
+    }
+    this.seq = snapshotSeq;
+
+    let replayed = 0;
+    this.segments().forEach(file => {
+        const filePath = path.join(this.dir, file);
+        let content = fs.readFileSync(filePath, 'utf8');
+
+        // A torn final line is a write that never got acknowledged: cut it off
+        if (content.length > 0 && !content.endsWith('\n')) {
+            content = content.slice(0, content.lastIndexOf('\n') + 1);
+            fs.truncateSync(filePath, Buffer.byteLength(content));
+        }
+
+        content.split('\n').forEach((line, i) => {
+            if (!line) return;
+            let record;
+            try {
+                record = JSON.parse(line);
+            } catch (error) {
+                throw new Error(`[LEDGER] Corrupt record in ${file}:${i + 1}`);
+            }
+            if (record.seq <= snapshotSeq) return;
+            this.apply(state, record);
+            this.seq = record.seq;
+            replayed++;
+        });
+    });
+
+    this.durableSeq = this.seq;
+    this.state = structuredClone(state);
+    this.openSegment();
+    log.info('Recovered', {
+        users: Object.keys(state.users).length,
+        pendingBets: Object.keys(state.bets).length,
+        unconfirmedDebits: Object.keys(state.debits).length,
+        unpaidBets: Object.keys(state.unpaid).length,
+        snapshotSeq,
+        replayed
+    });
+
+    return state;
+  }
+
+  apply(state, record) {
+    switch (record.type) {
+        case 'user_created':
+            state.users[record.userId] = { balance: record.balance };
+            break;
+        case 'debit':
+            if (state.users[record.userId]) state.users[record.userId].balance -= record.amount;
+            if (record.fixtureId !== undefined) {
+                state.debits[record.betId] = { userId: record.userId, amount: record.amount, fixtureId: record.fixtureId };
+            }
+            break;
+        case 'debit_confirmed':
+            record.betIds.forEach(betId => { delete state.debits[betId]; });
+            break;
+        case 'credit':
+            if (state.users[record.userId]) state.users[record.userId].balance += record.amount;
+            (record.betIds || []).forEach(betId => {
+                delete state.debits[betId];
+                state.credited[betId] = record.t;
+            });
+            break;
+        case 'bet_opened':
+            state.bets[record.bet.id] = { ...record.bet };
+            break;
+        case 'bet_closed':
+            delete state.bets[record.betId];
+            if (record.userId !== undefined) state.unpaid[record.betId] = { userId: record.userId, payout: record.payout };
+            break;
+        case 'credit_confirmed':
+            record.betIds.forEach(betId => { delete state.unpaid[betId]; });
+            break;
+        case 'bet_placed':
+            if (state.users[record.userId]) state.users[record.userId].balance -= record.amount;
+            state.bets[record.bet.id] = { ...record.bet };
+            break;
+        case 'bet_settled':
+            if (record.payout > 0 && state.users[record.userId]) state.users[record.userId].balance += record.payout;
+            delete state.bets[record.betId];
+            break;
+    }
+  }
+
+  segments() {
+    return fs.readdirSync(this.dir)
+        .filter(f => /^wal-\d+\.log$/.test(f))
+        .sort((a, b) => parseInt(a.slice(4)) - parseInt(b.slice(4)));
+  }
+
+  openSegment() {
+    if (this.fd !== null) fs.closeSync(this.fd);
+    const name = `wal-${this.durableSeq + 1}.log`;
+    this.fd = fs.openSync(path.join(this.dir, name), 'a');
+    return name;
+  }
+
+  // --- Group Commit ---
+
+  append(record) {
+    return this.appendBatch([record]);
+  }
+
+  // Resolves once every record of the batch is durable
+  appendBatch(records) {
+    if (records.length === 0) return Promise.resolve();
+    return new Promise((resolve, reject) => {
+        records.forEach(record => {
+            record.seq = ++this.seq;
+            record.t = Date.now();
+            this.buffer.push(JSON.stringify(record));
+            this.records.push(record);
+        });
+        this.recordsSinceSnapshot += records.length;
+        this.waiters.push({ resolve, reject });
+        this.scheduleFlush();
+    });
+  }
+
+  scheduleFlush() {
+    if (this.flushing || this.flushScheduled) return;
+    this.flushScheduled = true;
+    setImmediate(() => {
+        this.flushScheduled = false;
+        this.flush();
+    });
+  }
+
+  flush() {
+    if (this.flushing || this.buffer.length === 0) return;
+    this.flushing = true;
+
+    const data = this.buffer.join('\n') + '\n';
+    const records = this.records;
+    const waiters = this.waiters;
+    this.buffer = [];
+    this.records = [];
+    this.waiters = [];
+
+    const done = (error) => {
+        this.flushing = false;
+        if (error) {
+            log.error('Group commit failed', { error });
+            waiters.forEach(w => w.reject(error));
+        } else {
+            records.forEach(record => this.apply(this.state, record));
+            this.durableSeq = records[records.length - 1].seq;
+            waiters.forEach(w => w.resolve());
+        }
+
+        if (this.recordsSinceSnapshot >= SNAPSHOT_EVERY) this.snapshot();
+        if (this.buffer.length > 0) this.flush();
+    };
+
+    fs.write(this.fd, data, (writeError) => {
+        if (writeError) return done(writeError);
+        fs.fdatasync(this.fd, done);
+    });
+  }
+
+  // --- Snapshots ---
+
+  // Runs between group commits, from the durable state only: changes that are reserved in
+  // memory but still buffered (or whose commit fails) are not in it, and bets stay in it until
+  // their closing record is durable. The state is captured and the WAL moves to a new segment
+  // synchronously, so every record after the snapshot's seq (the buffered ones included) lands
+  // in the new segment. The file is written off the event loop; the old segments are only
+  // unlinked once the snapshot and its directory entry are durable.
+  snapshot() {
+    if (this.snapshotting) return;
+
+    const now = Date.now();
+    const credited = this.state.credited;
+    Object.keys(credited).forEach(betId => {
+        if (now - credited[betId] > CREDIT_RETENTION_MS) delete credited[betId];
+    });
+
+    const seq = this.durableSeq;
+    const data = JSON.stringify({ seq, ...this.state, takenAt: now });
+    const current = this.openSegment();
+    const previous = this.segments().filter(f => f !== current);
+    this.recordsSinceSnapshot = 0;
+    this.snapshotting = true;
+
+    this.writeSnapshot(data)
+        .then(() => Promise.all(previous.map(f => fs.promises.unlink(path.join(this.dir, f)))))
+        .then(() => log.info('Snapshot written', { seq, compactedSegments: previous.length }))
+        .catch(error => log.error('Snapshot failed', { seq, error })) // the old segments stay and are replayed
+        .finally(() => { this.snapshotting = false; });
+  }
+
+  async writeSnapshot(data) {
+    const file = path.join(this.dir, 'snapshot.json');
+    const tmp = `${file}.tmp`;
+
+    const handle = await fs.promises.open(tmp, 'w');
+    try {
+        await handle.writeFile(data);
+        await handle.sync();
+    } finally {
+        await handle.close();
+    }
+    await fs.promises.rename(tmp, file);
+
+    // The rename is only durable once the directory is
+    const dir = await fs.promises.open(this.dir, 'r');
+    try {
+        await dir.sync();
+    } finally {
+        await dir.close();
+    }
+  }
+}
+
+module.exports = new Ledger();
@@ -0,0 +1,155 @@
+const metrics = require('./metrics');
+const broadcaster = require('./broadcaster');
+const log = require('./logger').child('LOBBY');
+
+// List-view channel. Sockets opt in with lobby_subscribe (room 'lobby') and get:
+//  - 'lobby_snapshot' { serverTimestamp, matches }: the list projection of every cached match
+//    (no markets, no events), answered by the shard the socket is on
+//  - 'lobby_patch' { serverTimestamp, added, changed, removed }: at most every LOBBY_INTERVAL_MS,
+//    per owning shard, only the fixtures whose score, status or minute moved since the last patch.
+//    changed rows are flat: { id, short?, raw?, elapsed?, second?, extra?, home?, away? }
+// Seconds are not published; clients run them locally from the last elapsed/second they got.
+//
+// What was last published is kept per clock slot in typed arrays next to the ClockStore.
+
+const LOBBY_ROOM = 'lobby';
+const LOBBY_INTERVAL_MS = parseInt(process.env.LOBBY_INTERVAL_MS) || 2000;
+
+class LobbyService {
+  constructor() {
+    this.io = null;
+    this.matchService = null;
+    this.lastPublish = 0;
+    this.capacity = 0;
+  }
+
+  setIo(io) {
+    this.io = io;
+  }
+
+  setMatchService(service) {
+    this.matchService = service;
+  }
+
+  // --- Subscriptions ---
+
+  subscribe(socket) {
+    broadcaster.join(socket, LOBBY_ROOM);
+    socket.emit('lobby_snapshot', {
+        serverTimestamp: Date.now(),
+        matches: this.matchService.getMatches().map(match => this.project(match))
+    });
+  }
+
+  unsubscribe(socket) {
+    broadcaster.leave(socket, LOBBY_ROOM);
+  }
+
+  // withSecond = false for bodies that outlive the second they were built in (GET /matches cache)
+  project(match, withSecond = true) {
+    const status = match.fixture.status;
+    const clock = { short: status.short, raw: status.raw, elapsed: status.elapsed, second: status.second, extra: status.extra };
+    if (!withSecond) delete clock.second;
+    return {
+        fixture: {
+            id: match.fixture.id,
+            date: match.fixture.date,
+            status: clock
+        },
+        league: match.league,
+        teams: match.teams,
+        goals: { home: match.goals.home, away: match.goals.away }
+    };
+  }
+
+  // --- Diffed, throttled publishing ---
+
+  ensureCapacity(capacity) {
+    if (capacity <= this.capacity) return;
+    const grow = (Type, previous) => {
+        const next = new Type(capacity);
+        if (previous) next.set(previous);
+        return next;
+    };
+
+    this.capacity = capacity;
+    this.sentFixture = grow(Int32Array, this.sentFixture); // 0 = nothing published from this slot
+    this.sentStatus = grow(Uint8Array, this.sentStatus);
+    this.sentRaw = grow(Uint8Array, this.sentRaw);
+    this.sentElapsed = grow(Int16Array, this.sentElapsed);
+    this.sentExtra = grow(Int16Array, this.sentExtra);
+    this.sentHome = grow(Uint16Array, this.sentHome);
+    this.sentAway = grow(Uint16Array, this.sentAway);
+  }
+
+  // Called every tick; publishes at most every LOBBY_INTERVAL_MS
+  publish(now = Date.now()) {
+    if (!this.io || now - this.lastPublish < LOBBY_INTERVAL_MS) return;
+    this.lastPublish = now;
+
+    const clocks = this.matchService.clocks;
+    this.ensureCapacity(clocks.capacity);
+
+    const added = [];
+    const changed = [];
+    const removed = [];
+
+    for (let slot = 0; slot < clocks.size; slot++) {
+        const fixtureId = clocks.fixtureId[slot];
+        const live = clocks.isActive(slot) && clocks.isOwned(slot);
+
+        // Slot released (or reused by another fixture) since the last patch
+        if (this.sentFixture[slot] !== 0 && (!live || this.sentFixture[slot] !== fixtureId)) {
+            removed.push(this.sentFixture[slot]);
+            this.sentFixture[slot] = 0;
+        }
+        if (!live) continue;
+
+        if (this.sentFixture[slot] === 0) {
+            added.push(this.project(clocks.materialize(slot)));
+        } else {
+            const row = this.diff(clocks, slot);
+            if (row) changed.push(row);
+        }
+        this.remember(clocks, slot);
+    }
+
+    if (added.length === 0 && changed.length === 0 && removed.length === 0) return;
+
+    metrics.lobbyPatchRows.observe(added.length + changed.length + removed.length);
+    log.debug('Lobby patch', { added: added.length, changed: changed.length, removed: removed.length });
+    broadcaster.emit(LOBBY_ROOM, 'lobby_patch', { serverTimestamp: now, added, changed, removed });
+  }
+
+  diff(clocks, slot) {
+    let row = null;
+    const field = (key, value) => {
+        if (!row) row = { id: clocks.fixtureId[slot] };
+        row[key] = value;
+    };
+
+    if (clocks.status[slot] !== this.sentStatus[slot]) field('short', clocks.statusName(slot));
+    if (clocks.raw[slot] !== this.sentRaw[slot]) field('raw', clocks.rawName(slot));
+    if (clocks.elapsed[slot] !== this.sentElapsed[slot]) {
+        // A new minute restarts the client's local seconds
+        field('elapsed', clocks.elapsed[slot]);
+        field('second', clocks.second[slot]);
+    }
+    if (clocks.extra[slot] !== this.sentExtra[slot]) field('extra', clocks.extra[slot] >= 0 ? clocks.extra[slot] : null);
+    if (clocks.homeGoals[slot] !== this.sentHome[slot]) field('home', clocks.homeGoals[slot]);
+    if (clocks.awayGoals[slot] !== this.sentAway[slot]) field('away', clocks.awayGoals[slot]);
+    return row;
+  }
+
+  remember(clocks, slot) {
+    this.sentFixture[slot] = clocks.fixtureId[slot];
+    this.sentStatus[slot] = clocks.status[slot];
+    this.sentRaw[slot] = clocks.raw[slot];
+    this.sentElapsed[slot] = clocks.elapsed[slot];
+    this.sentExtra[slot] = clocks.extra[slot];
+    this.sentHome[slot] = clocks.homeGoals[slot];
+    this.sentAway[slot] = clocks.awayGoals[slot];
+  }
+}
+
+module.exports = new LobbyService();
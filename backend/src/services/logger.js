@@ -0,0 +1,163 @@
+const fs = require('fs');
+
+// Structured logger. One JSON object per line:
+//   {"t":"2026-01-01T12:00:00.000Z","level":"info","tag":"BET","msg":"Bet placed","betId":"..."}
+//
+// Lines are buffered and handed to the fd in batches (one fs.write per flush, off the
+// event loop), so a slow terminal or pipe never adds to bet or tick latency. Below
+// warn level, lines beyond MAX_BUFFERED are dropped and counted instead of growing memory.
+//
+// LOG_LEVEL   debug | info | warn | error   (default info)
+// LOG_FORMAT  json | pretty                 (default json)
+
+const LEVELS = { debug: 10, info: 20, warn: 30, error: 40 };
+const MIN_LEVEL = LEVELS[process.env.LOG_LEVEL] || LEVELS.info;
+const PRETTY = process.env.LOG_FORMAT === 'pretty';
+const MAX_BUFFERED = 10000;
+const RETRY_MS = 10; // stdout pipes can be non-blocking (EAGAIN)
+
+class LogSink {
+  constructor(fd) {
+    this.fd = fd;
+    this.buffer = [];
+    this.writing = false;
+    this.scheduled = false;
+    this.dropped = 0;
+  }
+
+  push(line, force) {
+    if (!force && this.buffer.length >= MAX_BUFFERED) {
+        this.dropped++;
+        return;
+    }
+    this.buffer.push(line);
+    this.schedule();
+  }
+
+  schedule() {
+    if (this.writing || this.scheduled) return;
+    this.scheduled = true;
+    setImmediate(() => {
+        this.scheduled = false;
+        this.flush();
+    });
+  }
+
+  take() {
+    if (this.dropped > 0) {
+        this.buffer.push(format('warn', 'LOG', `Dropped ${this.dropped} lines (sink backlog)`, null));
+        this.dropped = 0;
+    }
+    const data = Buffer.from(this.buffer.join('\n') + '\n');
+    this.buffer = [];
+    return data;
+  }
+
+  flush() {
+    if (this.writing || this.buffer.length === 0) return;
+    this.writing = true;
+    this.write(this.take(), 0);
+  }
+
+  write(data, offset) {
+    fs.write(this.fd, data, offset, data.length - offset, null, (error, written) => {
+        if (error && error.code === 'EAGAIN') {
+            setTimeout(() => this.write(data, offset), RETRY_MS);
+            return;
+        }
+        if (!error && offset + written < data.length) {
+            this.write(data, offset + written);
+            return;
+        }
+        this.writing = false;
+        if (this.buffer.length > 0) this.schedule();
+    });
+  }
+
+  // Process exit: whatever is still buffered is written synchronously
+  flushSync() {
+    if (this.buffer.length === 0) return;
+    try {
+        fs.writeSync(this.fd, this.take());
+    } catch (error) {
+        // Nothing left to report to
+    }
+  }
+}
+
+const stdout = new LogSink(1);
+const stderr = new LogSink(2);
+process.on('exit', () => {
+    stdout.flushSync();
+    stderr.flushSync();
+});
+
+function serialize(value) {
+    return value instanceof Error ? value.message : value;
+}
+
+function format(level, tag, msg, fields) {
+    if (PRETTY) {
+        let line = `${new Date().toISOString()} ${level.toUpperCase().padEnd(5)} [${tag}] ${msg}`;
+        if (fields) {
+            for (const key in fields) {
+                const value = serialize(fields[key]);
+                line += ` ${key}=${typeof value === 'object' ? JSON.stringify(value) : value}`;
+            }
+        }
+        return line;
+    }
+
+    const entry = { t: new Date().toISOString(), level, tag, msg };
+    if (fields) {
+        for (const key in fields) entry[key] = serialize(fields[key]);
+    }
+    return JSON.stringify(entry);
+}
+
+class Logger {
+  constructor(tag, fields = null, sampleEvery = 1) {
+    this.tag = tag;
+    this.fields = fields;
+    this.sampleEvery = sampleEvery;
+    this.calls = 0;
+  }
+
+  child(tag, fields = null) {
+    return new Logger(tag, this.fields || fields ? { ...this.fields, ...fields } : null);
+  }
+
+  // For per-tick messages: only 1 of every `every` debug/info calls is written
+  sampled(every) {
+    return new Logger(this.tag, this.fields, every);
+  }
+
+  enabled(level) {
+    return LEVELS[level] >= MIN_LEVEL;
+  }
+
+  log(level, msg, fields) {
+    const severity = LEVELS[level];
+    if (severity < MIN_LEVEL) return;
+
+    if (this.sampleEvery > 1 && severity < LEVELS.warn) {
+        if (this.calls++ % this.sampleEvery !== 0) return;
+        fields = { ...fields, sampled: this.sampleEvery };
+    }
+
+    const merged = this.fields ? { ...this.fields, ...fields } : fields;
+    const line = format(level, this.tag, msg, merged);
+    if (severity >= LEVELS.warn) stderr.push(line, true);
+    else stdout.push(line, false);
+  }
+
+  debug(msg, fields) { this.log('debug', msg, fields); }
+  info(msg, fields) { this.log('info', msg, fields); }
+  warn(msg, fields) { this.log('warn', msg, fields); }
+  error(msg, fields) { this.log('error', msg, fields); }
+}
+
+// Every line from a cluster worker carries its shard index
+const shard = process.env.SHARD_INDEX !== undefined ? { shard: parseInt(process.env.SHARD_INDEX) } : null;
+
+module.exports = new Logger('APP', shard);
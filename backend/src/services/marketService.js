@@ -1,11 +1,24 @@
+const ExpiryQueue = require('./expiryQueue');
+const PricingEngine = require('./pricingEngine');
+const log = require('./logger').child('MARKET');
+const oddsLog = log.child('ODDS').sampled(100); // every open market, every tick
+const moneyLog = log.child('MONEY');
+
+// Simulator events don't always end with a 'safe': a suspension lifts on its own after this long
+const EVENT_SUSPEND_MS = parseInt(process.env.EVENT_SUSPEND_MS) || 30 * 1000;
+
 class MarketService {
   constructor() {
     this.activeMarkets = [];
     this.marketIdCounter = 1;
     this.io = null;
+    this.oddsChanged = false;
+    this.expiry = new ExpiryQueue(); // expires_at deadlines in epoch ms
+    this.expiryHandles = new Map(); // marketId -> ExpiryQueue handle
+    this.resumeHandle = null; // ExpiryQueue handle of the pending unsuspend
+    this.pricing = new PricingEngine();
 
-    // Start odds updater interval
-    setInterval(() => this.updateOdds(), 1000);
+    // Driven by the TickScheduler: updateOdds in the 'markets' phase, broadcastOdds in 'broadcast'
   }
 
   setIo(io) {
@@ -13,7 +26,7 @@ class MarketService {
   }
 
   processEvent(event) {
-    console.log(`[MARKET] Processing event: ${event.type}`);
+    log.debug('Processing event', { type: event.type });
 
     // 1. Resolve Markets (Goal -> WIN)
     if (event.type === 'goal') {
@@ -21,10 +34,10 @@ class MarketService {
       return;
     }
 
-    // 2. Suspend Markets (Corner, Danger, Penalty, Free Kick)
+    // 2. Suspend Markets (Corner, Danger, Penalty, Free Kick, VAR)
     // Note: Simulator currently emits 'corner', 'danger', 'red_card', 'yellow_card'.
     // We treat 'corner' and 'danger' as suspension triggers.
-    if (['corner', 'danger', 'red_card', 'penalty', 'free_kick'].includes(event.type)) {
+    if (['corner', 'danger', 'red_card', 'penalty', 'free_kick', 'var'].includes(event.type)) {
       this.suspendMarkets(event.type);
       return;
     }
@@ -61,24 +74,42 @@ class MarketService {
     };
 
     this.activeMarkets.push(market);
-    console.log(`[MARKET] New Market Created: ID ${market.id} (${market.type})`);
+    log.debug('Market created', { marketId: market.id, type: market.type });
 
     if (this.io) {
       this.io.emit('market_update', market);
     }
 
-    // Set timeout for LOSS
-    setTimeout(() => {
-      this.resolveMarketAsLoss(market.id);
-    }, durationSeconds * 1000);
+    // Register deadline for LOSS (fired by expireMarkets on the tick)
+    const handle = this.expiry.schedule(expiresAt.getTime(), () => this.resolveMarketAsLoss(market.id));
+    this.expiryHandles.set(market.id, handle);
+  }
+
+  expireMarkets() {
+    this.expiry.advance(Date.now());
+  }
+
+  cancelExpiry(marketId) {
+    const handle = this.expiryHandles.get(marketId);
+    if (handle) {
+      this.expiry.cancel(handle);
+      this.expiryHandles.delete(marketId);
+    }
   }
 
   suspendMarkets(reason) {
+    // Later events extend the suspension
+    if (this.resumeHandle) this.expiry.cancel(this.resumeHandle);
+    this.resumeHandle = this.expiry.schedule(Date.now() + EVENT_SUSPEND_MS, () => {
+      this.resumeHandle = null;
+      this.unsuspendMarkets();
+    });
+
     let changed = false;
     this.activeMarkets.forEach(market => {
       if (market.status !== 'SUSPENDED') {
         market.status = 'SUSPENDED';
-        console.log(`[MARKET] Market ID ${market.id} SUSPENDED due to ${reason}`);
+        log.debug('Market suspended', { marketId: market.id, reason });
         changed = true;
       }
     });
@@ -89,11 +120,16 @@ class MarketService {
   }
 
   unsuspendMarkets() {
+    if (this.resumeHandle) {
+      this.expiry.cancel(this.resumeHandle);
+      this.resumeHandle = null;
+    }
+
     let changed = false;
     this.activeMarkets.forEach(market => {
       if (market.status === 'SUSPENDED') {
         market.status = 'OPEN';
-        console.log(`[MARKET] Market ID ${market.id} RE-OPENED (Safe)`);
+        log.debug('Market re-opened', { marketId: market.id });
         changed = true;
       }
     });
@@ -107,9 +143,10 @@ class MarketService {
     if (this.activeMarkets.length === 0) return;
 
     this.activeMarkets.forEach(market => {
-      console.log(`[MARKET] Market ID ${market.id} RESOLVED: ${result}`);
+      log.debug('Market resolved', { marketId: market.id, result });
       market.status = result;
       market.resolved_at = new Date();
+      this.cancelExpiry(market.id);
     });
 
     if (this.io) {
@@ -121,12 +158,14 @@ class MarketService {
   }
 
   resolveMarketAsLoss(marketId) {
+    this.expiryHandles.delete(marketId);
+
     const index = this.activeMarkets.findIndex(m => m.id === marketId);
     if (index !== -1) {
       const market = this.activeMarkets[index];
       // Only resolve if not already resolved (e.g. by goal)
       if (market.status !== 'WIN' && market.status !== 'LOSS') {
-        console.log(`[MARKET] Market ID ${market.id} RESOLVED: LOSS (Timeout)`);
+        log.debug('Market resolved', { marketId: market.id, result: 'LOSS', reason: 'timeout' });
         market.status = 'LOSS';
         market.resolved_at = new Date();
 
@@ -143,37 +182,33 @@ class MarketService {
   updateOdds() {
     if (this.activeMarkets.length === 0) return;
 
-    const now = new Date();
-    let changed = false;
+    const now = Date.now();
 
+    // Time decay: as the window runs out P(goal) falls, so YES drifts out and NO comes in.
+    // No match context here, so the clock is minutes since the market opened and the score is level.
+    this.pricing.begin();
     this.activeMarkets.forEach(market => {
       if (market.status === 'OPEN') {
-        const timeLeftMs = market.expires_at.getTime() - now.getTime();
-        const timeLeft = Math.max(0, timeLeftMs / 1000); // Seconds
-        const timeTotal = market.duration_seconds;
-
-        // Simple linear decay logic for MVP
-        // As time decreases, Probability(No Goal) increases -> Odds(No) decrease
-        // As time decreases, Probability(Goal) decreases -> Odds(Yes) increase
-
-        const progress = 1 - (timeLeft / timeTotal); // 0 (start) to 1 (end)
-
-        // Linear interpolation for simplicity:
-        // YES odds rise from 2.50 -> 10.00
-        // NO odds drop from 1.50 -> 1.01
-
-        const newYes = 2.50 + (progress * 7.5); // 2.50 -> 10.00
-        const newNo = 1.50 - (progress * 0.49); // 1.50 -> 1.01
-
-        market.odds.yes = parseFloat(newYes.toFixed(2));
-        market.odds.no = parseFloat(newNo.toFixed(2));
-
-        console.log(`[ODDS] Market ${market.id} Update: YES @ ${market.odds.yes} | NO @ ${market.odds.no} (Time left: ${Math.floor(timeLeft)}s)`);
-        changed = true;
+        const clock = (now - market.created_at.getTime()) / 60000;
+        this.pricing.add(market, PricingEngine.KIND.GOAL, 0, market.duration_seconds / 60, clock);
       }
     });
 
-    if (changed && this.io) {
+    if (this.pricing.run() > 0) {
+      this.oddsChanged = true;
+      this.activeMarkets.forEach(market => {
+        if (market.status === 'OPEN') {
+          oddsLog.debug('Odds updated', { marketId: market.id, yes: market.odds.yes, no: market.odds.no });
+        }
+      });
+    }
+  }
+
+  broadcastOdds() {
+    if (!this.oddsChanged) return;
+    this.oddsChanged = false;
+
+    if (this.io) {
       this.io.emit('odds_update', this.activeMarkets);
     }
   }
@@ -183,18 +218,18 @@ class MarketService {
     const market = this.activeMarkets.find(m => m.id === marketId);
 
     if (!market) {
-        console.log(`[MONEY] Bet Rejected: Market ${marketId} not found.`);
+        moneyLog.warn('Rejected: market not found', { marketId });
         if (this.io) this.io.to(socketId).emit('bet_rejected', { reason: 'Market not found' });
         return;
     }
 
     if (market.status !== 'OPEN') {
-        console.log(`[MONEY] Bet Rejected: Market ${marketId} is ${market.status}.`);
+        moneyLog.warn('Rejected: market not open', { marketId, status: market.status });
         if (this.io) this.io.to(socketId).emit('bet_rejected', { reason: `Market is ${market.status}` });
         return;
     }
 
-    console.log(`[MONEY] New Bet Accepted! R$ ${amount} on ${selection} @ ${odd}.`);
+    moneyLog.debug('Bet accepted', { marketId, amount, selection, odd });
     if (this.io) {
         this.io.to(socketId).emit('bet_accepted', {
             marketId,
@@ -0,0 +1,27 @@
+const { EventEmitter } = require('events');
+const log = require('./logger').child('EVENTS');
+
+// In-process bus for typed match events, one per shard.
+// The EventIngest dispatches on it at the start of the 'markets' phase; FlashMarketService
+// listens, so a goal or suspension lands in the tick it arrived in.
+//
+// Event: { fixtureId, type, team ('Home' | 'Away' | null), minute, extra, detail, player, card, missed, key }
+//   type    'goal' | 'card' | 'var' | 'penalty'
+//   card    'yellow' | 'red' (card events only, null otherwise)
+//   missed  a missed penalty: the penalty is over, nothing is pending
+// Listeners get it both as its type ('goal', ...) and as 'event'.
+
+const EVENT_TYPES = ['goal', 'card', 'var', 'penalty'];
+
+class MatchEventBus extends EventEmitter {
+  publish(event) {
+    log.debug('Match event', { fixtureId: event.fixtureId, type: event.type, minute: event.minute, detail: event.detail });
+    this.emit(event.type, event);
+    this.emit('event', event);
+  }
+}
+
+const bus = new MatchEventBus();
+bus.EVENT_TYPES = EVENT_TYPES;
+
+module.exports = bus;
@@ -0,0 +1,136 @@
+const crypto = require('crypto');
+const zlib = require('zlib');
+const { promisify } = require('util');
+const lobbyService = require('./lobbyService');
+const log = require('./logger').child('MATCHES');
+
+// Serialized GET /matches bodies. Each filter/page variant is serialized once per list
+// version (ClockStore.listVersion: fixture set, status, minute, extra or score changed)
+// with a strong ETag, and compressed (gzip / brotli) at most once per version on first demand.
+// Bodies are the list projection (no markets, no events), ordered by fixture id, without the
+// clock second: a version lasts up to a minute, so the second would go stale under a matching
+// ETag. Live seconds come from the lobby channel (lobby_snapshot), which clients extrapolate.
+//
+// Query: status=live|scheduled|finished, league=<id or name>, limit=<n>, cursor=<opaque>.
+// Without limit/cursor the whole (filtered) list is returned; with them the next page
+// is announced in the Link (rel="next") and X-Next-Cursor headers.
+
+const gzip = promisify(zlib.gzip);
+const brotliCompress = promisify(zlib.brotliCompress);
+
+const STATUS_FILTERS = {
+  live: ['IN_PLAY', 'PAUSED'],
+  scheduled: ['SCHEDULED'],
+  finished: ['FINISHED']
+};
+const DEFAULT_PAGE_SIZE = 100;
+const MAX_PAGE_SIZE = 500;
+const MAX_ENTRIES = 64; // cached variants per version
+
+const encodeCursor = (fixtureId) => Buffer.from(String(fixtureId)).toString('base64url');
+const decodeCursor = (cursor) => parseInt(Buffer.from(cursor, 'base64url').toString(), 10);
+
+class MatchListCache {
+  constructor() {
+    this.matchService = null;
+    this.version = -1;
+    this.entries = new Map(); // query key -> entry (insertion = age order)
+  }
+
+  setMatchService(service) {
+    this.matchService = service;
+  }
+
+  // Returns { status, league, cursor, limit, key } or { error }
+  parseQuery(query) {
+    const status = query.status ? String(query.status).toLowerCase() : null;
+    if (status && !STATUS_FILTERS[status]) {
+        return { error: `status must be one of ${Object.keys(STATUS_FILTERS).join(', ')}` };
+    }
+
+    let cursor = null;
+    if (query.cursor) {
+        cursor = decodeCursor(String(query.cursor));
+        if (!Number.isInteger(cursor)) return { error: 'invalid cursor' };
+    }
+
+    let limit = null;
+    if (query.limit !== undefined) {
+        limit = parseInt(query.limit, 10);
+        if (!(limit > 0)) return { error: 'limit must be a positive integer' };
+        limit = Math.min(limit, MAX_PAGE_SIZE);
+    } else if (cursor !== null) {
+        limit = DEFAULT_PAGE_SIZE;
+    }
+
+    const league = query.league ? String(query.league) : null;
+    return { status, league, cursor, limit, key: `${status}|${league}|${cursor}|${limit}` };
+  }
+
+  get(query) {
+    const clocks = this.matchService.clocks;
+    if (clocks.listVersion !== this.version) {
+        this.version = clocks.listVersion;
+        this.entries.clear();
+    }
+
+    let entry = this.entries.get(query.key);
+    if (!entry) {
+        entry = this.build(query);
+        if (this.entries.size >= MAX_ENTRIES) this.entries.delete(this.entries.keys().next().value);
+        this.entries.set(query.key, entry);
+    }
+    return entry;
+  }
+
+  build({ status, league, cursor, limit }) {
+    const statuses = status ? STATUS_FILTERS[status] : null;
+    const leagueName = league ? league.toLowerCase() : null;
+
+    let matches = this.matchService.getMatches().filter(match => {
+        if (statuses && !statuses.includes(match.fixture.status.short)) return false;
+        if (league && String(match.league.id) !== league && match.league.name.toLowerCase() !== leagueName) return false;
+        if (cursor !== null && match.fixture.id <= cursor) return false;
+        return true;
+    });
+    matches.sort((a, b) => a.fixture.id - b.fixture.id);
+
+    let nextCursor = null;
+    if (limit !== null && matches.length > limit) {
+        matches = matches.slice(0, limit);
+        nextCursor = encodeCursor(matches[matches.length - 1].fixture.id);
+    }
+
+    const body = Buffer.from(JSON.stringify(matches.map(match => lobbyService.project(match, false))));
+    const hash = crypto.createHash('sha1').update(body).digest('base64url');
+    log.debug('Built match list', { status, league, cursor, limit, matches: matches.length, bytes: body.length });
+
+    return {
+        body,
+        hash,
+        nextCursor,
+        encoded: { identity: Promise.resolve(body) }
+    };
+  }
+
+  // Strong ETag per representation (the compressed bodies are different bytes)
+  etag(entry, encoding) {
+    return encoding === 'identity' ? `"${entry.hash}"` : `"${entry.hash}-${encoding}"`;
+  }
+
+  // A failed compression is not kept: the next request for this version tries again
+  encode(entry, encoding) {
+    if (!entry.encoded[encoding]) {
+        const pending = encoding === 'br'
+            ? brotliCompress(entry.body, { params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 5 } })
+            : gzip(entry.body, { level: 6 });
+        entry.encoded[encoding] = pending;
+        pending.catch(() => {
+            if (entry.encoded[encoding] === pending) delete entry.encoded[encoding];
+        });
+    }
+    return entry.encoded[encoding];
+  }
+}
+
+module.exports = new MatchListCache();
@@ -0,0 +1,249 @@
+const { monitorEventLoopDelay } = require('perf_hooks');
+
+// In-process metrics rendered in the Prometheus text format (GET /metrics).
+//
+// Hot-path instruments are cheap enough to leave on: label children are created once
+// and cached, histogram buckets are preallocated Float64Arrays and observe() is a short
+// linear scan. Gauges that describe current state (sockets, rooms, open markets, loop lag)
+// are computed by collectors only when /metrics is scraped.
+
+const DURATION_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5];
+const LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5];
+const SIZE_BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500];
+
+const labelKey = (values) => values.length === 1 ? String(values[0]) : values.join('\u0001');
+
+const escapeLabel = (value) => String(value).replace(/\\/g, '\\\\').replace(/\n/g, '\\n').replace(/"/g, '\\"');
+
+const formatLabels = (names, values, extra = '') => {
+    const pairs = names.map((name, i) => `${name}="${escapeLabel(values[i])}"`);
+    if (extra) pairs.push(extra);
+    return pairs.length > 0 ? `{${pairs.join(',')}}` : '';
+};
+
+class Counter {
+  constructor(name, help, labelNames = []) {
+    this.name = name;
+    this.help = help;
+    this.type = 'counter';
+    this.labelNames = labelNames;
+    this.children = new Map(); // labelKey -> { values, value }
+    if (labelNames.length === 0) this.labels(); // unlabeled series report 0 from the start
+  }
+
+  labels(...values) {
+    const key = labelKey(values);
+    let child = this.children.get(key);
+    if (!child) {
+        child = { values, value: 0, inc(n = 1) { this.value += n; } };
+        this.children.set(key, child);
+    }
+    return child;
+  }
+
+  inc(n = 1) {
+    this.labels().inc(n);
+  }
+
+  samples() {
+    return [...this.children.values()].map(c => ({ labels: c.values, value: c.value }));
+  }
+}
+
+class Gauge extends Counter {
+  constructor(name, help, labelNames = []) {
+    super(name, help, labelNames);
+    this.type = 'gauge';
+  }
+
+  set(value, ...labelValues) {
+    this.labels(...labelValues).value = value;
+  }
+
+  reset() {
+    this.children.clear();
+  }
+}
+
+class Histogram {
+  constructor(name, help, labelNames = [], buckets = DURATION_BUCKETS) {
+    this.name = name;
+    this.help = help;
+    this.type = 'histogram';
+    this.labelNames = labelNames;
+    this.buckets = buckets;
+    this.children = new Map();
+    if (labelNames.length === 0) this.labels();
+  }
+
+  labels(...values) {
+    const key = labelKey(values);
+    let child = this.children.get(key);
+    if (!child) {
+        const buckets = this.buckets;
+        child = {
+            values,
+            counts: new Float64Array(buckets.length + 1), // last slot is +Inf
+            sum: 0,
+            count: 0,
+            observe(value) {
+                let i = 0;
+                while (i < buckets.length && value > buckets[i]) i++;
+                this.counts[i]++;
+                this.sum += value;
+                this.count++;
+            }
+        };
+        this.children.set(key, child);
+    }
+    return child;
+  }
+
+  observe(value) {
+    this.labels().observe(value);
+  }
+
+  samples() {
+    return [...this.children.values()].map(c => ({
+        labels: c.values,
+        counts: Array.from(c.counts),
+        sum: c.sum,
+        count: c.count
+    }));
+  }
+}
+
+class Metrics {
+  constructor() {
+    this.instruments = [];
+    this.collectors = []; // run before every scrape
+
+    // Tick
+    this.tickDuration = this.histogram('flashbets_tick_duration_seconds', 'Duration of a full heartbeat tick');
+    this.tickPhaseDuration = this.histogram('flashbets_tick_phase_duration_seconds', 'Duration of each heartbeat phase', ['phase']);
+    this.tickTaskDuration = this.histogram('flashbets_tick_task_duration_seconds', 'Duration of each task registered on the heartbeat', ['task']);
+    this.tickOverruns = this.counter('flashbets_tick_overruns_total', 'Ticks that took longer than the tick interval');
+    this.ticksSkipped = this.counter('flashbets_ticks_skipped_total', 'Tick boundaries skipped because an overrun went past them');
+    this.eventLoopLag = this.gauge('flashbets_event_loop_lag_seconds', 'Event loop delay since the last scrape', ['quantile']);
+
+    // Bets
+    this.betLatency = this.histogram('flashbets_bet_latency_seconds', 'Time from place_bet receipt to bet_accepted/bet_rejected', ['outcome'], LATENCY_BUCKETS);
+    this.intakeBatchSize = this.histogram('flashbets_bet_intake_batch_size', 'Bets committed per intake micro-batch', [], SIZE_BUCKETS);
+    this.betDuplicates = this.counter('flashbets_bet_duplicates_total', 'place_bet retries answered from the idempotency cache');
+    this.settlementBatchSize = this.histogram('flashbets_settlement_batch_size', 'Bets settled per settlement batch', [], SIZE_BUCKETS);
+    this.settlementDuration = this.histogram('flashbets_settlement_duration_seconds', 'Time from settlement decision to results emitted (journal + credits)', [], LATENCY_BUCKETS);
+
+    // Sockets
+    this.emits = this.counter('flashbets_socket_emits_total', 'Socket.IO broadcasts by event', ['event']);
+    this.connectedSockets = this.gauge('flashbets_connected_sockets', 'Sockets connected to this process');
+    this.rooms = this.gauge('flashbets_rooms', 'Socket.IO rooms (excluding per-socket rooms)');
+    this.openMarkets = this.gauge('flashbets_open_markets', 'Open flash markets per fixture', ['fixture']);
+    this.watchedFixtures = this.gauge('flashbets_watched_fixtures', 'Fixtures owned by this shard with at least one viewer');
+    this.trackedFixtures = this.gauge('flashbets_tracked_fixtures', 'Fixtures with full flash market state on this shard');
+    this.droppedFrames = this.counter('flashbets_dropped_frames_total', 'Superseded state frames not sent to congested sockets (resynced on drain)', ['event']);
+    this.congestedSockets = this.gauge('flashbets_congested_sockets', 'Sockets over the backpressure high-water mark');
+    this.slowClientDisconnects = this.counter('flashbets_slow_client_disconnects_total', 'Sockets disconnected for unsent bytes or a congestion stall', ['reason']);
+    this.lobbyPatchRows = this.histogram('flashbets_lobby_patch_rows', 'Fixtures (added + changed + removed) per lobby_patch', [], SIZE_BUCKETS);
+
+    // Upstream
+    this.upstreamDuration = this.histogram('flashbets_upstream_request_duration_seconds', 'API-Football request latency', ['endpoint'], LATENCY_BUCKETS);
+    this.upstreamErrors = this.counter('flashbets_upstream_errors_total', 'Failed API-Football requests', ['endpoint', 'status']);
+    this.feedEvents = this.counter('flashbets_feed_events_total', 'Typed fixture events (goal, card, var, penalty) dispatched to the markets', ['type']);
+
+    this.loopDelay = monitorEventLoopDelay({ resolution: 10 });
+    this.loopDelay.enable();
+    this.addCollector(() => {
+        const ns = 1e9;
+        this.eventLoopLag.set(this.loopDelay.percentile(50) / ns, '0.5');
+        this.eventLoopLag.set(this.loopDelay.percentile(99) / ns, '0.99');
+        this.eventLoopLag.set(this.loopDelay.max / ns, '1');
+        this.loopDelay.reset();
+    });
+  }
+
+  counter(name, help, labelNames) {
+    return this.add(new Counter(name, help, labelNames));
+  }
+
+  gauge(name, help, labelNames) {
+    return this.add(new Gauge(name, help, labelNames));
+  }
+
+  histogram(name, help, labelNames, buckets) {
+    return this.add(new Histogram(name, help, labelNames, buckets));
+  }
+
+  add(instrument) {
+    this.instruments.push(instrument);
+    return instrument;
+  }
+
+  addCollector(fn) {
+    this.collectors.push(fn);
+  }
+
+  // Counts every broadcast that goes through the adapter (io.emit / io.to(...).emit)
+  instrumentAdapter(adapter) {
+    const broadcast = adapter.broadcast.bind(adapter);
+    adapter.broadcast = (packet, opts) => {
+        this.emits.labels(packet.data[0]).inc();
+        broadcast(packet, opts);
+    };
+  }
+
+  // Plain data, so shards can send their families over IPC to be merged
+  collect() {
+    this.collectors.forEach(fn => fn());
+    return this.instruments.map(m => ({
+        name: m.name,
+        help: m.help,
+        type: m.type,
+        labelNames: m.labelNames,
+        buckets: m.buckets,
+        samples: m.samples()
+    }));
+  }
+
+  // extraLabel: e.g. 'shard="2"', appended to every sample of that family list
+  render(familiesList) {
+    const lines = [];
+    const byName = new Map();
+
+    familiesList.forEach(({ families, extraLabel }) => {
+        families.forEach(family => {
+            if (!byName.has(family.name)) byName.set(family.name, { family, parts: [] });
+            byName.get(family.name).parts.push({ samples: family.samples, extraLabel });
+        });
+    });
+
+    byName.forEach(({ family, parts }) => {
+        lines.push(`# HELP ${family.name} ${family.help}`);
+        lines.push(`# TYPE ${family.name} ${family.type}`);
+
+        parts.forEach(({ samples, extraLabel }) => {
+            samples.forEach(sample => {
+                if (family.type !== 'histogram') {
+                    lines.push(`${family.name}${formatLabels(family.labelNames, sample.labels, extraLabel)} ${sample.value}`);
+                    return;
+                }
+
+                let cumulative = 0;
+                family.buckets.forEach((bound, i) => {
+                    cumulative += sample.counts[i];
+                    const le = `le="${bound}"` + (extraLabel ? `,${extraLabel}` : '');
+                    lines.push(`${family.name}_bucket${formatLabels(family.labelNames, sample.labels, le)} ${cumulative}`);
+                });
+                cumulative += sample.counts[family.buckets.length];
+                const inf = 'le="+Inf"' + (extraLabel ? `,${extraLabel}` : '');
+                lines.push(`${family.name}_bucket${formatLabels(family.labelNames, sample.labels, inf)} ${cumulative}`);
+                lines.push(`${family.name}_sum${formatLabels(family.labelNames, sample.labels, extraLabel)} ${sample.sum}`);
+                lines.push(`${family.name}_count${formatLabels(family.labelNames, sample.labels, extraLabel)} ${sample.count}`);
+            });
+        });
+    });
+
+    return lines.join('\n') + '\n';
+  }
+}
+
+module.exports = new Metrics();
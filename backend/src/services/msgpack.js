@@ -0,0 +1,157 @@
+// MessagePack encoder for the binary wire schemas (see wireCodec.js).
+// Covers the spec subset the schemas produce: nil, bool, ints, float64, str, array, map.
+// Integers above 32 bits (timestamps) go out as float64, which is exact up to 2^53.
+//
+// One scratch buffer is reused for every encode and grown when a message doesn't fit;
+// the result is copied out, so callers own the returned Buffer.
+
+let scratch = Buffer.allocUnsafe(4096);
+let pos = 0;
+
+function ensure(bytes) {
+  if (pos + bytes <= scratch.length) return;
+  let size = scratch.length * 2;
+  while (size < pos + bytes) size *= 2;
+  const next = Buffer.allocUnsafe(size);
+  scratch.copy(next, 0, 0, pos);
+  scratch = next;
+}
+
+function writeInt(value) {
+  if (value >= 0) {
+      if (value < 0x80) {
+          ensure(1);
+          scratch[pos++] = value;
+      } else if (value < 0x100) {
+          ensure(2);
+          scratch[pos++] = 0xcc;
+          scratch[pos++] = value;
+      } else if (value < 0x10000) {
+          ensure(3);
+          scratch[pos++] = 0xcd;
+          scratch.writeUInt16BE(value, pos);
+          pos += 2;
+      } else if (value < 0x100000000) {
+          ensure(5);
+          scratch[pos++] = 0xce;
+          scratch.writeUInt32BE(value, pos);
+          pos += 4;
+      } else {
+          writeFloat(value);
+      }
+  } else if (value >= -32) {
+      ensure(1);
+      scratch[pos++] = 0xe0 | (value + 32);
+  } else if (value >= -0x80) {
+      ensure(2);
+      scratch[pos++] = 0xd0;
+      scratch.writeInt8(value, pos);
+      pos += 1;
+  } else if (value >= -0x8000) {
+      ensure(3);
+      scratch[pos++] = 0xd1;
+      scratch.writeInt16BE(value, pos);
+      pos += 2;
+  } else if (value >= -0x80000000) {
+      ensure(5);
+      scratch[pos++] = 0xd2;
+      scratch.writeInt32BE(value, pos);
+      pos += 4;
+  } else {
+      writeFloat(value);
+  }
+}
+
+function writeFloat(value) {
+  ensure(9);
+  scratch[pos++] = 0xcb;
+  scratch.writeDoubleBE(value, pos);
+  pos += 8;
+}
+
+function writeString(value) {
+  // Short ASCII strings (ids, types, status codes) are copied char by char: no byteLength pass
+  if (value.length < 32) {
+      ensure(value.length + 1);
+      const start = pos;
+      scratch[pos++] = 0xa0 | value.length;
+      let i = 0;
+      for (; i < value.length; i++) {
+          const c = value.charCodeAt(i);
+          if (c >= 0x80) break;
+          scratch[pos++] = c;
+      }
+      if (i === value.length) return;
+      pos = start; // non-ASCII: take the general path
+  }
+
+  const length = Buffer.byteLength(value);
+  ensure(length + 5);
+  if (length < 32) {
+      scratch[pos++] = 0xa0 | length;
+  } else if (length < 0x100) {
+      scratch[pos++] = 0xd9;
+      scratch[pos++] = length;
+  } else if (length < 0x10000) {
+      scratch[pos++] = 0xda;
+      scratch.writeUInt16BE(length, pos);
+      pos += 2;
+  } else {
+      scratch[pos++] = 0xdb;
+      scratch.writeUInt32BE(length, pos);
+      pos += 4;
+  }
+  pos += scratch.write(value, pos);
+}
+
+function writeHeader(length, fix, fixLimit, op16, op32) {
+  ensure(5);
+  if (length < fixLimit) {
+      scratch[pos++] = fix | length;
+  } else if (length < 0x10000) {
+      scratch[pos++] = op16;
+      scratch.writeUInt16BE(length, pos);
+      pos += 2;
+  } else {
+      scratch[pos++] = op32;
+      scratch.writeUInt32BE(length, pos);
+      pos += 4;
+  }
+}
+
+function write(value) {
+  if (value === null || value === undefined) {
+      ensure(1);
+      scratch[pos++] = 0xc0;
+  } else if (typeof value === 'number') {
+      if (Number.isInteger(value)) writeInt(value);
+      else writeFloat(value);
+  } else if (typeof value === 'string') {
+      writeString(value);
+  } else if (typeof value === 'boolean') {
+      ensure(1);
+      scratch[pos++] = value ? 0xc3 : 0xc2;
+  } else if (Array.isArray(value)) {
+      writeHeader(value.length, 0x90, 16, 0xdc, 0xdd);
+      for (let i = 0; i < value.length; i++) write(value[i]);
+  } else if (value instanceof Date) {
+      writeString(value.toISOString());
+  } else {
+      const keys = Object.keys(value);
+      writeHeader(keys.length, 0x80, 16, 0xde, 0xdf);
+      for (let i = 0; i < keys.length; i++) {
+          writeString(keys[i]);
+          write(value[keys[i]]);
+      }
+  }
+}
+
+function encode(value) {
+  pos = 0;
+  write(value);
+  const out = Buffer.allocUnsafe(pos);
+  scratch.copy(out, 0, 0, pos);
+  return out;
+}
+
+module.exports = { encode };
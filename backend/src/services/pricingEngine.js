@@ -0,0 +1,205 @@
+// Batch odds pricing for every open market, shared by MarketService and FlashMarketService.
+// Owners add one row per open market each tick (window, clock, score) and price() runs a
+// single pass over typed arrays with a Poisson goal model:
+//
+//   rate  = goals per minute, scaled by game time (late goals are likelier) and score state
+//           (a one-goal game is pushed, a settled one slows down)
+//   mu    = rate · minutes left in the window
+//   GOAL   P(yes) = 1 - e^-mu
+//   TOTAL  P(under) = Poisson CDF of the remaining goals up to the line
+//   RESULT home/draw/away from independent Poisson goals for each side
+//
+// Odds are 1 / (p · (1 + margin)), clamped and rounded to cents with Math.round, and only
+// written back into market.odds when they moved, so unchanged markets stay out of the patches.
+// Times are in minutes: game clock for flash markets, minutes since creation for MarketService.
+//
+// This is a deliberate recalibration, not a port of the old fixed odds. Those priced a
+// 1-minute goal window at 3.50 (a 29% chance) and a 5-minute one at 2.50 (40%); at ~2.7 goals
+// a match the real chances are nearer 3% and 15%, so yes now opens around 33.90 and 7.17.
+// test/pricingEngine.test.js pins these values; changing them should be a decision, not a side effect.
+
+const GOALS_PER_MATCH = parseFloat(process.env.PRICING_GOALS_PER_MATCH) || 2.7;
+const MARGIN = parseFloat(process.env.PRICING_MARGIN) || 0.05;
+const BASE_RATE = GOALS_PER_MATCH / 90;
+const HOME_SHARE = 0.54; // share of the goal rate for the home side at level score
+const MIN_ODDS = 1.01;
+const MAX_ODDS = 50;
+const MAX_GOALS = 10; // Poisson tail cut for RESULT / TOTAL
+
+const KIND = { GOAL: 0, RESULT: 1, TOTAL: 2 };
+
+const roundOdds = (odds) => Math.round(odds * 100) / 100;
+
+class PricingEngine {
+  constructor(capacity = 256) {
+    this.count = 0;
+    this.markets = [];
+    this.allocate(capacity);
+
+    // Per-side Poisson terms for RESULT rows (reused, never reallocated)
+    this.homeTerms = new Float64Array(MAX_GOALS + 1);
+    this.awayTerms = new Float64Array(MAX_GOALS + 1);
+  }
+
+  allocate(capacity) {
+    const grow = (Type, previous) => {
+        const next = new Type(capacity);
+        if (previous) next.set(previous.subarray(0, this.count));
+        return next;
+    };
+
+    this.capacity = capacity;
+    this.kind = grow(Uint8Array, this.kind);
+    this.windowStart = grow(Float64Array, this.windowStart);
+    this.windowEnd = grow(Float64Array, this.windowEnd);
+    this.clock = grow(Float64Array, this.clock);
+    this.scoreDiff = grow(Float64Array, this.scoreDiff); // home - away, drives the score-state factor
+    this.base = grow(Float64Array, this.base); // RESULT: goal difference already in; TOTAL: goals already in
+    this.line = grow(Float64Array, this.line); // TOTAL only
+    this.out0 = grow(Float64Array, this.out0); // yes | home | over
+    this.out1 = grow(Float64Array, this.out1); // no | draw | under
+    this.out2 = grow(Float64Array, this.out2); // away
+  }
+
+  static kindOf(market) {
+    const odds = market.odds;
+    if (!odds) return -1;
+    if (odds.yes !== undefined) return KIND.GOAL;
+    if (odds.home !== undefined) return KIND.RESULT;
+    if (odds.over !== undefined) return KIND.TOTAL;
+    return -1;
+  }
+
+  begin() {
+    this.count = 0;
+    this.markets.length = 0;
+  }
+
+  // One row per open market; the market object is only touched again by commit()
+  add(market, kind, windowStart, windowEnd, clock, scoreDiff = 0, base = 0, line = 0.5) {
+    if (this.count === this.capacity) this.allocate(this.capacity * 2);
+
+    const i = this.count++;
+    this.markets[i] = market;
+    this.kind[i] = kind;
+    this.windowStart[i] = windowStart;
+    this.windowEnd[i] = windowEnd;
+    this.clock[i] = clock;
+    this.scoreDiff[i] = scoreDiff;
+    this.base[i] = base;
+    this.line[i] = line;
+    return i;
+  }
+
+  price() {
+    const { kind, windowStart, windowEnd, clock, scoreDiff, base, line, out0, out1, out2 } = this;
+
+    for (let i = 0; i < this.count; i++) {
+        const now = clock[i];
+        const remaining = Math.max(0, windowEnd[i] - Math.max(now, windowStart[i]));
+
+        const diff = scoreDiff[i];
+        const absDiff = diff < 0 ? -diff : diff;
+        const timeFactor = 0.85 + 0.3 * Math.min(now, 90) / 90;
+        const stateFactor = absDiff === 0 ? 1 : (absDiff === 1 ? 1.1 : 0.9);
+        const mu = BASE_RATE * timeFactor * stateFactor * remaining;
+
+        if (kind[i] === KIND.GOAL) {
+            const pGoal = 1 - Math.exp(-mu);
+            out0[i] = toOdds(pGoal);
+            out1[i] = toOdds(1 - pGoal);
+        } else if (kind[i] === KIND.TOTAL) {
+            // Under when the goals still to come stay at or below line - goals already in
+            const allowed = Math.floor(line[i] - base[i]);
+            let pUnder = 0;
+            if (allowed >= 0) {
+                let term = Math.exp(-mu);
+                for (let k = 0; k <= allowed && k <= MAX_GOALS; k++) {
+                    pUnder += term;
+                    term *= mu / (k + 1);
+                }
+            }
+            out0[i] = toOdds(1 - pUnder);
+            out1[i] = toOdds(pUnder);
+        } else {
+            // The trailing side takes a bigger share of the chances
+            const share = HOME_SHARE + (diff < 0 ? 0.06 : (diff > 0 ? -0.06 : 0));
+            this.poissonTerms(mu * share, this.homeTerms);
+            this.poissonTerms(mu * (1 - share), this.awayTerms);
+
+            const lead = base[i];
+            let pHome = 0;
+            let pDraw = 0;
+            for (let h = 0; h <= MAX_GOALS; h++) {
+                for (let a = 0; a <= MAX_GOALS; a++) {
+                    const p = this.homeTerms[h] * this.awayTerms[a];
+                    const final = lead + h - a;
+                    if (final > 0) pHome += p;
+                    else if (final === 0) pDraw += p;
+                }
+            }
+            out0[i] = toOdds(pHome);
+            out1[i] = toOdds(pDraw);
+            out2[i] = toOdds(1 - pHome - pDraw);
+        }
+    }
+  }
+
+  poissonTerms(mean, terms) {
+    let term = Math.exp(-mean);
+    for (let k = 0; k <= MAX_GOALS; k++) {
+        terms[k] = term;
+        term *= mean / (k + 1);
+    }
+  }
+
+  // Write the priced rows back; returns how many markets changed odds
+  commit() {
+    let changed = 0;
+
+    for (let i = 0; i < this.count; i++) {
+        const odds = this.markets[i].odds;
+        let moved = false;
+
+        if (this.kind[i] === KIND.GOAL) {
+            if (odds.yes !== this.out0[i] || odds.no !== this.out1[i]) {
+                odds.yes = this.out0[i];
+                odds.no = this.out1[i];
+                moved = true;
+            }
+        } else if (this.kind[i] === KIND.TOTAL) {
+            if (odds.over !== this.out0[i] || odds.under !== this.out1[i]) {
+                odds.over = this.out0[i];
+                odds.under = this.out1[i];
+                moved = true;
+            }
+        } else if (odds.home !== this.out0[i] || odds.draw !== this.out1[i] || odds.away !== this.out2[i]) {
+            odds.home = this.out0[i];
+            odds.draw = this.out1[i];
+            odds.away = this.out2[i];
+            moved = true;
+        }
+
+        if (moved) changed++;
+    }
+
+    // Don't keep market objects alive until the next tick
+    this.count = 0;
+    this.markets.length = 0;
+    return changed;
+  }
+
+  run() {
+    this.price();
+    return this.commit();
+  }
+}
+
+function toOdds(probability) {
+  if (!(probability > 0)) return MAX_ODDS;
+  return roundOdds(Math.min(MAX_ODDS, Math.max(MIN_ODDS, 1 / (probability * (1 + MARGIN)))));
+}
+
+PricingEngine.KIND = KIND;
+
+module.exports = PricingEngine;
@@ -1,36 +1,76 @@
 require('dotenv').config();
-const axios = require('axios');
+const { createFeed } = require('./feedAdapter');
+const { FixtureBatcher } = require('./apiFootballClient');
 const FlashMarketService = require('./flashMarketService');
+const ClockStore = require('./clockStore');
+const shardRouter = require('./shardRouter');
+const subscriptions = require('./subscriptionService');
+const broadcaster = require('./broadcaster');
+const eventIngest = require('./eventIngest');
+const log = require('./logger').child('API');
+const monitorLog = log.child('MONITOR');
 
 const DEBUG_MODE = true;
+
+// A tracked fixture with no viewers and no pending bets keeps its markets this long
+// (page reloads, quick back-and-forth) before it drops to the clock-only path
+const FIXTURE_IDLE_MS = parseInt(process.env.FIXTURE_IDLE_MS) || 30 * 1000;
 let debugMatchCache = null;
 
 class RealDataService {
   constructor() {
     this.cachedMatches = [];
-    this.activeMonitors = new Map(); // fixtureId -> intervalId
+    this.matchIndex = new Map(); // fixtureId -> entry of cachedMatches
+    this.clocks = new ClockStore(); // live clock/score of every cached fixture; objects are materialized on demand
+    this.activeMonitors = new Set(); // Leader: fixtureIds watched by at least one room on any shard
+    this.monitorsByShard = new Map(); // Leader: shard -> fixtureIds its rooms watch
+    this.localMonitors = new Set(); // fixtureIds watched by rooms on this shard
+    this.liveFeedIds = new Set(); // fixtures carried by the last successful live=all response
+    this.idleSince = new Map(); // tracked fixtureId -> when it lost its last viewer / pending bet
     this.io = null;
     this.flashService = null;
     this.betService = null;
 
-    // Start passive update interval (60 seconds for API-Football Quota)
-    setInterval(() => this.updateLiveMatches(), 60 * 1000);
+    // Upstream source: live HTTP, recorder or replayer (FEED_MODE)
+    this.feed = createFeed();
+    this.fixtureBatcher = new FixtureBatcher(this.feed);
+    this.pollIntervalMs = (60 * 1000) / this.feed.speed;
+
+    // Only the leader shard talks to the upstream feed; every shard (the leader
+    // included) merges what it publishes. Each shard ticks the fixtures it owns.
+    shardRouter.on('feed:live', matches => this.applyLiveMatches(matches));
+    shardRouter.on('feed:fixture', apiMatch => this.applyFixtureUpdate(apiMatch));
+    shardRouter.on('monitor:set', (fixtureIds, shard) => this.setShardMonitors(fixtureIds, shard));
 
-    // Start Global Heartbeat (1s) - Increments seconds locally for smooth UI
+    if (shardRouter.isLeader()) {
+        // Start passive update interval (60 seconds for API-Football Quota, faster when replaying)
+        setInterval(() => this.updateLiveMatches(), this.pollIntervalMs);
+
+        // One sweep for every monitored fixture instead of an interval per fixture
+        setInterval(() => this.pollMonitoredFixtures(), this.pollIntervalMs);
+    }
+
+    // Global Heartbeat (1s) - Increments seconds locally for smooth UI.
+    // Driven by the TickScheduler: advanceClocks -> syncMarkets -> settleBets -> broadcast
     if (DEBUG_MODE) {
         this.initDebugMatch();
     }
 
-    setInterval(() => this.processGlobalHeartbeat(), 1000);
-
     // Initial load
-    this.updateLiveMatches();
+    if (shardRouter.isLeader()) {
+        this.updateLiveMatches();
+    }
   }
 
   setIo(io) {
     this.io = io;
   }
 
+  setFeed(feed) {
+      this.feed = feed;
+      this.fixtureBatcher = new FixtureBatcher(feed);
+  }
+
   setFlashService(service) {
       this.flashService = service;
   }
@@ -59,106 +99,180 @@ class RealDataService {
 
       // Generate Initial Markets
       debugMatchCache.markets = FlashMarketService.generateMarkets(debugMatchCache);
-      console.log('[DEBUG] Debug Match Initialized');
+      this.clocks.upsert(debugMatchCache, shardRouter.owns(999999), true);
+      log.info('Debug match initialized', { fixtureId: 999999 });
   }
 
-  processGlobalHeartbeat() {
-      // 1. Collect all live matches (Real + Debug)
-      const liveMatches = this.cachedMatches.filter(m => ['IN_PLAY', 'PAUSED'].includes(m.fixture.status.short));
-
-      // Ensure Debug Match is included if active
-      if (DEBUG_MODE && debugMatchCache) {
-          if (!liveMatches.find(m => m.fixture.id === 999999)) {
-              liveMatches.push(debugMatchCache);
+  // --- Heartbeat Phases ---
+
+  advanceClocks() {
+      // A. Real matches this shard owns: one pass over the clock store (in-play clocks gain a second)
+      this.clocks.advance();
+
+      // Debug Match: Full simulation (a function of wall time, so every shard computes the same clock)
+      const debugSlot = DEBUG_MODE ? this.clocks.slotOf(999999) : -1;
+      if (debugSlot >= 0) {
+          const now = Date.now();
+          const cycleDuration = 100 * 60; // 100 minutes total cycle for debug
+          const cycleTime = Math.floor((now / 1000) % cycleDuration);
+          const minute = Math.floor(cycleTime / 60);
+          const second = cycleTime % 60;
+
+          let status = 'IN_PLAY';
+          let period = '1H';
+          let elapsed = minute;
+
+          if (minute >= 45 && minute < 48) {
+              period = '1H';
+              elapsed = minute;
+          } else if (minute >= 48 && minute < 50) {
+              status = 'PAUSED';
+              period = 'HT';
+              elapsed = 45;
+          } else if (minute >= 50 && minute < 95) {
+              period = '2H';
+              elapsed = minute - 5 + 45;
+              elapsed = 45 + (minute - 50);
+          } else if (minute >= 95) {
+              period = '2H';
+              elapsed = 90 + (minute - 95);
+              if (minute >= 98) {
+                  status = 'FINISHED';
+                  period = 'FT';
+              }
           }
-      }
 
-      const now = Date.now();
-
-      liveMatches.forEach(match => {
-          // A. Simulate Time Progression
-          if (match.fixture.id === 999999) {
-              // Debug Match: Full simulation
-              const cycleDuration = 100 * 60; // 100 minutes total cycle for debug
-              const cycleTime = Math.floor((now / 1000) % cycleDuration);
-              const minute = Math.floor(cycleTime / 60);
-              const second = cycleTime % 60;
-
-              let status = 'IN_PLAY';
-              let period = '1H';
-              let elapsed = minute;
-
-              if (minute >= 45 && minute < 48) {
-                  period = '1H';
-                  elapsed = minute;
-              } else if (minute >= 48 && minute < 50) {
-                  status = 'PAUSED';
-                  period = 'HT';
-                  elapsed = 45;
-              } else if (minute >= 50 && minute < 95) {
-                  period = '2H';
-                  elapsed = minute - 5 + 45;
-                  elapsed = 45 + (minute - 50);
-              } else if (minute >= 95) {
-                  period = '2H';
-                  elapsed = 90 + (minute - 95);
-                  if (minute >= 98) {
-                      status = 'FINISHED';
-                      period = 'FT';
-                  }
-              }
+          this.clocks.setClock(debugSlot, status, period, elapsed, second, now);
+      }
+  }
 
-              match.fixture.status.short = status;
-              match.fixture.status.elapsed = elapsed;
-              match.fixture.status.second = second;
-              match.fixture.status.period = period;
-              match.fixture.status.raw = period;
-              match.serverTimestamp = now;
-          } else {
-              // Real Match: Heartbeat increment
-              if (match.fixture.status.short === 'IN_PLAY') {
-                  if (typeof match.fixture.status.second !== 'number') match.fixture.status.second = 0;
-                  match.fixture.status.second++;
-                  if (match.fixture.status.second > 59) {
-                      match.fixture.status.second = 59;
-                  }
-              }
+  syncMarkets() {
+      if (!this.flashService) return;
+
+      // B. Trigger Flash Market Logic (sync clocks, rotate markets, then expire/price once).
+      // Only fixtures with viewers or pending bets get markets; the rest stay clock-only.
+      // Markets only react to minute/score/status, so only those fixtures (and untracked ones) are materialized
+      const { clocks } = this;
+      for (let i = 0; i < clocks.tickedCount; i++) {
+          const slot = clocks.ticked[i];
+          const fixtureId = clocks.fixtureId[slot];
+          if (!this.isEngaged(fixtureId)) continue;
+          if (!clocks.dirty[slot] && this.flashService.activeGames.has(fixtureId)) continue;
+
+          const match = clocks.materialize(slot);
+          this.flashService.handleMatchUpdate(match);
+
+          const gameState = this.flashService.activeGames.get(fixtureId);
+          if (gameState && gameState.markets) {
+              match.markets = gameState.markets;
           }
+      }
+      this.releaseIdleFixtures(Date.now());
+      this.flashService.processTick();
+  }
 
-          // B. Trigger Flash Market Logic
-          if (this.flashService) {
-              this.flashService.handleMatchUpdate(match);
-              const gameState = this.flashService.activeGames.get(match.fixture.id);
-              if (gameState && gameState.markets) {
-                  match.markets = gameState.markets;
-              }
+  isEngaged(fixtureId) {
+      return subscriptions.hasViewers(fixtureId) ||
+          (this.betService !== null && this.betService.hasPendingBetsForMatch(fixtureId));
+  }
+
+  // Tear down market state of fixtures that stayed unwatched (and without bets) past the grace period
+  releaseIdleFixtures(now) {
+      this.flashService.activeGames.forEach((gameState, fixtureId) => {
+          if (this.isEngaged(fixtureId)) {
+              this.idleSince.delete(fixtureId);
+              return;
           }
 
-          // C. Emit Socket Update to specific room
-          if (this.io) {
-              this.io.to(`game_${match.fixture.id}`).emit('match_update', match);
+          const since = this.idleSince.get(fixtureId);
+          if (since === undefined) {
+              this.idleSince.set(fixtureId, now);
+          } else if (now - since >= FIXTURE_IDLE_MS) {
+              this.releaseFixture(fixtureId);
           }
       });
+  }
 
+  releaseFixture(fixtureId) {
+      this.flashService.stopTracking(fixtureId);
+      this.idleSince.delete(fixtureId);
+
+      const match = this.getMatch(fixtureId);
+      if (match) delete match.markets;
+  }
+
+  settleBets() {
       // D. Bet Settlement Engine (The "Judge")
-      // Call explicitly here to ensure active bets are checked against time progress
+      // Runs every tick to ensure active bets are checked against time progress
+      // Only fixtures with pending bets are looked at (finished ones included)
       if (this.betService) {
-          this.betService.resolveBets(this.cachedMatches); // Use full cache to catch finished games too
+          const matches = [];
+          for (const matchId of this.betService.pendingMatchIds()) {
+              const match = this.getMatch(matchId);
+              if (match) matches.push(match);
+          }
+          this.betService.resolveBets(matches);
       }
+  }
 
-      // Emit Global Update for List View
-      if (this.io && liveMatches.length > 0) {
-          this.io.emit('matches_update', liveMatches);
+  broadcast() {
+      if (!this.io) return;
+
+      // C. Emit Socket Update to specific room, only when minute, score or status moved
+      // (clients run the seconds locally). The list view is served by the LobbyService.
+      const { clocks } = this;
+      for (let i = 0; i < clocks.tickedCount; i++) {
+          const slot = clocks.ticked[i];
+          if (!clocks.dirty[slot]) continue;
+
+          clocks.dirty[slot] = 0;
+          if (!subscriptions.hasViewers(clocks.fixtureId[slot])) continue; // nobody in the room
+          const match = clocks.materialize(slot);
+          broadcaster.emit(`game_${match.fixture.id}`, 'match_update', match);
       }
   }
 
   getMatch(id) {
-      if (id == 999999 && debugMatchCache) return debugMatchCache;
-      return this.cachedMatches.find(m => m.fixture.id == id);
+      return this.clocks.get(parseInt(id));
+  }
+
+  setCachedMatches(matches) {
+      this.cachedMatches = matches;
+      this.matchIndex = new Map(matches.map(m => [m.fixture.id, m]));
+
+      // Clock slots follow the cache (the debug fixture keeps its own)
+      matches.forEach(match => {
+          if (match !== debugMatchCache) this.clocks.upsert(match, shardRouter.owns(match.fixture.id));
+      });
+      this.clocks.retain(this.matchIndex);
   }
 
   async updateLiveMatches() {
-    console.log('[API] Fetching LIVE matches from API-Football...');
+    log.debug('Fetching live matches', { feed: this.feed.name });
+
+    try {
+      let matches = [];
+
+      if (this.feed.isAvailable()) {
+          const body = await this.feed.get('fixtures?live=all');
+          matches = body.response || [];
+          eventIngest.ingest(matches);
+      } else {
+          log.error('No API_SPORTS_KEY found. Cannot fetch real data.');
+          // Keep existing cache if API fails? Or assume empty? For strictness, if no key, no real matches.
+      }
+
+      shardRouter.publish('feed:live', matches);
+
+    } catch (error) {
+      log.error('Failed to update matches', { error: error.response?.data || error.message });
+      this.liveFeedIds = new Set(); // Monitors poll on their own until live=all recovers
+    }
+  }
+
+  applyLiveMatches(matches) {
+    // The merge reads the cached objects (seconds, status), so bring them up to date first
+    this.clocks.materializeAll();
 
     // 1. THE JUDGE: Resolve bets BEFORE updating/cleaning matches
     // This ensures that if a match is about to disappear or change status to finished, we settle pending bets first.
@@ -167,21 +281,8 @@ class RealDataService {
     }
 
     try {
-      const apiKey = process.env.API_SPORTS_KEY;
-      let matches = [];
-
-      if (apiKey) {
-          const headers = {
-              'x-apisports-key': apiKey,
-              'x-apisports-host': 'v3.football.api-sports.io'
-          };
-
-          const response = await axios.get('https://v3.football.api-sports.io/fixtures?live=all', { headers });
-          matches = response.data.response || [];
-      } else {
-          console.error('[API ERROR] No API_SPORTS_KEY found. Cannot fetch real data.');
-          // Keep existing cache if API fails? Or assume empty? For strictness, if no key, no real matches.
-      }
+      // All passes below are linear: membership is checked against this set / matchIndex
+      const liveIds = new Set(matches.map(m => m.fixture.id));
 
       // 2. THE UNDERTAKER: Mark missing matches as FINISHED instead of deleting immediately
       // This handles cases where a match disappears from "live=all" because it finished.
@@ -189,9 +290,8 @@ class RealDataService {
           // Don't touch debug match
           if (oldMatch.fixture.id === 999999) return;
 
-          const stillLive = matches.find(m => m.fixture.id === oldMatch.fixture.id);
-          if (!stillLive) {
-              console.log(`[CLEANUP] Match ${oldMatch.fixture.id} disappeared from API. Marking as FINISHED.`);
+          if (!liveIds.has(oldMatch.fixture.id)) {
+              log.debug('Match disappeared from feed, marking as FINISHED', { fixtureId: oldMatch.fixture.id });
               oldMatch.fixture.status.short = 'FINISHED';
               oldMatch.fixture.status.raw = 'FT'; // Ensure robust finished check
           }
@@ -199,8 +299,13 @@ class RealDataService {
 
       // Adapt new data
       const adaptedNewMatches = matches.map(m => {
-          const existing = this.cachedMatches.find(c => c.fixture.id === m.fixture.id);
-          return this.adaptMatchData(m, existing);
+          const existing = this.matchIndex.get(m.fixture.id);
+          const adapted = this.adaptMatchData(m, existing);
+          // Watched fixtures are not polled separately while live=all carries them
+          if (existing && shardRouter.owns(adapted.fixture.id)) {
+              this.emitGoalEvents(existing, adapted);
+          }
+          return adapted;
       });
 
       // Merge: Update existing, add new, keep "finished ghosts" if needed
@@ -212,14 +317,13 @@ class RealDataService {
       this.cachedMatches.forEach(oldMatch => {
           if (oldMatch.fixture.id === 999999) return; // Debug handled later
 
-          const isRevised = adaptedNewMatches.find(m => m.fixture.id === oldMatch.fixture.id);
-          if (!isRevised && oldMatch.fixture.status.short === 'FINISHED') {
+          if (!liveIds.has(oldMatch.fixture.id) && oldMatch.fixture.status.short === 'FINISHED') {
               mergedMatches.push(oldMatch);
           }
       });
 
       // 3. THE GARBAGE COLLECTOR: Remove finished matches ONLY if no pending bets
-      this.cachedMatches = mergedMatches.filter(match => {
+      const keptMatches = mergedMatches.filter(match => {
           if (match.fixture.id === 999999) return false; // Remove debug temporarily, re-add later
 
           if (match.fixture.status.short !== 'FINISHED') return true;
@@ -231,113 +335,159 @@ class RealDataService {
           }
 
           if (hasPending) {
-              console.log(`[GC] Keeping finished match ${match.fixture.id} due to pending bets.`);
+              log.debug('Keeping finished match with pending bets', { fixtureId: match.fixture.id });
               return true;
           }
 
           return false; // Remove if finished and no bets
       });
 
-      // Step B: Debug Injection
+      // Step B: Debug Injection (the filter above always drops it)
       if (DEBUG_MODE && debugMatchCache) {
-          const idx = this.cachedMatches.findIndex(m => m.fixture.id === 999999);
-          if (idx >= 0) this.cachedMatches[idx] = debugMatchCache;
-          else this.cachedMatches.push(debugMatchCache);
+          keptMatches.push(debugMatchCache);
       }
 
-      console.log(`[API] Updated cache with ${this.cachedMatches.length} matches.`);
+      this.setCachedMatches(keptMatches);
+      this.liveFeedIds = liveIds;
+
+      log.info('Updated match cache', { matches: this.cachedMatches.length });
 
     } catch (error) {
-      console.error('[API ERROR] Failed to update matches:', error.response?.data || error.message);
+      log.error('Failed to merge matches', { error });
     }
   }
 
   getMatches() {
+    this.clocks.materializeAll();
     return this.cachedMatches;
   }
 
   startMonitoring(fixtureId) {
-    if (this.activeMonitors.has(fixtureId)) return;
+    const id = parseInt(fixtureId);
+    if (this.localMonitors.has(id)) return;
 
-    if (fixtureId == 999999 && DEBUG_MODE) {
-        console.log(`[MONITOR] Debug fixture ${fixtureId} is handled by global heartbeat.`);
+    if (id === 999999 && DEBUG_MODE) {
+        monitorLog.debug('Debug fixture is handled by the heartbeat', { fixtureId: id });
         return;
     }
 
-    console.log(`[MONITOR] Starting active monitoring for fixture ${fixtureId}`);
-
-    this.pollMatchDetails(fixtureId);
-
-    const intervalId = setInterval(() => {
-        this.pollMatchDetails(fixtureId);
-    }, 60000);
-
-    this.activeMonitors.set(fixtureId, intervalId);
+    monitorLog.info('Starting active monitoring', { fixtureId: id });
+    this.localMonitors.add(id);
+    this.reportMonitors();
   }
 
   stopMonitoring(fixtureId) {
+    const id = parseInt(fixtureId);
     if (this.io) {
-        const room = this.io.sockets.adapter.rooms.get(`game_${fixtureId}`);
+        const room = this.io.sockets.adapter.rooms.get(`game_${id}`);
         if (!room || room.size === 0) {
-            if (this.activeMonitors.has(fixtureId)) {
-                console.log(`[MONITOR] No listeners left. Stopping active monitoring for fixture ${fixtureId}`);
-                clearInterval(this.activeMonitors.get(fixtureId));
-                this.activeMonitors.delete(fixtureId);
+            if (this.localMonitors.has(id)) {
+                monitorLog.info('No listeners left, stopping active monitoring', { fixtureId: id });
+                this.localMonitors.delete(id);
+                this.reportMonitors();
             }
         } else {
-            console.log(`[MONITOR] Listeners still active for fixture ${fixtureId}. Monitoring continues.`);
+            monitorLog.debug('Listeners still active, monitoring continues', { fixtureId: id });
         }
     }
   }
 
-  async pollMatchDetails(fixtureId) {
-    const apiKey = process.env.API_SPORTS_KEY;
-    if (!apiKey) return;
+  // The leader polls on behalf of every shard
+  reportMonitors() {
+      shardRouter.send(shardRouter.leader, 'monitor:set', [...this.localMonitors]);
+  }
 
-    try {
-        const headers = {
-            'x-apisports-key': apiKey,
-            'x-apisports-host': 'v3.football.api-sports.io'
-        };
+  setShardMonitors(fixtureIds, shard) {
+      this.monitorsByShard.set(shard, fixtureIds);
 
-        const response = await axios.get(`https://v3.football.api-sports.io/fixtures?id=${fixtureId}`, { headers });
-        const apiMatch = response.data.response && response.data.response[0];
+      const monitors = new Set();
+      this.monitorsByShard.forEach(ids => ids.forEach(id => monitors.add(id)));
 
-        if (!apiMatch) return;
+      // Newly watched fixtures get fresh data right away
+      monitors.forEach(id => {
+          if (!this.activeMonitors.has(id) && !this.liveFeedIds.has(id)) this.pollMatchDetails(id);
+      });
+      this.activeMonitors = monitors;
+  }
 
-        const cachedIndex = this.cachedMatches.findIndex(m => m.fixture.id === parseInt(fixtureId));
-        const existing = cachedIndex !== -1 ? this.cachedMatches[cachedIndex] : null;
+  pollMonitoredFixtures() {
+      // Fixtures in the last live=all response already got this data for free.
+      // The rest are coalesced by the batcher into fixtures?ids=a-b-c requests.
+      this.activeMonitors.forEach(id => {
+          if (!this.liveFeedIds.has(id)) this.pollMatchDetails(id);
+      });
+  }
 
-        const adaptedMatch = this.adaptMatchData(apiMatch, existing);
+  async pollMatchDetails(fixtureId) {
+    if (!this.feed.isAvailable()) return;
 
-        if (this.io) {
-            this.io.to(`game_${fixtureId}`).emit('match_update', adaptedMatch);
+    try {
+        const apiMatch = await this.fixtureBatcher.getFixture(fixtureId);
 
-            if (this.flashService) {
-                this.flashService.handleMatchUpdate(adaptedMatch);
-            }
+        if (!apiMatch) return;
 
-            if (cachedIndex !== -1) {
-                const cached = this.cachedMatches[cachedIndex];
-                if (adaptedMatch.goals.home > cached.goals.home) {
-                    this.emitEvent(fixtureId, 'goal', 'Home', adaptedMatch.fixture.status.elapsed);
-                }
-                if (adaptedMatch.goals.away > cached.goals.away) {
-                    this.emitEvent(fixtureId, 'goal', 'Away', adaptedMatch.fixture.status.elapsed);
-                }
-                this.cachedMatches[cachedIndex] = adaptedMatch;
-            } else {
-                this.cachedMatches.push(adaptedMatch);
-            }
-        }
+        eventIngest.ingest([apiMatch]);
+        shardRouter.publish('feed:fixture', apiMatch);
 
     } catch (error) {
-        console.error(`[API ERROR] Polling fixture ${fixtureId}:`, error.response?.data || error.message);
+        log.error('Polling fixture failed', { fixtureId, error: error.response?.data || error.message });
     }
   }
 
-  emitEvent(fixtureId, type, team, minute) {
+  applyFixtureUpdate(apiMatch) {
+      const fixtureId = apiMatch.fixture.id;
+      const cached = this.matchIndex.has(fixtureId) ? this.getMatch(fixtureId) : null;
+      const owned = shardRouter.owns(fixtureId);
+
+      const adaptedMatch = this.adaptMatchData(apiMatch, cached);
+
       if (this.io) {
+          // Rooms, markets and goal events are driven by the owning shard only
+          if (owned) {
+              if (this.flashService && this.isEngaged(fixtureId)) {
+                  this.flashService.handleMatchUpdate(adaptedMatch);
+              }
+
+              const gameState = this.flashService && this.flashService.activeGames.get(fixtureId);
+              if (gameState && gameState.markets) {
+                  adaptedMatch.markets = gameState.markets;
+              }
+
+              if (subscriptions.hasViewers(fixtureId)) {
+                  broadcaster.emit(`game_${fixtureId}`, 'match_update', adaptedMatch);
+              }
+
+              if (cached) {
+                  this.emitGoalEvents(cached, adaptedMatch);
+              }
+          }
+
+          // The owner just sent (and synced the markets of) this state: the slot is not
+          // left dirty, or the next tick's broadcast would send it a second time
+          if (cached) {
+              // Update in place so the array slot and matchIndex stay in sync
+              Object.assign(cached, adaptedMatch);
+              this.clocks.upsert(cached, owned, false, !owned);
+          } else {
+              this.cachedMatches.push(adaptedMatch);
+              this.matchIndex.set(adaptedMatch.fixture.id, adaptedMatch);
+              this.clocks.upsert(adaptedMatch, owned, false, !owned);
+          }
+      }
+  }
+
+  emitGoalEvents(previous, current) {
+      const fixtureId = current.fixture.id;
+      if (current.goals.home > previous.goals.home) {
+          this.emitEvent(fixtureId, 'goal', 'Home', current.fixture.status.elapsed);
+      }
+      if (current.goals.away > previous.goals.away) {
+          this.emitEvent(fixtureId, 'goal', 'Away', current.fixture.status.elapsed);
+      }
+  }
+
+  emitEvent(fixtureId, type, team, minute) {
+      if (this.io && subscriptions.hasViewers(fixtureId)) {
           const event = {
               type: type,
               fixtureId: fixtureId,
@@ -385,12 +535,13 @@ class RealDataService {
               }
           },
           league: {
+              id: apiMatch.league?.id ?? null,
               name: apiMatch.league?.name || 'Unknown League',
               logo: apiMatch.league?.logo || ''
           },
           teams: {
-              home: { name: apiMatch.teams.home.name || 'Home', logo: apiMatch.teams.home.logo || '' },
-              away: { name: apiMatch.teams.away.name || 'Away', logo: apiMatch.teams.away.logo || '' }
+              home: { id: apiMatch.teams.home.id ?? null, name: apiMatch.teams.home.name || 'Home', logo: apiMatch.teams.home.logo || '' },
+              away: { id: apiMatch.teams.away.id ?? null, name: apiMatch.teams.away.name || 'Away', logo: apiMatch.teams.away.logo || '' }
           },
           goals: {
               home: apiMatch.goals.home ?? 0,
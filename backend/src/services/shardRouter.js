@@ -0,0 +1,168 @@
+const cluster = require('cluster');
+const log = require('./logger').child('SHARD');
+
+// Ownership and messaging between shards.
+//
+// Fixtures and users are spread over SHARD_COUNT shards with rendezvous hashing, so
+// every shard agrees on the owner without coordination and adding a shard only moves
+// the keys the new shard wins. A shard owns the tick, markets and bets of its fixtures
+// and the wallet of its users.
+//
+// Single process (npm start): one shard, every message is delivered in-process.
+// Cluster (npm run start:cluster): one shard per worker, messages are relayed by the
+// primary over IPC (see src/cluster.js).
+
+const LEADER = 0; // shard that talks to the upstream feed
+const REQUEST_TIMEOUT_MS = 5000;
+
+// FNV-1a, 32 bit, with the murmur3 finalizer so nearby keys spread over all bits
+const hash = (str) => {
+    let h = 0x811c9dc5;
+    for (let i = 0; i < str.length; i++) {
+        h ^= str.charCodeAt(i);
+        h = Math.imul(h, 0x01000193);
+    }
+    h ^= h >>> 16;
+    h = Math.imul(h, 0x85ebca6b);
+    h ^= h >>> 13;
+    h = Math.imul(h, 0xc2b2ae35);
+    h ^= h >>> 16;
+    return h >>> 0;
+};
+
+class ShardRouter {
+  constructor() {
+    this.clustered = cluster.isWorker && process.env.SHARD_INDEX !== undefined;
+    this.index = this.clustered ? parseInt(process.env.SHARD_INDEX) : 0;
+    this.count = this.clustered ? parseInt(process.env.SHARD_COUNT) : 1;
+    this.leader = LEADER;
+
+    this.handlers = new Map(); // type -> fn(payload, fromShard)
+    this.pending = new Map(); // requestId -> { resolve, reject, timer }
+    this.nextRequestId = 1;
+    this.owners = new Map(); // key -> shard (memoized hashing)
+
+    if (this.clustered) {
+        process.on('message', (msg) => {
+            if (msg && msg.bus === 'shard') this.receive(msg);
+        });
+    }
+  }
+
+  // --- Ownership ---
+
+  ownerOf(key) {
+    if (this.count === 1) return 0;
+    let owner = this.owners.get(key);
+    if (owner === undefined) {
+        let bestScore = -1;
+        for (let shard = 0; shard < this.count; shard++) {
+            const score = hash(`${key}:${shard}`);
+            if (score > bestScore) {
+                bestScore = score;
+                owner = shard;
+            }
+        }
+        this.owners.set(key, owner);
+    }
+    return owner;
+  }
+
+  ownerOfFixture(fixtureId) {
+    return this.ownerOf(`fixture:${parseInt(fixtureId)}`);
+  }
+
+  ownerOfUser(userId) {
+    return this.ownerOf(`user:${userId}`);
+  }
+
+  owns(fixtureId) {
+    return this.ownerOfFixture(fixtureId) === this.index;
+  }
+
+  ownsUser(userId) {
+    return this.ownerOfUser(userId) === this.index;
+  }
+
+  isLeader() {
+    return this.index === this.leader;
+  }
+
+  // --- Messaging ---
+
+  on(type, handler) {
+    this.handlers.set(type, handler);
+  }
+
+  // Fire-and-forget to one shard. Local delivery is synchronous.
+  send(shard, type, payload) {
+    if (shard === this.index) {
+        this.dispatch(type, payload, this.index);
+        return;
+    }
+    this.post({ to: shard, type, payload });
+  }
+
+  // To every shard (optionally skipping this one)
+  publish(type, payload, { includeSelf = true } = {}) {
+    if (this.count > 1) this.post({ to: 'others', type, payload });
+    if (includeSelf) this.dispatch(type, payload, this.index);
+  }
+
+  // Resolves with the owner handler's return value (awaited)
+  request(shard, type, payload) {
+    if (shard === this.index) {
+        return Promise.resolve().then(() => this.dispatch(type, payload, this.index));
+    }
+
+    const requestId = `${this.index}:${this.nextRequestId++}`;
+    return new Promise((resolve, reject) => {
+        const timer = setTimeout(() => {
+            this.pending.delete(requestId);
+            reject(new Error(`[SHARD] Request ${type} to shard ${shard} timed out`));
+        }, REQUEST_TIMEOUT_MS);
+
+        this.pending.set(requestId, { resolve, reject, timer });
+        this.post({ to: shard, type, payload, requestId });
+    });
+  }
+
+  post(msg) {
+    process.send({ bus: 'shard', from: this.index, ...msg });
+  }
+
+  dispatch(type, payload, from) {
+    const handler = this.handlers.get(type);
+    if (!handler) {
+        log.error('No handler for message', { type });
+        return undefined;
+    }
+    return handler(payload, from);
+  }
+
+  receive(msg) {
+    if (msg.type === '__reply') {
+        const pending = this.pending.get(msg.requestId);
+        if (!pending) return;
+        this.pending.delete(msg.requestId);
+        clearTimeout(pending.timer);
+        if (msg.error) pending.reject(new Error(msg.error));
+        else pending.resolve(msg.payload);
+        return;
+    }
+
+    if (!msg.requestId) {
+        this.dispatch(msg.type, msg.payload, msg.from);
+        return;
+    }
+
+    Promise.resolve()
+        .then(() => this.dispatch(msg.type, msg.payload, msg.from))
+        .then(
+            result => this.post({ to: msg.from, type: '__reply', requestId: msg.requestId, payload: result }),
+            error => this.post({ to: msg.from, type: '__reply', requestId: msg.requestId, error: error.message })
+        );
+  }
+}
+
+module.exports = new ShardRouter();
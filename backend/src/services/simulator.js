@@ -1,3 +1,5 @@
+const log = require('./logger').child('SIMULATOR');
+
 // Event types
 const EVENT_TYPES = [
   'match_start',
@@ -36,12 +38,12 @@ class Simulator {
 
   start(io, marketService) {
     this.io = io;
-    console.log('Simulator started...');
+    log.info('Simulator started');
 
     // Simulate events every 5 seconds
     this.intervalId = setInterval(() => {
       const event = generateEvent();
-      console.log('Simulating event:', event);
+      log.debug('Simulating event', { event });
       this.io.emit('sport_event', event);
       if (marketService) {
           marketService.processEvent(event);
@@ -53,7 +55,7 @@ class Simulator {
     if (this.intervalId) {
       clearInterval(this.intervalId);
       this.intervalId = null;
-      console.log('Simulator stopped.');
+      log.info('Simulator stopped');
     }
   }
 }
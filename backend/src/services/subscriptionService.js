@@ -0,0 +1,48 @@
+// Viewers per fixture, kept on the fixture's owning shard.
+// join_game / leave_game / disconnect on any shard arrive here as game:join / game:leave
+// with the socket id, so a socket that joins twice (or leaves without joining) can't
+// skew the count. RealDataService uses it to decide which fixtures get full market
+// evaluation and room emits, and when an idle fixture is torn down.
+
+class SubscriptionService {
+  constructor() {
+    this.viewers = new Map(); // fixtureId -> Set of socketIds
+  }
+
+  // Returns true for the fixture's first viewer
+  join(fixtureId, socketId) {
+    const id = parseInt(fixtureId);
+    let sockets = this.viewers.get(id);
+    if (!sockets) {
+        sockets = new Set();
+        this.viewers.set(id, sockets);
+    }
+    sockets.add(socketId);
+    return sockets.size === 1;
+  }
+
+  // Returns true when the fixture's last viewer left
+  leave(fixtureId, socketId) {
+    const id = parseInt(fixtureId);
+    const sockets = this.viewers.get(id);
+    if (!sockets || !sockets.delete(socketId)) return false;
+    if (sockets.size > 0) return false;
+    this.viewers.delete(id);
+    return true;
+  }
+
+  hasViewers(fixtureId) {
+    return this.viewers.has(fixtureId);
+  }
+
+  viewerCount(fixtureId) {
+    const sockets = this.viewers.get(fixtureId);
+    return sockets ? sockets.size : 0;
+  }
+
+  get watchedCount() {
+    return this.viewers.size;
+  }
+}
+
+module.exports = new SubscriptionService();
@@ -0,0 +1,131 @@
+const { performance } = require('perf_hooks');
+const log = require('./logger').child('TICK');
+const metrics = require('./metrics');
+
+// Every tick runs the phases in this exact order
+const PHASES = ['clock', 'markets', 'settlement', 'broadcast'];
+
+class TickScheduler {
+  constructor() {
+    this.intervalMs = 1000;
+    this.tasks = new Map(); // phase -> [{ name, fn, histogram }]
+    this.timer = null;
+    this.nextTickAt = 0;
+    this.tickCount = 0;
+    this.overruns = 0;
+    this.skipped = 0; // boundaries passed during overruns, never run
+    this.stats = {}; // phase -> { lastMs, maxMs, totalMs }
+    this.phaseHistograms = {}; // phase -> metrics child
+
+    PHASES.forEach(phase => {
+        this.tasks.set(phase, []);
+        this.stats[phase] = { lastMs: 0, maxMs: 0, totalMs: 0 };
+        this.phaseHistograms[phase] = metrics.tickPhaseDuration.labels(phase);
+    });
+    this.stats.total = { lastMs: 0, maxMs: 0, totalMs: 0 };
+  }
+
+  register(phase, name, fn) {
+    if (!this.tasks.has(phase)) {
+        throw new Error(`[TICK] Unknown phase '${phase}'. Expected one of: ${PHASES.join(', ')}`);
+    }
+    this.tasks.get(phase).push({ name, fn, histogram: metrics.tickTaskDuration.labels(name) });
+  }
+
+  start(intervalMs = 1000) {
+    if (this.timer) return;
+    this.intervalMs = intervalMs;
+    this.nextTickAt = Date.now() + intervalMs;
+    this.scheduleNext();
+    log.info('Scheduler started', { intervalMs, phases: PHASES.join(' -> ') });
+  }
+
+  stop() {
+    if (this.timer) {
+        clearTimeout(this.timer);
+        this.timer = null;
+    }
+  }
+
+  scheduleNext() {
+    // Aim at fixed boundaries so slow ticks don't accumulate drift. Boundaries an overrun
+    // went past are skipped: running them back to back would only stall the loop further.
+    const now = Date.now();
+    if (this.nextTickAt <= now) {
+        const missed = Math.floor((now - this.nextTickAt) / this.intervalMs) + 1;
+        const driftMs = now - this.nextTickAt;
+        this.nextTickAt += missed * this.intervalMs;
+        this.skipped += missed;
+        metrics.ticksSkipped.inc(missed);
+        log.warn('Skipped ticks after overrun', { tick: this.tickCount, missed, driftMs });
+    }
+
+    const delay = this.nextTickAt - now;
+    this.timer = setTimeout(() => {
+        this.nextTickAt += this.intervalMs;
+        this.runTick();
+        this.scheduleNext();
+    }, delay);
+  }
+
+  runTick() {
+    const tickStart = performance.now();
+
+    PHASES.forEach(phase => {
+        const phaseStart = performance.now();
+
+        this.tasks.get(phase).forEach(task => {
+            const taskStart = performance.now();
+            try {
+                task.fn();
+            } catch (error) {
+                log.error('Task failed', { task: task.name, phase, error });
+            }
+            task.histogram.observe((performance.now() - taskStart) / 1000);
+        });
+
+        const phaseMs = performance.now() - phaseStart;
+        this.record(this.stats[phase], phaseMs);
+        this.phaseHistograms[phase].observe(phaseMs / 1000);
+    });
+
+    const totalMs = performance.now() - tickStart;
+    this.record(this.stats.total, totalMs);
+    metrics.tickDuration.observe(totalMs / 1000);
+    this.tickCount++;
+
+    if (totalMs > this.intervalMs) {
+        this.overruns++;
+        metrics.tickOverruns.inc();
+        log.warn('Tick overran', { tick: this.tickCount, ms: parseFloat(totalMs.toFixed(1)), intervalMs: this.intervalMs });
+    }
+  }
+
+  record(stat, ms) {
+    stat.lastMs = ms;
+    stat.totalMs += ms;
+    if (ms > stat.maxMs) stat.maxMs = ms;
+  }
+
+  getStats() {
+    const phases = {};
+    [...PHASES, 'total'].forEach(phase => {
+        const stat = this.stats[phase];
+        phases[phase] = {
+            lastMs: stat.lastMs,
+            maxMs: stat.maxMs,
+            avgMs: this.tickCount > 0 ? stat.totalMs / this.tickCount : 0
+        };
+    });
+
+    return {
+        intervalMs: this.intervalMs,
+        ticks: this.tickCount,
+        overruns: this.overruns,
+        skipped: this.skipped,
+        phases
+    };
+  }
+}
+
+module.exports = new TickScheduler();
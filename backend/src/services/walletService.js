@@ -0,0 +1,201 @@
+const shardRouter = require('./shardRouter');
+const log = require('./logger').child('WALLET');
+
+// Unconfirmed debits are checked against the fixture shard again after this long when it can't answer
+const RECONCILE_RETRY_MS = 5000;
+
+// Balances of the users this shard owns (shardRouter.ownerOfUser). Every change is
+// journaled in this shard's ledger before it is acknowledged.
+//
+// Bets on fixtures of this shard reserve()/release()/applyPayout() in memory and the caller
+// journals the money together with the bet (bet_placed / bet_settled). Bets on other shards
+// go through debitBatch()/credit(), which journal here on their own; the fixture shard then
+// confirms the bets it opened (confirmDebits) so reconcile() can refund the ones it never did.
+
+class WalletService {
+  constructor() {
+    this.users = {}; // userId -> { balance }
+    this.ledger = null;
+    this.creditsInFlight = new Set(); // bet ids of credits not durable yet (durable ones are in ledger.state.credited)
+
+    shardRouter.on('wallet:debitBatch', (debits) => this.applyDebitBatch(debits));
+    shardRouter.on('wallet:credit', ({ userId, amount, betIds }) => this.applyCredit(userId, amount, betIds));
+    shardRouter.on('wallet:confirmDebits', (betIds) => this.confirmDebits(betIds));
+    shardRouter.on('wallet:refund', (betIds) => this.applyRefund(betIds));
+  }
+
+  setLedger(ledger) {
+    this.ledger = ledger;
+  }
+
+  load(users) {
+    this.users = users;
+  }
+
+  // Creates the account on its owning shard if it does not exist yet
+  ensureUser(userId, balance) {
+    if (!shardRouter.ownsUser(userId) || this.users[userId]) return;
+    this.users[userId] = { balance };
+    this.ledger.append({ type: 'user_created', userId, balance });
+  }
+
+  // debits: [{ userId, amount, betId, fixtureId }] of users owned by `shard`, applied in array order.
+  // Resolves with one { ok, balance } / { ok: false, reason, transient } per debit
+  // (transient: the ledger write failed, nothing was debited).
+  debitBatch(shard, debits) {
+    return shardRouter.request(shard, 'wallet:debitBatch', debits);
+  }
+
+  // Resolves with the user's balance after the credit
+  credit(userId, amount, betIds) {
+    return shardRouter.request(shardRouter.ownerOfUser(userId), 'wallet:credit', { userId, amount, betIds });
+  }
+
+  // The fixture shard journaled the bets of these debits (fire-and-forget)
+  confirm(shard, betIds) {
+    shardRouter.send(shard, 'wallet:confirmDebits', betIds);
+  }
+
+  // Gives back the stakes of unconfirmed debits among betIds (bets the fixture shard failed to open);
+  // ids without one (never debited, or already confirmed or refunded) are skipped
+  refund(shard, betIds) {
+    return shardRouter.request(shard, 'wallet:refund', betIds);
+  }
+
+  // Reserves synchronously, in order, so concurrent bets cannot overdraw. Nothing is journaled:
+  // the caller writes the stake into its own record or release()s it.
+  reserve(debits) {
+    return debits.map(({ userId, amount }) => {
+        const user = this.users[userId];
+        if (!user) return { ok: false, reason: "Usuário não encontrado." };
+        if (user.balance < amount) {
+            log.warn('Rejected: insufficient balance', { userId, balance: user.balance, amount });
+            return { ok: false, reason: "Saldo insuficiente." };
+        }
+
+        user.balance -= amount;
+        return { ok: true, balance: user.balance };
+    });
+  }
+
+  release(userId, amount) {
+    if (this.users[userId]) this.users[userId].balance += amount;
+  }
+
+  // A payout the caller has already journaled (bet_settled); returns the new balance
+  applyPayout(userId, amount) {
+    const user = this.users[userId];
+    if (!user) return 0;
+    user.balance += amount;
+    return user.balance;
+  }
+
+  async applyDebitBatch(debits) {
+    const results = this.reserve(debits);
+    const records = [];
+    debits.forEach(({ userId, amount, betId, fixtureId }, i) => {
+        if (results[i].ok) records.push({ type: 'debit', userId, amount, betId, fixtureId });
+    });
+
+    if (records.length === 0) return results;
+
+    // One group commit for the whole batch
+    try {
+        await this.ledger.appendBatch(records);
+    } catch (error) {
+        log.error('Ledger write failed', { debits: records.length, error });
+        records.forEach(({ userId, amount }) => this.release(userId, amount));
+        return debits.map(() => ({ ok: false, reason: "Erro ao registrar aposta.", transient: true }));
+    }
+    return results;
+  }
+
+  // The fixture shard has journaled these bets: their debits no longer need reconciling.
+  // Not awaited; if the record is lost, reconcile() asks the fixture shard again.
+  confirmDebits(betIds) {
+    const debits = this.ledger.state.debits;
+    const unconfirmed = betIds.filter(betId => debits[betId]);
+    if (unconfirmed.length === 0) return;
+    this.ledger.append({ type: 'debit_confirmed', betIds: unconfirmed })
+        .catch(error => log.error('Debit confirmation not journaled', { bets: unconfirmed.length, error }));
+  }
+
+  async applyCredit(userId, amount, betIds) {
+    const user = this.users[userId];
+    if (!user) return 0;
+
+    // A retried or re-sent credit may already have been applied: credits are keyed by bet id
+    const ids = betIds || [];
+    const credited = this.ledger.state.credited;
+    if (ids.length > 0 && ids.every(betId => credited[betId] || this.creditsInFlight.has(betId))) {
+        log.warn('Duplicate credit ignored', { userId, amount, betIds });
+        return user.balance;
+    }
+
+    // A losing settlement has nothing to pay, but it still closes unconfirmed debits of its bets
+    const debits = this.ledger.state.debits;
+    if (!(amount > 0) && !ids.some(betId => debits[betId])) return user.balance;
+
+    const credit = amount > 0 ? amount : 0;
+    user.balance += credit;
+    ids.forEach(betId => this.creditsInFlight.add(betId));
+    try {
+        await this.ledger.append({ type: 'credit', userId, amount: credit, betIds });
+    } catch (error) {
+        // Not durable: undo it so the caller can retry
+        log.error('Ledger write failed', { userId, amount, error });
+        user.balance -= credit;
+        throw error;
+    } finally {
+        ids.forEach(betId => this.creditsInFlight.delete(betId));
+    }
+    return user.balance;
+  }
+
+  async applyRefund(betIds) {
+    let refunded = 0;
+    for (const betId of betIds) {
+        const debit = this.ledger.state.debits[betId];
+        if (!debit) continue;
+        await this.applyCredit(debit.userId, debit.amount, [betId]);
+        refunded++;
+    }
+    return refunded;
+  }
+
+  // --- Recovery ---
+
+  // Debits journaled for bets on another shard that never confirmed them: the bets it still has
+  // (open, or closed with the credit under way) are confirmed, the ones it never opened are refunded
+  reconcile() {
+    const byShard = new Map();
+    Object.entries(this.ledger.state.debits).forEach(([betId, debit]) => {
+        const shard = shardRouter.ownerOfFixture(debit.fixtureId);
+        if (!byShard.has(shard)) byShard.set(shard, []);
+        byShard.get(shard).push(betId);
+    });
+
+    byShard.forEach((betIds, shard) => this.reconcileWith(shard, betIds));
+  }
+
+  reconcileWith(shard, betIds) {
+    if (betIds.length === 0) return;
+    shardRouter.request(shard, 'bet:status', betIds)
+        .then(statuses => {
+            if (!statuses) throw new Error(`[WALLET] Shard ${shard} cannot report bet status yet`);
+
+            const known = betIds.filter((betId, i) => statuses[i] !== 'unknown');
+            const orphans = betIds.filter((betId, i) => statuses[i] === 'unknown');
+            this.confirmDebits(known);
+            this.applyRefund(orphans)
+                .catch(error => log.error('Refund failed', { bets: orphans.length, error })); // retried on the next restart
+            log.info('Reconciled debits', { shard, confirmed: known.length, refunded: orphans.length });
+        })
+        .catch(error => {
+            log.warn('Debit reconciliation deferred', { shard, bets: betIds.length, error });
+            setTimeout(() => this.reconcileWith(shard, betIds.filter(betId => this.ledger.state.debits[betId])), RECONCILE_RETRY_MS);
+        });
+  }
+}
+
+module.exports = new WalletService();
@@ -0,0 +1,141 @@
+const msgpack = require('./msgpack');
+const ClockStore = require('./clockStore');
+const PricingEngine = require('./pricingEngine');
+
+// Compact binary layouts for the hot room streams, sent to sockets that negotiated CODEC.
+// Every message is a MessagePack array in fixed field order: no key strings, statuses as
+// indexes into the tables below (a value missing from a table goes out as the string),
+// odds as integer cents, progress in tenths of a percent, absent optional fields as nil.
+// frontend/src/wire.js decodes the same layouts; bump CODEC whenever one of them changes.
+//
+//   match         [id, date, status, raw, elapsed, second, extra, home, away, serverTimestamp,
+//                  [leagueId, leagueName, leagueLogo], [homeId, homeName, homeLogo], [awayId, awayName, awayLogo], markets]
+//   markets       [[group, [market, ...]], ...]
+//   market        [id, type, title, status, progress, windowStart, windowEnd, odds]
+//   odds          [kind (PricingEngine.KIND), cents, cents(, cents)]   yes/no | home/draw/away | over/under
+//
+//   match_update  match
+//   flash_patch   [fixtureId, seq, timer, markets, [[id, status, progress, odds], ...]]
+//   flash_update  [timer, markets]
+//   lobby_patch   [serverTimestamp, [match (markets nil), ...], [[id, mask, ...fields], ...], [removedId, ...]]
+//                 changed fields in mask bit order: short, raw, elapsed, second, extra, home, away
+
+const CODEC = 'msgpack/1';
+
+const MATCH_STATUS = ClockStore.STATUS;
+const MARKET_STATUS = ['OPEN', 'SUSPENDED', 'CLOSED', 'WIN', 'LOSS'];
+const ODDS_KEYS = [['yes', 'no'], ['home', 'draw', 'away'], ['over', 'under']]; // indexed by PricingEngine.KIND
+const LOBBY_FIELDS = ['short', 'raw', 'elapsed', 'second', 'extra', 'home', 'away'];
+
+const code = (table, value) => {
+  const index = table.indexOf(value);
+  return index >= 0 ? index : value;
+};
+const optional = (value) => (value === undefined ? null : value);
+
+function packOdds(odds) {
+  if (!odds) return null;
+  const kind = PricingEngine.kindOf({ odds });
+  if (kind < 0) return null;
+
+  const keys = ODDS_KEYS[kind];
+  const packed = [kind];
+  for (let i = 0; i < keys.length; i++) packed.push(Math.round(odds[keys[i]] * 100));
+  return packed;
+}
+
+function packProgress(progress) {
+  return typeof progress === 'number' ? Math.round(progress * 10) : null;
+}
+
+function packMarket(market) {
+  return [
+      market.id,
+      market.type,
+      market.title,
+      code(MARKET_STATUS, market.status),
+      packProgress(market.progress),
+      optional(market.windowStart),
+      optional(market.windowEnd),
+      packOdds(market.odds)
+  ];
+}
+
+function packMarkets(markets) {
+  if (!markets) return null;
+  return Object.keys(markets).map(group => [group, markets[group].map(packMarket)]);
+}
+
+function packTeam(team) {
+  return [optional(team.id), team.name, team.logo];
+}
+
+function packMatch(match, withMarkets) {
+  const status = match.fixture.status;
+  return [
+      match.fixture.id,
+      match.fixture.date,
+      code(MATCH_STATUS, status.short),
+      optional(status.raw),
+      optional(status.elapsed),
+      optional(status.second),
+      optional(status.extra),
+      match.goals.home,
+      match.goals.away,
+      optional(match.serverTimestamp),
+      [optional(match.league.id), match.league.name, match.league.logo],
+      packTeam(match.teams.home),
+      packTeam(match.teams.away),
+      withMarkets ? packMarkets(match.markets) : null
+  ];
+}
+
+function packChange(change) {
+  return [
+      change.id,
+      change.status === undefined ? null : code(MARKET_STATUS, change.status),
+      packProgress(change.progress),
+      change.odds ? packOdds(change.odds) : null
+  ];
+}
+
+function packLobbyRow(row) {
+  const packed = [row.id, 0];
+  let mask = 0;
+  for (let bit = 0; bit < LOBBY_FIELDS.length; bit++) {
+      const field = LOBBY_FIELDS[bit];
+      if (!(field in row)) continue;
+      mask |= 1 << bit;
+      packed.push(field === 'short' ? code(MATCH_STATUS, row.short) : row[field]);
+  }
+  packed[1] = mask;
+  return packed;
+}
+
+const LAYOUTS = {
+  match_update: (match) => packMatch(match, true),
+  flash_patch: (patch) => [
+      patch.fixtureId,
+      patch.seq,
+      optional(patch.timer),
+      packMarkets(patch.markets),
+      patch.changes ? patch.changes.map(packChange) : null
+  ],
+  flash_update: (update) => [update.timer, packMarkets(update.markets)],
+  lobby_patch: (patch) => [
+      patch.serverTimestamp,
+      patch.added.map(match => packMatch(match, false)),
+      patch.changed.map(packLobbyRow),
+      patch.removed
+  ]
+};
+
+function hasLayout(event) {
+  return Object.prototype.hasOwnProperty.call(LAYOUTS, event);
+}
+
+function encode(event, payload) {
+  return msgpack.encode(LAYOUTS[event](payload));
+}
+
+module.exports = { CODEC, MATCH_STATUS, MARKET_STATUS, hasLayout, encode };
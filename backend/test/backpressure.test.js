@@ -0,0 +1,115 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+process.env.LOG_LEVEL = 'error';
+const Backpressure = require('../src/services/backpressure').constructor;
+
+const KB = 1024;
+
+// A socket whose engine.io write buffer holds `bytes` (see Backpressure.bufferedBytes)
+function socket(id, bytes = 0) {
+  return {
+      id,
+      disconnected: false,
+      conn: { writeBuffer: [{ data: 'x'.repeat(bytes) }], transport: { socket: { bufferedAmount: 0 } } },
+      setBuffered(n) { this.conn.writeBuffer = [{ data: 'x'.repeat(n) }]; },
+      client: {}
+  };
+}
+
+// A Backpressure over a namespace of the given sockets, with an adapter instance that records
+// which socket each broadcast was written to; disconnect() leaves the namespace as in socket.io
+function setup(list) {
+  const sockets = new Map(list.map(s => [s.id, s]));
+  const delivered = [];
+  list.forEach(s => {
+      s.client.writeToEngine = () => delivered.push(s.id);
+      s.disconnect = () => {
+          s.disconnected = true;
+          sockets.delete(s.id);
+      };
+  });
+
+  const backpressure = new Backpressure();
+  backpressure.setIo({ of: () => ({ sockets }) });
+
+  const nsp = { name: '/', sockets, server: { encoder: { encode: (packet) => [JSON.stringify(packet.data)] } } };
+  const Adapter = backpressure.createAdapter();
+  const adapter = new Adapter(nsp);
+
+  const broadcast = (event, rooms = []) => {
+      delivered.length = 0;
+      adapter.broadcast({ type: 2, data: [event, {}] }, { rooms: new Set(rooms), except: new Set() });
+      return [...delivered].sort();
+  };
+  return { backpressure, adapter, broadcast };
+}
+
+test('a congested socket misses superseded frames but keeps getting the rest', () => {
+  const slow = socket('slow', 300 * KB);
+  const fast = socket('fast');
+  const { backpressure, adapter, broadcast } = setup([slow, fast]);
+  adapter.addAll('slow', new Set(['slow', 'game_1']));
+  adapter.addAll('fast', new Set(['fast', 'game_1']));
+
+  backpressure.sweep(0);
+  assert.equal(backpressure.congestedCount, 1);
+
+  assert.deepEqual(broadcast('match_update', ['game_1']), ['fast']);
+  assert.deepEqual(broadcast('bets_resolved', ['game_1']), ['fast', 'slow']);
+  assert.deepEqual(broadcast('flash_patch'), ['fast']);
+  assert.deepEqual([...backpressure.congested.get('slow').missed.keys()], ['match_update|game_1', 'flash_patch|null']);
+});
+
+test('a drained socket is resynced once per missed stream, binary rooms as their plain room', () => {
+  const slow = socket('slow', 300 * KB);
+  const { backpressure, adapter, broadcast } = setup([slow]);
+  adapter.addAll('slow', new Set(['slow', 'game_1#bin', 'lobby']));
+
+  const resynced = [];
+  backpressure.setResync('match_update', (s, room) => resynced.push(['match_update', s.id, room]));
+  backpressure.setResync('lobby_patch', (s, room) => resynced.push(['lobby_patch', s.id, room]));
+
+  backpressure.sweep(0);
+  broadcast('match_update', ['game_1#bin']);
+  broadcast('match_update', ['game_1#bin']);
+  broadcast('lobby_patch', ['lobby']);
+
+  slow.setBuffered(128 * KB); // below the high mark, not yet drained
+  backpressure.sweep(1000);
+  assert.deepEqual(resynced, []);
+
+  slow.setBuffered(10 * KB);
+  backpressure.sweep(2000);
+  assert.deepEqual(resynced, [['match_update', 'slow', 'game_1'], ['lobby_patch', 'slow', 'lobby']]);
+  assert.equal(backpressure.congestedCount, 0);
+  assert.deepEqual(broadcast('match_update', ['game_1#bin']), ['slow']);
+});
+
+test('a socket that keeps growing or never drains is disconnected', () => {
+  const growing = socket('growing', 300 * KB);
+  const stuck = socket('stuck', 300 * KB);
+  const { backpressure } = setup([growing, stuck]);
+
+  backpressure.sweep(0);
+  growing.setBuffered(5 * 1024 * KB);
+  backpressure.sweep(1000);
+  assert.equal(growing.disconnected, true);
+  assert.equal(stuck.disconnected, false);
+
+  backpressure.sweep(31000);
+  assert.equal(stuck.disconnected, true);
+  assert.equal(backpressure.congestedCount, 0);
+});
+
+test('defer holds back a direct superseded frame to a congested socket only', () => {
+  const slow = socket('slow', 300 * KB);
+  const fast = socket('fast');
+  const { backpressure } = setup([slow, fast]);
+  backpressure.sweep(0);
+
+  assert.equal(backpressure.defer(fast, 'match_update', 'game_5'), false);
+  assert.equal(backpressure.defer(slow, 'bet_accepted', 'game_5'), false);
+  assert.equal(backpressure.defer(slow, 'match_update', 'game_5'), true);
+  assert.deepEqual([...backpressure.congested.get('slow').missed.values()], [['match_update', 'game_5']]);
+});
@@ -0,0 +1,125 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+process.env.LOG_LEVEL = 'error';
+const Ledger = require('../src/services/ledger').constructor;
+const wallet = require('../src/services/walletService');
+const BetService = require('../src/services/betService').constructor;
+const BetIntake = require('../src/services/betIntake').constructor;
+
+const MATCH = { fixture: { id: 1, status: { short: 'IN_PLAY', elapsed: 30 } }, goals: { home: 0, away: 0 } };
+
+// A BetIntake on a fresh ledger with one live match and u1 holding `balance`; emits are recorded
+function setup(balance = 100) {
+  const ledger = new Ledger();
+  ledger.dir = fs.mkdtempSync(path.join(os.tmpdir(), 'intake-test-'));
+  wallet.setLedger(ledger);
+  wallet.load(ledger.recover().users);
+  wallet.ensureUser('u1', balance);
+
+  const emitted = [];
+  const io = { to: (socketId) => ({ emit: (event, payload) => emitted.push({ socketId, event, payload }) }) };
+  const bets = new BetService();
+  bets.setWallet(wallet);
+  bets.setLedger(ledger);
+
+  const intake = new BetIntake();
+  intake.setIo(io);
+  intake.setMatchService({ getMatch: (id) => (parseInt(id) === 1 ? MATCH : null) });
+  intake.setBetService(bets);
+  intake.setWallet(wallet);
+  intake.setLedger(ledger);
+  return { intake, ledger, bets, emitted };
+}
+
+const bet = (fields = {}) => ({ matchId: 1, marketId: 'flash_1_goal', type: 'flash_goal', option: 'YES', windowEnd: 35, amount: 10, odd: 3, ...fields });
+
+// Resolves once the queue is empty and no batch is committing
+const drained = (intake) => new Promise(resolve => {
+  const check = () => (intake.queue.length === 0 && intake.busyUsers.size === 0 && !intake.flushTimer
+      ? resolve()
+      : setTimeout(check, 2));
+  check();
+});
+
+const answers = (emitted) => emitted.map(({ socketId, event, payload }) => [socketId, event, payload.idempotencyKey]);
+
+test('a retry of a bet in flight is answered with the original, and debited once', async () => {
+  const { intake, bets, emitted } = setup();
+  intake.submit(bet({ idempotencyKey: 'k1' }), 's1', 'u1');
+  intake.submit(bet({ idempotencyKey: 'k1' }), 's2', 'u1'); // reconnected socket
+  await drained(intake);
+
+  assert.deepEqual(answers(emitted), [['s1', 'bet_accepted', 'k1'], ['s2', 'bet_accepted', 'k1']]);
+  assert.equal(wallet.users.u1.balance, 90);
+  assert.equal(bets.pendingByMatch.get(1).length, 1);
+
+  // After the answer: replayed from the cache
+  intake.submit(bet({ idempotencyKey: 'k1' }), 's3', 'u1');
+  assert.deepEqual(emitted[2], { socketId: 's3', event: 'bet_accepted', payload: emitted[0].payload });
+  assert.equal(wallet.users.u1.balance, 90);
+});
+
+test('keys are per user and expire after their TTL', async () => {
+  const { intake, emitted } = setup();
+  wallet.ensureUser('u2', 100);
+  intake.submit(bet({ idempotencyKey: 'k1' }), 's1', 'u1');
+  intake.submit(bet({ idempotencyKey: 'k1' }), 's2', 'u2');
+  await drained(intake);
+  assert.equal(wallet.users.u1.balance, 90);
+  assert.equal(wallet.users.u2.balance, 90);
+
+  intake.idempotency.get('u1:k1').expiresAt = Date.now() - 1;
+  intake.submit(bet({ idempotencyKey: 'k1' }), 's1', 'u1');
+  await drained(intake);
+  assert.equal(wallet.users.u1.balance, 80);
+  assert.equal(emitted.filter(e => e.event === 'bet_accepted').length, 3);
+});
+
+test('a rejection on the bet itself is replayed, a transient one is processed again', async () => {
+  const { intake, ledger, emitted } = setup(5);
+  intake.submit(bet({ idempotencyKey: 'poor' }), 's1', 'u1');
+  await drained(intake);
+  wallet.users.u1.balance = 100;
+  intake.submit(bet({ idempotencyKey: 'poor' }), 's1', 'u1');
+  assert.deepEqual(emitted.map(e => e.payload.reason), ['Saldo insuficiente.', 'Saldo insuficiente.']);
+
+  const fd = ledger.fd;
+  ledger.fd = 2 ** 30; // the group commit fails
+  intake.submit(bet({ idempotencyKey: 'io' }), 's1', 'u1');
+  await drained(intake);
+  assert.equal(emitted[2].payload.reason, 'Erro ao registrar aposta.');
+  assert.equal(wallet.users.u1.balance, 100); // stake released
+
+  ledger.fd = fd;
+  intake.submit(bet({ idempotencyKey: 'io' }), 's1', 'u1');
+  await drained(intake);
+  assert.equal(emitted[3].event, 'bet_accepted');
+  assert.equal(wallet.users.u1.balance, 90);
+});
+
+test("a user's bets wait while an earlier batch of theirs is committing", async () => {
+  const { intake, emitted } = setup(15);
+  wallet.ensureUser('u2', 100);
+  intake.submit(bet({ idempotencyKey: 'first' }), 's1', 'u1');
+  clearTimeout(intake.flushTimer);
+  intake.flushTimer = null;
+  intake.flush(); // 'first' is committing
+
+  intake.submit(bet({ idempotencyKey: 'second' }), 's1', 'u1');
+  intake.submit(bet({ idempotencyKey: 'other' }), 's2', 'u2');
+  clearTimeout(intake.flushTimer);
+  intake.flushTimer = null;
+  intake.flush();
+  assert.deepEqual(intake.queue.map(entry => entry.data.idempotencyKey), ['second']);
+
+  await drained(intake);
+  assert.deepEqual(answers(emitted).map(([, event, key]) => [key, event]), [
+      ['first', 'bet_accepted'],
+      ['other', 'bet_accepted'],
+      ['second', 'bet_rejected'] // 15 - 10 left 5: applied after 'first', never before it
+  ]);
+});
@@ -0,0 +1,191 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+process.env.LOG_LEVEL = 'error';
+const Ledger = require('../src/services/ledger').constructor;
+const wallet = require('../src/services/walletService');
+const BetService = require('../src/services/betService').constructor;
+
+// A BetService on a fresh ledger with one user holding 100; emits are recorded per socket
+function setup() {
+  const ledger = new Ledger();
+  ledger.dir = fs.mkdtempSync(path.join(os.tmpdir(), 'bets-test-'));
+  wallet.setLedger(ledger);
+  wallet.load(ledger.recover().users);
+  wallet.ensureUser('u1', 100);
+
+  const emitted = [];
+  const service = new BetService();
+  service.setIo({ to: (socketId) => ({ emit: (event, payload) => emitted.push({ socketId, event, payload }) }) });
+  service.setWallet(wallet);
+  service.setLedger(ledger);
+  return { service, ledger, emitted };
+}
+
+const match = (id, elapsed, home, away, short = 'IN_PLAY') => ({ fixture: { id, status: { elapsed, short } }, goals: { home, away } });
+
+function place(service, fields = {}) {
+  return service.placeBet({
+      userId: 'u1',
+      matchId: 1,
+      marketId: 'flash_1_goal',
+      type: 'flash_goal',
+      option: 'YES',
+      windowEnd: 10,
+      currentScore: '0-0',
+      amount: 10,
+      odd: 3,
+      ...fields
+  }, 's1');
+}
+
+// Settlement journals and pays asynchronously: wait until the ledger has nothing left to commit
+const settled = async () => {
+  do {
+      await new Promise(resolve => setTimeout(resolve, 5));
+  } while (wallet.ledger.flushing || wallet.ledger.buffer.length > 0);
+};
+
+const results = (emitted) => emitted
+    .filter(e => e.event === 'bets_resolved')
+    .flatMap(e => e.payload.results.map(({ bet, payout }) => [bet.id, bet.status, payout]));
+
+test('a goal settles goal-market bets before their window ends', async () => {
+  const { service, emitted } = setup();
+  const yes = place(service, { betId: 'yes' });
+  const no = place(service, { betId: 'no', option: 'NO' });
+  const result = place(service, { betId: '1x2', type: 'live_1x2', marketId: '1x2', option: 'Home' });
+
+  service.resolveBets([match(1, 3, 0, 0)]);
+  service.resolveBets([match(1, 4, 1, 0)]);
+  await settled();
+
+  assert.deepEqual(results(emitted), [['yes', 'WIN', 30], ['no', 'LOSS', 0]]);
+  assert.equal(yes.status, 'WIN');
+  assert.equal(no.status, 'LOSS');
+  assert.equal(result.status, 'PENDING');
+  assert.equal(service.hasPendingBetsForMatch(1), true);
+});
+
+test('bets placed after the goal wait for their window', async () => {
+  const { service, emitted } = setup();
+  service.resolveBets([match(1, 3, 1, 0)]);
+  place(service, { betId: 'late', currentScore: '1-0' });
+
+  service.resolveBets([match(1, 4, 1, 0)]);
+  await settled();
+  assert.deepEqual(results(emitted), []);
+
+  service.resolveBets([match(1, 11, 1, 0)]);
+  await settled();
+  assert.deepEqual(results(emitted), [['late', 'LOSS', 0]]);
+});
+
+test('a goal cancelled after the bet was placed does not decide it', async () => {
+  const { service, emitted, ledger } = setup();
+  service.resolveBets([match(1, 3, 1, 0)]);
+  place(service, { betId: 'yes', currentScore: '1-0' });
+  place(service, { betId: 'no', option: 'NO', currentScore: '1-0' });
+
+  // VAR takes the goal back: the score drops to 0-0
+  service.resolveBets([match(1, 4, 0, 0)]);
+  await settled();
+  assert.deepEqual(results(emitted), []);
+  assert.equal(service.hasPendingBetsForMatch(1), true);
+
+  service.resolveBets([match(1, 11, 0, 0)]);
+  await settled();
+  assert.deepEqual(results(emitted), [['yes', 'LOSS', 0], ['no', 'WIN', 30]]);
+  assert.equal(ledger.state.users.u1.balance, 130);
+});
+
+test('a cancelled goal followed by a goal of the other side decides the bet', async () => {
+  const { service, emitted } = setup();
+  place(service, { betId: 'yes', currentScore: '1-0' });
+
+  service.resolveBets([match(1, 4, 0, 0)]);
+  service.resolveBets([match(1, 5, 0, 1)]);
+  await settled();
+  assert.deepEqual(results(emitted), [['yes', 'WIN', 30]]);
+});
+
+test('only the bets whose window has ended are settled, in window order', async () => {
+  const { service, emitted } = setup();
+  place(service, { betId: 'b15', windowEnd: 15 });
+  place(service, { betId: 'b5', windowEnd: 5 });
+  place(service, { betId: 'b10', windowEnd: 10 });
+  place(service, { betId: 'other', matchId: 2, windowEnd: 5 });
+
+  service.resolveBets([match(1, 11, 0, 0)]);
+  await settled();
+  assert.deepEqual(results(emitted).map(([id]) => id), ['b5', 'b10']);
+  assert.equal(service.hasPendingBetsForMatch(1), true);
+  assert.equal(service.hasPendingBetsForMatch(2), true); // not in this pass
+
+  service.resolveBets([match(1, 16, 0, 0)]);
+  await settled();
+  assert.deepEqual(results(emitted).map(([id]) => id), ['b5', 'b10', 'b15']);
+  assert.equal(service.hasPendingBetsForMatch(1), false);
+  assert.deepEqual([...service.pendingMatchIds()], [2]);
+});
+
+test('a fixture that did not move is skipped until a new bet is placed on it', async () => {
+  const { service, emitted } = setup();
+  place(service, { betId: 'first', windowEnd: 5 });
+  service.resolveBets([match(1, 6, 0, 0, 'HT')]); // settles 'first', remembers the state
+  await settled();
+
+  // Same clock, score and status: the new bet is still checked because placing it reset the state
+  place(service, { betId: 'second', windowEnd: 5 });
+  service.resolveBets([match(1, 6, 0, 0, 'HT')]);
+  await settled();
+  assert.deepEqual(results(emitted).map(([id]) => id), ['first', 'second']);
+});
+
+test('a finished match settles every bet left, stoppage bets included', async () => {
+  const { service, emitted } = setup();
+  place(service, { betId: 'window', windowEnd: 95 });
+  place(service, { betId: 'stoppage', type: 'stoppage_goal', windowEnd: undefined });
+
+  service.resolveBets([match(1, 90, 0, 0, 'FT')]);
+  await settled();
+  assert.deepEqual(results(emitted), [['window', 'LOSS', 0], ['stoppage', 'LOSS', 0]]);
+  assert.equal(service.hasPendingBetsForMatch(1), false);
+});
+
+test('a cancelled bet leaves the index', () => {
+  const { service } = setup();
+  const bet = place(service, { betId: 'gone' });
+  service.cancelBet(bet);
+  assert.equal(service.hasPendingBetsForMatch(1), false);
+  assert.equal(service.pendingByMarket.has(1), false);
+});
+
+test('a pass settles its due bets as one batch: one payout per user, one bets_resolved per socket', async () => {
+  const { service, emitted, ledger } = setup();
+  wallet.ensureUser('u2', 50);
+  place(service, { betId: 'a1', option: 'NO' });
+  place(service, { betId: 'a2', option: 'NO', matchId: 2 });
+  place(service, { betId: 'a3' }, 's1');
+  service.placeBet({ userId: 'u1', betId: 'a4', matchId: 1, marketId: 'm', type: 'flash_goal', option: 'NO', windowEnd: 10, currentScore: '0-0', amount: 5, odd: 2 }, 's1b');
+  service.placeBet({ userId: 'u2', betId: 'b1', matchId: 2, marketId: 'm', type: 'flash_goal', option: 'NO', windowEnd: 10, currentScore: '0-0', amount: 10, odd: 2 }, 's2');
+  const balanceBefore = wallet.users.u1.balance;
+
+  service.resolveBets([match(1, 11, 0, 0), match(2, 11, 0, 0)]);
+  await settled();
+
+  const bySocket = emitted.filter(e => e.event === 'bets_resolved');
+  assert.deepEqual(bySocket.map(e => e.socketId).sort(), ['s1', 's1b', 's2']);
+  const s1 = bySocket.find(e => e.socketId === 's1').payload;
+  assert.deepEqual(s1.results.map(r => r.bet.id), ['a1', 'a3', 'a2']);
+  // Both of u1's sockets carry the balance after all of u1's bets: 30 + 30 + 0 + 10
+  assert.equal(s1.newBalance, balanceBefore + 70);
+  assert.equal(bySocket.find(e => e.socketId === 's1b').payload.newBalance, balanceBefore + 70);
+  assert.equal(bySocket.find(e => e.socketId === 's2').payload.newBalance, 70);
+
+  assert.equal(ledger.state.users.u1.balance, balanceBefore + 70);
+  assert.deepEqual(Object.keys(ledger.state.bets), []);
+});
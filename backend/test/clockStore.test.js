@@ -0,0 +1,95 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const ClockStore = require('../src/services/clockStore');
+
+const match = (id, short = 'IN_PLAY', elapsed = 30, home = 0, away = 0) => ({
+    fixture: { id, status: { short, raw: short === 'IN_PLAY' ? '2H' : short, elapsed, second: 0, extra: null } },
+    goals: { home, away },
+    serverTimestamp: 1000
+});
+
+test('the heartbeat moves the clock and the version but leaves the match object and dirty alone', () => {
+  const clocks = new ClockStore();
+  const live = match(1);
+  const slot = clocks.upsert(live, true, false, false);
+  const version = clocks.version[slot];
+
+  clocks.advance();
+  clocks.advance();
+  assert.equal(clocks.version[slot], version + 2);
+  assert.equal(clocks.dirty[slot], 0);
+  assert.equal(live.fixture.status.second, 0); // not materialized yet
+
+  assert.equal(clocks.get(1), live);
+  assert.equal(live.fixture.status.second, 2);
+});
+
+test('the second is capped at :59 until the feed moves the minute', () => {
+  const clocks = new ClockStore();
+  const slot = clocks.upsert(match(1), true);
+  for (let i = 0; i < 70; i++) clocks.advance();
+  assert.equal(clocks.second[slot], 59);
+
+  const version = clocks.version[slot];
+  clocks.advance();
+  assert.equal(clocks.version[slot], version);
+});
+
+test('only owned live, paused or simulated slots are ticked; others still keep time', () => {
+  const clocks = new ClockStore(2); // grows past its initial capacity
+  const owned = clocks.upsert(match(1), true);
+  const paused = clocks.upsert(match(2, 'PAUSED'), true);
+  const remote = clocks.upsert(match(3), false);
+  clocks.upsert(match(4, 'FINISHED'), true);
+  const simulated = clocks.upsert(match(5), true, true);
+
+  assert.equal(clocks.advance(), 3);
+  assert.deepEqual([...clocks.ticked.subarray(0, clocks.tickedCount)], [owned, paused, simulated]);
+  assert.equal(clocks.second[remote], 1);
+  assert.equal(clocks.second[simulated], 0); // driven by setClock
+});
+
+test('listVersion moves when the fixture set or a list field changes, not on the heartbeat', () => {
+  const clocks = new ClockStore();
+  clocks.upsert(match(1), true);
+  let listVersion = clocks.listVersion;
+
+  clocks.advance();
+  clocks.upsert(match(1), true); // same minute, score and status
+  assert.equal(clocks.listVersion, listVersion);
+
+  clocks.upsert(match(1, 'IN_PLAY', 31), true);
+  assert.equal(clocks.listVersion, ++listVersion);
+  clocks.upsert(match(1, 'IN_PLAY', 31, 1, 0), true);
+  assert.equal(clocks.listVersion, ++listVersion);
+
+  clocks.remove(1);
+  assert.equal(clocks.listVersion, ++listVersion);
+  assert.equal(clocks.get(1), null);
+});
+
+test('setClock marks a simulated slot dirty only when its minute or status changes', () => {
+  const clocks = new ClockStore();
+  const slot = clocks.upsert(match(9, 'IN_PLAY', 10), true, true, false);
+
+  clocks.setClock(slot, 'IN_PLAY', '2H', 10, 30, 2000);
+  assert.equal(clocks.dirty[slot], 0);
+
+  clocks.setClock(slot, 'IN_PLAY', '2H', 11, 0, 3000);
+  assert.equal(clocks.dirty[slot], 1);
+  assert.equal(clocks.get(9).fixture.status.elapsed, 11);
+  assert.equal(clocks.get(9).serverTimestamp, 3000);
+});
+
+test('released slots are reused and retain() keeps simulated ones', () => {
+  const clocks = new ClockStore();
+  const first = clocks.upsert(match(1), true);
+  clocks.upsert(match(2), true);
+  clocks.upsert(match(3), true, true);
+
+  clocks.retain(new Set([2]));
+  assert.equal(clocks.slotOf(1), -1);
+  assert.notEqual(clocks.slotOf(3), -1);
+  assert.equal(clocks.upsert(match(4), true), first);
+});
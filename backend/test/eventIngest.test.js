@@ -0,0 +1,83 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+process.env.LOG_LEVEL = 'error';
+const matchEvents = require('../src/services/matchEvents');
+const EventIngest = require('../src/services/eventIngest').constructor;
+
+const goal = (elapsed, teamId, name) => ({ time: { elapsed, extra: null }, team: { id: teamId }, player: { id: null, name }, type: 'Goal', detail: 'Normal Goal' });
+const card = (elapsed, teamId, name, detail = 'Yellow Card') => ({ time: { elapsed, extra: null }, team: { id: teamId }, player: { name }, type: 'Card', detail });
+const sub = (elapsed, teamId, name) => ({ time: { elapsed, extra: null }, team: { id: teamId }, player: { name }, type: 'subst', detail: 'Substitution 1' });
+
+const fixture = (id, events) => ({ fixture: { id }, teams: { home: { id: 10 }, away: { id: 20 } }, events });
+
+// An EventIngest on the leader watching `watched`; ingest() returns what reached this shard's queue
+function setup(watched = [1]) {
+  const ingest = new EventIngest();
+  ingest.setMatchService({ activeMonitors: new Set(watched) });
+  return (apiMatches) => {
+      ingest.ingest(apiMatches);
+      const events = ingest.queue;
+      ingest.queue = [];
+      return events.map(({ fixtureId, type, team, minute, player, card }) => ({ fixtureId, type, team, minute, player, card }));
+  };
+}
+
+test('the first list only sets the cursor; appended events are published once', () => {
+  const ingest = setup();
+  assert.deepEqual(ingest([fixture(1, [goal(10, 10, 'A')])]), []);
+  assert.deepEqual(ingest([fixture(1, [goal(10, 10, 'A')])]), []);
+
+  const events = ingest([fixture(1, [goal(10, 10, 'A'), sub(40, 20, 'S'), card(41, 20, 'B'), goal(44, 20, 'C')])]);
+  assert.deepEqual(events, [
+      { fixtureId: 1, type: 'card', team: 'Away', minute: 41, player: 'B', card: 'yellow' },
+      { fixtureId: 1, type: 'goal', team: 'Away', minute: 44, player: 'C', card: null }
+  ]);
+  assert.deepEqual(ingest([fixture(1, [goal(10, 10, 'A'), sub(40, 20, 'S'), card(41, 20, 'B'), goal(44, 20, 'C')])]), []);
+});
+
+test('a rewritten list (VAR) only publishes the events not seen before', () => {
+  const ingest = setup();
+  ingest([fixture(1, [goal(10, 10, 'A'), goal(30, 20, 'B')])]);
+
+  // The goal at 30 is taken back and a red card inserted before it; same length, new last key
+  const events = ingest([fixture(1, [goal(10, 10, 'A'), card(25, 10, 'D', 'Red Card')])]);
+  assert.deepEqual(events, [{ fixtureId: 1, type: 'card', team: 'Home', minute: 25, player: 'D', card: 'red' }]);
+
+  // Shorter list, then the old goal back: it was seen already
+  assert.deepEqual(ingest([fixture(1, [goal(10, 10, 'A')])]), []);
+  assert.deepEqual(ingest([fixture(1, [goal(10, 10, 'A'), goal(30, 20, 'B')])]), []);
+});
+
+test('only watched fixtures are diffed, and one that comes back starts from a fresh baseline', () => {
+  const watched = new Set([1]);
+  const ingest = new EventIngest();
+  ingest.setMatchService({ activeMonitors: watched });
+
+  ingest.ingest([fixture(1, []), fixture(2, [])]);
+  assert.deepEqual([...ingest.cursors.keys()], [1]);
+
+  watched.delete(1);
+  ingest.ingest([]);
+  assert.equal(ingest.cursors.size, 0);
+
+  watched.add(1);
+  ingest.ingest([fixture(1, [goal(10, 10, 'A')])]);
+  assert.deepEqual(ingest.queue, []); // history is not replayed
+});
+
+test('dispatch puts queued events on the match event bus', () => {
+  const ingest = new EventIngest();
+  ingest.setMatchService({ activeMonitors: new Set([1]) });
+  ingest.ingest([fixture(1, [])]);
+  ingest.ingest([fixture(1, [{ time: { elapsed: 60 }, team: { id: 10 }, player: {}, type: 'Var', detail: 'Penalty confirmed' }])]);
+  assert.equal(ingest.queue.length, 1);
+
+  const seen = [];
+  const listener = (event) => seen.push(event.type);
+  matchEvents.on('event', listener);
+  ingest.dispatch();
+  matchEvents.off('event', listener);
+  assert.deepEqual(seen, ['penalty']);
+  assert.equal(ingest.queue.length, 0);
+});
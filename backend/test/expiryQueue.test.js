@@ -0,0 +1,114 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const ExpiryQueue = require('../src/services/expiryQueue');
+
+// Seeded, so a failure reproduces
+const seeded = (seed) => () => {
+  seed = (seed * 1664525 + 1013904223) >>> 0;
+  return seed / 0x100000000;
+};
+
+test('fires due deadlines earliest first, and only those', () => {
+  const queue = new ExpiryQueue();
+  const fired = [];
+  [30, 10, 50, 20, 40].forEach(deadline => queue.schedule(deadline, () => fired.push(deadline)));
+
+  assert.equal(queue.advance(25), 2);
+  assert.deepEqual(fired, [10, 20]);
+  assert.equal(queue.size, 3);
+
+  assert.equal(queue.advance(25), 0);
+  assert.equal(queue.advance(50), 3);
+  assert.deepEqual(fired, [10, 20, 30, 40, 50]);
+  assert.equal(queue.size, 0);
+});
+
+test('a deadline equal to now is due', () => {
+  const queue = new ExpiryQueue();
+  let fired = false;
+  queue.schedule(100, () => { fired = true; });
+  queue.advance(100);
+  assert.equal(fired, true);
+});
+
+test('cancelled entries never fire, cancelling twice or after firing is a no-op', () => {
+  const queue = new ExpiryQueue();
+  const fired = [];
+  const a = queue.schedule(1, () => fired.push('a'));
+  const b = queue.schedule(2, () => fired.push('b'));
+  queue.schedule(3, () => fired.push('c'));
+
+  queue.cancel(b);
+  queue.cancel(b);
+  assert.equal(queue.size, 2);
+
+  queue.advance(1);
+  queue.cancel(a);
+  assert.equal(queue.size, 1);
+
+  queue.advance(10);
+  assert.deepEqual(fired, ['a', 'c']);
+  assert.equal(queue.size, 0);
+});
+
+test('callbacks may schedule and cancel while the queue advances', () => {
+  const queue = new ExpiryQueue();
+  const fired = [];
+  let later = null;
+  queue.schedule(1, () => {
+      fired.push(1);
+      queue.schedule(2, () => fired.push(2)); // due in the same advance
+      queue.cancel(later);
+  });
+  later = queue.schedule(3, () => fired.push(3));
+
+  queue.advance(5);
+  assert.deepEqual(fired, [1, 2]);
+});
+
+test('matches a sorted reference through heavy cancellation and compaction', () => {
+  const random = seeded(42);
+  const queue = new ExpiryQueue();
+  const live = new Map(); // handle -> deadline
+  const fired = [];
+  let now = 0;
+
+  for (let round = 0; round < 200; round++) {
+      for (let i = 0; i < 50; i++) {
+          const deadline = now + Math.floor(random() * 1000);
+          const handle = queue.schedule(deadline, () => fired.push(deadline));
+          live.set(handle, deadline);
+      }
+      // Cancel most of them so compaction kicks in
+      for (const handle of [...live.keys()]) {
+          if (random() < 0.6) {
+              queue.cancel(handle);
+              live.delete(handle);
+          }
+      }
+
+      now += Math.floor(random() * 300);
+      const expected = [...live.values()].filter(deadline => deadline <= now).sort((x, y) => x - y);
+      fired.length = 0;
+      queue.advance(now);
+
+      assert.deepEqual(fired, expected);
+      for (const [handle, deadline] of live) {
+          if (deadline <= now) live.delete(handle);
+      }
+      assert.equal(queue.size, live.size);
+  }
+});
+
+test('clear drops everything', () => {
+  const queue = new ExpiryQueue();
+  let fired = 0;
+  const handle = queue.schedule(1, () => fired++);
+  queue.schedule(2, () => fired++);
+  queue.clear();
+  queue.cancel(handle);
+
+  assert.equal(queue.size, 0);
+  assert.equal(queue.advance(10), 0);
+  assert.equal(fired, 0);
+});
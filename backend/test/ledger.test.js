@@ -0,0 +1,182 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+process.env.LOG_LEVEL = 'error';
+process.env.LEDGER_DIR = fs.mkdtempSync(path.join(os.tmpdir(), 'ledger-test-'));
+process.env.LEDGER_SNAPSHOT_EVERY = '5';
+const Ledger = require('../src/services/ledger').constructor;
+
+// A fresh ledger in its own directory, as a restarted process would see it
+function openLedger(dir = fs.mkdtempSync(path.join(os.tmpdir(), 'ledger-test-'))) {
+  const ledger = new Ledger();
+  ledger.dir = dir;
+  return { ledger, state: ledger.recover(), dir };
+}
+
+const walFiles = (dir) => fs.readdirSync(dir).filter(f => f.startsWith('wal-'));
+
+const waitForSnapshot = async (ledger) => {
+  while (ledger.snapshotting) await new Promise(resolve => setTimeout(resolve, 5));
+};
+
+test('replays every acknowledged record after a restart', async () => {
+  const { ledger, dir } = openLedger();
+  await ledger.append({ type: 'user_created', userId: 'u1', balance: 100 });
+  await ledger.appendBatch([
+      { type: 'debit', userId: 'u1', amount: 10, betId: 'b1' },
+      { type: 'bet_opened', bet: { id: 'b1', userId: 'u1', amount: 10 } },
+      { type: 'debit', userId: 'u1', amount: 5, betId: 'b2' },
+      { type: 'bet_opened', bet: { id: 'b2', userId: 'u1', amount: 5 } }
+  ]);
+  await ledger.appendBatch([
+      { type: 'bet_closed', betId: 'b1', status: 'WIN', payout: 20 },
+      { type: 'credit', userId: 'u1', amount: 20, betIds: ['b1'] }
+  ]);
+
+  const { state, ledger: reopened } = openLedger(dir);
+  assert.deepEqual(state.users, { u1: { balance: 105 } });
+  assert.deepEqual(Object.keys(state.bets), ['b2']);
+  assert.equal(reopened.seq, 7);
+});
+
+test('concurrent appends share a group commit and keep their order', async () => {
+  const { ledger, dir } = openLedger();
+  await ledger.append({ type: 'user_created', userId: 'u1', balance: 0 });
+  await Promise.all(Array.from({ length: 20 }, (_, i) => ledger.append({ type: 'credit', userId: 'u1', amount: i })));
+
+  const lines = fs.readFileSync(path.join(dir, walFiles(dir)[0]), 'utf8').trim().split('\n').map(line => JSON.parse(line));
+  assert.deepEqual(lines.map(r => r.seq), Array.from({ length: 21 }, (_, i) => i + 1));
+  assert.equal(openLedger(dir).state.users.u1.balance, 190);
+});
+
+test('a torn final line is cut off and later appends replay cleanly', async () => {
+  const { ledger, dir } = openLedger();
+  await ledger.append({ type: 'user_created', userId: 'u1', balance: 100 });
+  await ledger.append({ type: 'debit', userId: 'u1', amount: 10, betId: 'b1' });
+
+  // The process died halfway through writing the next line
+  const segment = path.join(dir, walFiles(dir)[0]);
+  const intact = fs.readFileSync(segment, 'utf8');
+  fs.appendFileSync(segment, '{"type":"debit","userId":"u1","amo');
+
+  const first = openLedger(dir);
+  assert.deepEqual(first.state.users, { u1: { balance: 90 } });
+  assert.equal(fs.readFileSync(segment, 'utf8'), intact);
+
+  await first.ledger.append({ type: 'credit', userId: 'u1', amount: 5 });
+  const second = openLedger(dir);
+  assert.deepEqual(second.state.users, { u1: { balance: 95 } });
+  assert.equal(second.ledger.seq, 3);
+});
+
+test('bets split across shards are tracked until both halves are acknowledged', async () => {
+  const { ledger, dir } = openLedger();
+  await ledger.appendBatch([
+      { type: 'user_created', userId: 'u1', balance: 100 },
+      { type: 'debit', userId: 'u1', amount: 10, betId: 'b1', fixtureId: 7 },
+      { type: 'debit', userId: 'u1', amount: 10, betId: 'b2', fixtureId: 7 },
+      { type: 'debit_confirmed', betIds: ['b1'] },
+      { type: 'bet_closed', betId: 'b3', status: 'WIN', payout: 30, userId: 'u2' },
+      { type: 'bet_closed', betId: 'b4', status: 'LOSS', payout: 0, userId: 'u2' },
+      { type: 'credit_confirmed', betIds: ['b4'] },
+      { type: 'credit', userId: 'u1', amount: 10, betIds: ['b2'] }
+  ]);
+
+  for (const state of [ledger.state, openLedger(dir).state]) {
+      assert.deepEqual(state.users, { u1: { balance: 90 } });
+      assert.deepEqual(state.debits, {});
+      assert.deepEqual(state.unpaid, { b3: { userId: 'u2', payout: 30 } });
+      assert.deepEqual(Object.keys(state.credited), ['b2']);
+  }
+});
+
+test('a bet whose wallet is on the same shard is one record per money change', async () => {
+  const { ledger, dir } = openLedger();
+  await ledger.appendBatch([
+      { type: 'user_created', userId: 'u1', balance: 100 },
+      { type: 'bet_placed', userId: 'u1', amount: 10, bet: { id: 'b1', userId: 'u1', amount: 10 } },
+      { type: 'bet_placed', userId: 'u1', amount: 5, bet: { id: 'b2', userId: 'u1', amount: 5 } },
+      { type: 'bet_settled', userId: 'u1', betId: 'b1', status: 'WIN', payout: 25 }
+  ]);
+
+  const { state } = openLedger(dir);
+  assert.deepEqual(state.users, { u1: { balance: 110 } });
+  assert.deepEqual(Object.keys(state.bets), ['b2']);
+  assert.deepEqual(state.debits, {});
+  assert.deepEqual(state.unpaid, {});
+});
+
+test('a corrupt line before the tail refuses to start', async () => {
+  const { ledger, dir } = openLedger();
+  await ledger.append({ type: 'user_created', userId: 'u1', balance: 100 });
+  const segment = path.join(dir, walFiles(dir)[0]);
+  fs.writeFileSync(segment, 'not json\n' + fs.readFileSync(segment, 'utf8'));
+
+  assert.throws(() => openLedger(dir), /Corrupt record/);
+});
+
+test('a snapshot replaces the segments before it and recovery resumes after it', async () => {
+  const { ledger, dir } = openLedger();
+
+  await ledger.append({ type: 'user_created', userId: 'u1', balance: 100 });
+  for (let i = 0; i < 4; i++) {
+      await ledger.append({ type: 'debit', userId: 'u1', amount: 1, betId: `b${i}` });
+  }
+  await waitForSnapshot(ledger);
+
+  const snapshot = JSON.parse(fs.readFileSync(path.join(dir, 'snapshot.json'), 'utf8'));
+  assert.equal(snapshot.seq, 5);
+  assert.deepEqual(snapshot.users, { u1: { balance: 96 } });
+  assert.deepEqual(walFiles(dir), ['wal-6.log']);
+
+  for (let i = 4; i < 6; i++) {
+      await ledger.append({ type: 'debit', userId: 'u1', amount: 1, betId: `b${i}` });
+  }
+
+  const { state, ledger: reopened } = openLedger(dir);
+  assert.deepEqual(state.users, { u1: { balance: 94 } });
+  assert.equal(reopened.seq, 7);
+});
+
+test('a snapshot leaves out records that are still buffered', async () => {
+  const { ledger, dir } = openLedger();
+  await ledger.append({ type: 'user_created', userId: 'u1', balance: 100 });
+  for (let i = 0; i < 3; i++) {
+      await ledger.append({ type: 'debit', userId: 'u1', amount: 1, betId: `b${i}` });
+  }
+
+  // The fifth record triggers the snapshot; the sixth is appended while it is being written
+  const fifth = ledger.append({ type: 'debit', userId: 'u1', amount: 1, betId: 'b3' });
+  while (!ledger.flushing) await new Promise(resolve => setImmediate(resolve));
+  const sixth = ledger.append({ type: 'credit', userId: 'u1', amount: 50, betIds: ['x'] });
+  await Promise.all([fifth, sixth]);
+  await waitForSnapshot(ledger);
+
+  const snapshot = JSON.parse(fs.readFileSync(path.join(dir, 'snapshot.json'), 'utf8'));
+  assert.equal(snapshot.seq, 5);
+  assert.deepEqual(snapshot.users, { u1: { balance: 96 } });
+  assert.deepEqual(openLedger(dir).state.users, { u1: { balance: 146 } });
+});
+
+test('records of a failed group commit never reach the durable state', async () => {
+  const { ledger } = openLedger();
+  await ledger.append({ type: 'user_created', userId: 'u1', balance: 100 });
+  await ledger.append({ type: 'bet_opened', bet: { id: 'b1', userId: 'u1', amount: 5 } });
+
+  const fd = ledger.fd;
+  ledger.fd = 2 ** 30; // not an open descriptor: the write fails
+  await assert.rejects(ledger.appendBatch([
+      { type: 'debit', userId: 'u1', amount: 10, betId: 'b2' },
+      { type: 'bet_closed', betId: 'b1', status: 'LOSS', payout: 0 }
+  ]));
+  ledger.fd = fd;
+
+  assert.deepEqual(ledger.state.users, { u1: { balance: 100 } });
+  assert.deepEqual(Object.keys(ledger.state.bets), ['b1']);
+
+  await ledger.append({ type: 'debit', userId: 'u1', amount: 1, betId: 'b3' });
+  assert.deepEqual(ledger.state.users, { u1: { balance: 99 } });
+});
@@ -0,0 +1,96 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+process.env.LOG_LEVEL = 'error';
+const ClockStore = require('../src/services/clockStore');
+const broadcaster = require('../src/services/broadcaster');
+const LobbyService = require('../src/services/lobbyService').constructor;
+
+const match = (id, elapsed = 30, home = 0, away = 0, short = 'IN_PLAY') => ({
+    fixture: { id, date: '2026-10-17T18:00:00Z', status: { short, raw: short === 'IN_PLAY' ? '2H' : short, elapsed, second: 10, extra: null } },
+    league: { id: 71 },
+    teams: { home: { name: 'A' }, away: { name: 'B' } },
+    goals: { home, away }
+});
+
+// A LobbyService over a fresh clock store; patches sent to the lobby room are collected
+function setup() {
+  const patches = [];
+  const io = {
+      to: (room) => ({ emit: (event, payload) => patches.push({ room, event, payload }) }),
+      of: () => ({ adapter: { rooms: new Map() } }) // no binary sockets
+  };
+  broadcaster.setIo(io);
+
+  const clocks = new ClockStore(2);
+  const lobby = new LobbyService();
+  lobby.setIo(io);
+  lobby.setMatchService({ clocks, getMatches: () => [] });
+  return { lobby, clocks, patches };
+}
+
+test('the first patch adds every owned fixture, later ones carry only what moved', () => {
+  const { lobby, clocks, patches } = setup();
+  clocks.upsert(match(1), true);
+  clocks.upsert(match(2), true);
+  clocks.upsert(match(3), false); // another shard publishes it
+
+  lobby.publish(10000);
+  assert.equal(patches.length, 1);
+  assert.equal(patches[0].room, 'lobby');
+  assert.deepEqual(patches[0].payload.added.map(m => m.fixture.id), [1, 2]);
+  assert.equal(patches[0].payload.added[0].markets, undefined);
+
+  // Heartbeat seconds are not published
+  clocks.advance();
+  lobby.publish(12000);
+  assert.equal(patches.length, 1);
+
+  clocks.upsert(match(1, 31), true);
+  clocks.upsert(match(2, 30, 0, 1), true);
+  lobby.publish(14000);
+  assert.deepEqual(patches[1].payload, {
+      serverTimestamp: 14000,
+      added: [],
+      changed: [{ id: 1, elapsed: 31, second: 10 }, { id: 2, away: 1 }],
+      removed: []
+  });
+});
+
+test('patches are throttled to the lobby interval', () => {
+  const { lobby, clocks, patches } = setup();
+  clocks.upsert(match(1), true);
+  lobby.publish(10000);
+
+  clocks.upsert(match(1, 31), true);
+  lobby.publish(11000);
+  assert.equal(patches.length, 1);
+  lobby.publish(12000);
+  assert.equal(patches.length, 2);
+});
+
+test('a removed fixture, and one whose slot was reused, are reported as removed', () => {
+  const { lobby, clocks, patches } = setup();
+  clocks.upsert(match(1), true);
+  clocks.upsert(match(2), true);
+  lobby.publish(10000);
+
+  clocks.remove(1);
+  clocks.upsert(match(5), true); // takes fixture 1's slot
+  clocks.upsert(match(2, 90, 0, 0, 'FINISHED'), true);
+  lobby.publish(12000);
+
+  const { added, changed, removed } = patches[1].payload;
+  assert.deepEqual(removed, [1]);
+  assert.deepEqual(added.map(m => m.fixture.id), [5]);
+  assert.deepEqual(changed, [{ id: 2, short: 'FINISHED', raw: 'FINISHED', elapsed: 90, second: 10 }]);
+});
+
+test('the list projection drops markets and events, and the second when asked', () => {
+  const { lobby } = setup();
+  const full = { ...match(1), markets: [{}], events: [{}] };
+  const row = lobby.project(full, false);
+  assert.deepEqual(Object.keys(row), ['fixture', 'league', 'teams', 'goals']);
+  assert.equal('second' in row.fixture.status, false);
+  assert.equal(lobby.project(full).fixture.status.second, 10);
+});
@@ -0,0 +1,91 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const zlib = require('zlib');
+
+process.env.LOG_LEVEL = 'error';
+const cache = require('../src/services/matchListCache');
+
+const match = (id, short = 'IN_PLAY', league = { id: 39, name: 'Premier League' }) => ({
+  fixture: { id, date: '2026-10-17T18:00:00Z', status: { short, raw: '1H', elapsed: 30, second: 12, extra: null } },
+  league,
+  teams: { home: { id: 1, name: 'A' }, away: { id: 2, name: 'B' } },
+  goals: { home: 0, away: 0 },
+  markets: { flash: [] }
+});
+
+const service = { clocks: { listVersion: 1 }, matches: [], getMatches() { return this.matches; } };
+cache.setMatchService(service);
+
+const page = (query = {}) => cache.get(cache.parseQuery(query));
+const json = (entry) => JSON.parse(entry.body);
+
+test.beforeEach(() => {
+  service.matches = [match(3), match(1, 'SCHEDULED'), match(2, 'FINISHED', { id: 140, name: 'La Liga' })];
+  service.clocks.listVersion++;
+});
+
+test('bodies are the list projection ordered by fixture id, without the clock second', () => {
+  const list = json(page());
+  assert.deepEqual(list.map(m => m.fixture.id), [1, 2, 3]);
+  assert.equal(list[0].markets, undefined);
+  assert.equal('second' in list[0].fixture.status, false);
+  assert.equal(list[0].fixture.status.elapsed, 30);
+});
+
+test('a version is built once and keeps its ETag until the list changes', () => {
+  const first = page();
+  assert.equal(page(), first);
+  assert.equal(cache.etag(first, 'identity'), `"${first.hash}"`);
+  assert.notEqual(cache.etag(first, 'gzip'), cache.etag(first, 'br'));
+
+  // Same content under a new version: same strong ETag
+  service.clocks.listVersion++;
+  const rebuilt = page();
+  assert.notEqual(rebuilt, first);
+  assert.equal(rebuilt.hash, first.hash);
+
+  service.matches[0].goals.home = 1;
+  service.clocks.listVersion++;
+  assert.notEqual(page().hash, first.hash);
+});
+
+test('filters by status and league (id or name)', () => {
+  assert.deepEqual(json(page({ status: 'live' })).map(m => m.fixture.id), [3]);
+  assert.deepEqual(json(page({ league: '140' })).map(m => m.fixture.id), [2]);
+  assert.deepEqual(json(page({ league: 'premier league' })).map(m => m.fixture.id), [1, 3]);
+});
+
+test('pages follow the cursor', () => {
+  const first = page({ limit: '2' });
+  assert.deepEqual(json(first).map(m => m.fixture.id), [1, 2]);
+  assert.ok(first.nextCursor);
+
+  const second = page({ limit: '2', cursor: first.nextCursor });
+  assert.deepEqual(json(second).map(m => m.fixture.id), [3]);
+  assert.equal(second.nextCursor, null);
+});
+
+test('rejects bad queries', () => {
+  assert.ok(cache.parseQuery({ status: 'later' }).error);
+  assert.ok(cache.parseQuery({ limit: '0' }).error);
+  assert.ok(cache.parseQuery({ cursor: 'x' }).error);
+});
+
+test('compressed bodies are made once per version', async () => {
+  const entry = page();
+  const gzipped = cache.encode(entry, 'gzip');
+  assert.equal(cache.encode(entry, 'gzip'), gzipped);
+  assert.deepEqual(zlib.gunzipSync(await gzipped), entry.body);
+  assert.deepEqual(zlib.brotliDecompressSync(await cache.encode(entry, 'br')), entry.body);
+  assert.equal(await cache.encode(entry, 'identity'), entry.body);
+});
+
+test('a failed compression is retried by the next request', async () => {
+  const entry = page();
+  const body = entry.body;
+  entry.body = 42; // not compressible: zlib rejects it
+  await assert.rejects(cache.encode(entry, 'gzip'));
+
+  entry.body = body;
+  assert.deepEqual(zlib.gunzipSync(await cache.encode(entry, 'gzip')), body);
+});
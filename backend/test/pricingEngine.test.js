@@ -0,0 +1,122 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const PricingEngine = require('../src/services/pricingEngine');
+const { KIND } = PricingEngine;
+
+// The fixed-odds pricing this replaced: flash markets at static odds (1-minute 3.50 / 1.25,
+// 5-minute 2.50 / 1.50), MarketService decaying linearly from yes 2.50 / no 1.50 to
+// yes 10.00 / no 1.01 as the window ran out. The engine keeps their shape but not their
+// levels (see the header of pricingEngine.js); the levels are pinned below.
+
+function priceGoal(windowStart, windowEnd, clock, scoreDiff = 0) {
+  const engine = new PricingEngine(1);
+  const market = { odds: { yes: 0, no: 0 } };
+  engine.add(market, KIND.GOAL, windowStart, windowEnd, clock, scoreDiff);
+  engine.run();
+  return market.odds;
+}
+
+test('goal odds move like the old decay as the window runs out', () => {
+  let previous = priceGoal(0, 5, 0);
+  for (let clock = 0.5; clock <= 5; clock += 0.5) {
+      const odds = priceGoal(0, 5, clock);
+      assert.ok(odds.yes >= previous.yes, `yes fell at ${clock}: ${previous.yes} -> ${odds.yes}`);
+      assert.ok(odds.no <= previous.no, `no rose at ${clock}: ${previous.no} -> ${odds.no}`);
+      previous = odds;
+  }
+  assert.deepEqual(priceGoal(0, 5, 5), { yes: 50, no: 1.01 });
+});
+
+test('yes is the long side and shorter windows pay more, as in the static flash odds', () => {
+  const oneMinute = priceGoal(30, 31, 30);
+  const fiveMinutes = priceGoal(30, 35, 30);
+  assert.ok(oneMinute.yes > fiveMinutes.yes);
+  assert.ok(oneMinute.no <= fiveMinutes.no);
+  for (const odds of [oneMinute, fiveMinutes]) assert.ok(odds.yes > odds.no);
+});
+
+test('a window that has not started is priced over its full length', () => {
+  assert.deepEqual(priceGoal(40, 45, 30), priceGoal(30, 35, 30));
+});
+
+test('odds stay within 1.01..50 and are rounded to cents', () => {
+  for (const [start, end, clock] of [[0, 0.01, 0], [0, 90, 0], [0, 600, 0], [10, 5, 20]]) {
+      const odds = priceGoal(start, end, clock);
+      for (const value of [odds.yes, odds.no]) {
+          assert.ok(value >= 1.01 && value <= 50, `${value}`);
+          assert.equal(Math.round(value * 100) / 100, value);
+      }
+  }
+});
+
+test('1x2 carries the margin and favours the leader late on', () => {
+  const engine = new PricingEngine(1);
+  const level = { odds: { home: 0, draw: 0, away: 0 } };
+  const ahead = { odds: { home: 0, draw: 0, away: 0 } };
+  engine.add(level, KIND.RESULT, 0, 90, 0, 0, 0);
+  engine.add(ahead, KIND.RESULT, 0, 90, 80, 1, 1);
+  assert.equal(engine.run(), 2);
+
+  const overround = 1 / level.odds.home + 1 / level.odds.draw + 1 / level.odds.away;
+  assert.ok(Math.abs(overround - 1.05) < 0.01, `overround ${overround}`);
+  assert.ok(level.odds.home < level.odds.away);
+  assert.ok(ahead.odds.home < ahead.odds.draw && ahead.odds.draw < ahead.odds.away);
+});
+
+test('totals price the goals already in against the line', () => {
+  const engine = new PricingEngine(1);
+  const start = { odds: { over: 0, under: 0 } };
+  const settled = { odds: { over: 0, under: 0 } };
+  engine.add(start, KIND.TOTAL, 0, 90, 0, 0, 0, 2.5);
+  engine.add(settled, KIND.TOTAL, 0, 90, 60, 1, 3, 2.5); // three goals in: over can't lose
+  engine.run();
+
+  assert.ok(start.odds.over > start.odds.under);
+  assert.deepEqual(settled.odds, { over: 1.01, under: 50 });
+});
+
+test('commit only counts markets whose odds moved', () => {
+  const engine = new PricingEngine(2); // grows past its initial capacity
+  const markets = Array.from({ length: 5 }, () => ({ odds: { yes: 0, no: 0 } }));
+  const fill = (clock) => {
+      engine.begin();
+      markets.forEach((market, i) => engine.add(market, KIND.GOAL, i, i + 5, clock));
+  };
+
+  fill(0);
+  assert.equal(engine.run(), 5);
+  fill(0);
+  assert.equal(engine.run(), 0);
+  fill(3);
+  assert.equal(engine.run(), 5);
+  assert.equal(PricingEngine.kindOf(markets[0]), KIND.GOAL);
+  assert.equal(PricingEngine.kindOf({}), -1);
+});
+
+test('odds are pinned to the calibrated model', () => {
+  const engine = new PricingEngine(8);
+  const rows = [
+      [{ yes: 0, no: 0 }, KIND.GOAL, 30, 31, 30, 0], // flash 1-minute window, was 3.50 / 1.25
+      [{ yes: 0, no: 0 }, KIND.GOAL, 30, 35, 30, 0], // flash 5-minute window, was 2.50 / 1.50
+      [{ yes: 0, no: 0 }, KIND.GOAL, 85, 90, 85, 1], // late, one-goal game
+      [{ yes: 0, no: 0 }, KIND.GOAL, 0, 5, 0, 0], // 5-minute MarketService market when created, was 2.50 / 1.50
+      [{ home: 0, draw: 0, away: 0 }, KIND.RESULT, 0, 90, 0, 0, 0],
+      [{ over: 0, under: 0 }, KIND.TOTAL, 0, 90, 0, 0, 0, 2.5]
+  ];
+  const markets = rows.map(([odds, ...row]) => {
+      const market = { odds };
+      engine.add(market, ...row);
+      return market;
+  });
+  engine.run();
+
+  assert.deepEqual(markets.map(market => market.odds), [
+      { yes: 33.9, no: 1.01 },
+      { yes: 7.17, no: 1.1 },
+      { yes: 5.58, no: 1.15 },
+      { yes: 7.96, no: 1.08 },
+      { home: 2.36, draw: 3.37, away: 3.04 },
+      { over: 2.37, under: 1.59 }
+  ]);
+});
@@ -0,0 +1,59 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+process.env.LOG_LEVEL = 'error';
+const router = require('../src/services/shardRouter');
+
+const FIXTURES = Array.from({ length: 2000 }, (_, i) => 1000000 + i);
+
+// Owners as a process with `count` shards would compute them
+function ownersWith(count, ids = FIXTURES) {
+  const saved = router.count;
+  router.count = count;
+  router.owners.clear();
+  try {
+      return ids.map(id => router.ownerOfFixture(id));
+  } finally {
+      router.count = saved;
+      router.owners.clear();
+  }
+}
+
+test('a single shard owns everything', () => {
+  assert.ok(ownersWith(1).every(owner => owner === 0));
+  assert.equal(router.owns(FIXTURES[0]), true);
+  assert.equal(router.ownsUser('u1'), true);
+});
+
+test('numeric and string fixture ids map to the same owner', () => {
+  const ids = FIXTURES.slice(0, 200);
+  assert.deepEqual(ownersWith(7, ids), ownersWith(7, ids.map(String)));
+});
+
+test('owners are deterministic across processes', () => {
+  assert.deepEqual(ownersWith(4), ownersWith(4));
+});
+
+test('keys spread evenly over the shards', () => {
+  for (const count of [2, 4, 8]) {
+      const load = new Array(count).fill(0);
+      ownersWith(count).forEach(owner => { load[owner]++; });
+      const expected = FIXTURES.length / count;
+      load.forEach(n => assert.ok(Math.abs(n - expected) < expected * 0.2, `${count} shards: ${load}`));
+  }
+});
+
+test('adding a shard only moves keys to the new shard', () => {
+  for (const count of [1, 3, 7]) {
+      const before = ownersWith(count);
+      const after = ownersWith(count + 1);
+      let moved = 0;
+      before.forEach((owner, i) => {
+          if (after[i] === owner) return;
+          assert.equal(after[i], count, `fixture ${FIXTURES[i]} moved between existing shards`);
+          moved++;
+      });
+      const expected = FIXTURES.length / (count + 1);
+      assert.ok(Math.abs(moved - expected) < expected * 0.2, `${count} -> ${count + 1}: ${moved} moved`);
+  }
+});
@@ -0,0 +1,56 @@
+process.env.LOG_LEVEL = 'error';
+
+const test = require('node:test');
+const assert = require('node:assert/strict');
+
+const TickScheduler = require('../src/services/tickScheduler').constructor;
+
+function busy(ms) {
+    const until = Date.now() + ms;
+    while (Date.now() < until) { /* spin */ }
+}
+
+const wait = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+test('ticks run in phase order', async () => {
+    const scheduler = new TickScheduler();
+    const order = [];
+    scheduler.register('broadcast', 'b', () => order.push('broadcast'));
+    scheduler.register('clock', 'c', () => order.push('clock'));
+    scheduler.register('settlement', 's', () => order.push('settlement'));
+    scheduler.register('markets', 'm', () => order.push('markets'));
+
+    scheduler.start(20);
+    await wait(30);
+    scheduler.stop();
+
+    assert.deepEqual(order.slice(0, 4), ['clock', 'markets', 'settlement', 'broadcast']);
+});
+
+test('an unknown phase is rejected', () => {
+    const scheduler = new TickScheduler();
+    assert.throws(() => scheduler.register('render', 'r', () => {}), /Unknown phase/);
+});
+
+test('an overrun skips the boundaries it went past instead of running them back to back', async () => {
+    const scheduler = new TickScheduler();
+    const startedAt = [];
+    scheduler.register('clock', 'slow-once', () => {
+        startedAt.push(Date.now());
+        if (startedAt.length === 1) busy(130); // about three boundaries at 40 ms
+    });
+
+    scheduler.start(40);
+    await wait(260);
+    scheduler.stop();
+
+    const stats = scheduler.getStats();
+    assert.equal(stats.overruns, 1);
+    assert.ok(stats.skipped >= 3, `skipped ${stats.skipped}`);
+
+    // The tick after the overrun waits for the next boundary
+    assert.ok(startedAt.length >= 2);
+    for (let i = 1; i < startedAt.length; i++) {
+        assert.ok(startedAt[i] - startedAt[i - 1] >= 30, `ticks ${i - 1} and ${i} ran ${startedAt[i] - startedAt[i - 1]} ms apart`);
+    }
+});
@@ -0,0 +1,92 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+process.env.LOG_LEVEL = 'error';
+const Ledger = require('../src/services/ledger').constructor;
+const wallet = require('../src/services/walletService');
+
+// The wallet singleton on a fresh ledger, as the user's shard after a restart
+function walletOn(records = []) {
+  const ledger = new Ledger();
+  ledger.dir = fs.mkdtempSync(path.join(os.tmpdir(), 'wallet-test-'));
+  const t = Date.now();
+  fs.writeFileSync(path.join(ledger.dir, 'wal-1.log'),
+      records.map((record, i) => JSON.stringify({ ...record, seq: i + 1, t }) + '\n').join(''));
+  const state = ledger.recover();
+  wallet.setLedger(ledger);
+  wallet.load(state.users);
+  return ledger;
+}
+
+const USER = { type: 'user_created', userId: 'u1', balance: 100 };
+
+test('reserve takes stakes in order and never overdraws; release gives them back', () => {
+  walletOn([USER]);
+  const results = wallet.reserve([
+      { userId: 'u1', amount: 60 },
+      { userId: 'u1', amount: 60 },
+      { userId: 'u1', amount: 40 },
+      { userId: 'nobody', amount: 1 }
+  ]);
+  assert.deepEqual(results.map(r => r.ok), [true, false, true, false]);
+  assert.equal(wallet.users.u1.balance, 0);
+
+  wallet.release('u1', 40);
+  assert.equal(wallet.users.u1.balance, 40);
+});
+
+test('a debit for another shard stays unconfirmed until the bet is confirmed', async () => {
+  const ledger = walletOn([USER]);
+  await wallet.applyDebitBatch([{ userId: 'u1', amount: 10, betId: 'b1', fixtureId: 7 }]);
+  assert.deepEqual(ledger.state.debits, { b1: { userId: 'u1', amount: 10, fixtureId: 7 } });
+
+  wallet.confirmDebits(['b1', 'unknown']);
+  await ledger.append({ type: 'user_created', userId: 'u2', balance: 0 }); // flushes after the confirmation
+  assert.deepEqual(ledger.state.debits, {});
+  assert.equal(ledger.state.users.u1.balance, 90);
+});
+
+test('credits are applied once per bet id, also after a restart', async () => {
+  walletOn([USER, { type: 'credit', userId: 'u1', amount: 30, betIds: ['paid'] }]);
+  assert.equal(wallet.users.u1.balance, 130);
+
+  const [first, retry] = await Promise.all([wallet.applyCredit('u1', 20, ['b1', 'b2']), wallet.applyCredit('u1', 20, ['b1', 'b2'])]);
+  assert.equal(first, 150);
+  assert.equal(retry, 150);
+  assert.equal(await wallet.applyCredit('u1', 30, ['paid']), 150);
+  assert.equal(await wallet.applyCredit('u1', 40, ['new']), 190);
+});
+
+test('a failed credit is undone and can be retried', async () => {
+  const ledger = walletOn([USER]);
+  const fd = ledger.fd;
+  ledger.fd = 2 ** 30;
+  await assert.rejects(wallet.applyCredit('u1', 25, ['b1']));
+  ledger.fd = fd;
+  assert.equal(wallet.users.u1.balance, 100);
+
+  assert.equal(await wallet.applyCredit('u1', 25, ['b1']), 125);
+});
+
+test('a losing settlement confirms unconfirmed debits without paying', async () => {
+  const ledger = walletOn([USER, { type: 'debit', userId: 'u1', amount: 10, betId: 'b1', fixtureId: 7 }]);
+  assert.equal(await wallet.applyCredit('u1', 0, ['b1']), 90);
+  assert.deepEqual(ledger.state.debits, {});
+  assert.equal(ledger.state.users.u1.balance, 90);
+});
+
+test('refunds only give back debits that are still unconfirmed', async () => {
+  const ledger = walletOn([
+      USER,
+      { type: 'debit', userId: 'u1', amount: 10, betId: 'orphan', fixtureId: 7 },
+      { type: 'debit', userId: 'u1', amount: 5, betId: 'opened', fixtureId: 7 },
+      { type: 'debit_confirmed', betIds: ['opened'] }
+  ]);
+  assert.equal(await wallet.applyRefund(['orphan', 'opened', 'never-debited']), 1);
+  assert.equal(await wallet.applyRefund(['orphan']), 0);
+  assert.equal(wallet.users.u1.balance, 95);
+  assert.equal(ledger.state.users.u1.balance, 95);
+});
@@ -0,0 +1,150 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const path = require('path');
+const { pathToFileURL } = require('url');
+const msgpack = require('../src/services/msgpack');
+const wireCodec = require('../src/services/wireCodec');
+
+// The browser decoder is the other half of the contract: backend encode -> frontend decode
+const frontendWire = import(pathToFileURL(path.join(__dirname, '../../frontend/src/wire.js')).href);
+
+const bytes = (value) => [...msgpack.encode(value)];
+const plain = (value) => JSON.parse(JSON.stringify(value));
+
+test('msgpack: integers use the smallest spec format', () => {
+  assert.deepEqual(bytes(0), [0x00]);
+  assert.deepEqual(bytes(127), [0x7f]);
+  assert.deepEqual(bytes(128), [0xcc, 0x80]);
+  assert.deepEqual(bytes(256), [0xcd, 0x01, 0x00]);
+  assert.deepEqual(bytes(65536), [0xce, 0x00, 0x01, 0x00, 0x00]);
+  assert.deepEqual(bytes(-1), [0xff]);
+  assert.deepEqual(bytes(-32), [0xe0]);
+  assert.deepEqual(bytes(-33), [0xd0, 0xdf]);
+  assert.deepEqual(bytes(-129), [0xd1, 0xff, 0x7f]);
+  assert.deepEqual(bytes(-32769), [0xd2, 0xff, 0xff, 0x7f, 0xff]);
+});
+
+test('msgpack: values past 32 bits and fractions go out as float64', () => {
+  const timestamp = 1792261373690;
+  const encoded = msgpack.encode(timestamp);
+  assert.equal(encoded[0], 0xcb);
+  assert.equal(encoded.readDoubleBE(1), timestamp);
+
+  assert.equal(msgpack.encode(2.37).readDoubleBE(1), 2.37);
+});
+
+test('msgpack: nil, booleans, strings, arrays and maps', () => {
+  assert.deepEqual(bytes(null), [0xc0]);
+  assert.deepEqual(bytes(undefined), [0xc0]);
+  assert.deepEqual(bytes(true), [0xc3]);
+  assert.deepEqual(bytes(false), [0xc2]);
+  assert.deepEqual(bytes('ab'), [0xa2, 0x61, 0x62]);
+  assert.deepEqual(bytes('é'), [0xa2, 0xc3, 0xa9]); // length in bytes, not chars
+  assert.deepEqual(bytes([1, 'a']), [0x92, 0x01, 0xa1, 0x61]);
+  assert.deepEqual(bytes({ a: 1 }), [0x81, 0xa1, 0x61, 0x01]);
+
+  assert.deepEqual(bytes('x'.repeat(40)).slice(0, 2), [0xd9, 40]);
+  assert.deepEqual(bytes('x'.repeat(300)).slice(0, 3), [0xda, 0x01, 0x2c]);
+  assert.deepEqual(bytes(new Array(20).fill(0)).slice(0, 3), [0xdc, 0x00, 20]);
+});
+
+test('msgpack: a message larger than the scratch buffer is copied out whole', () => {
+  const big = 'y'.repeat(70000);
+  const encoded = msgpack.encode([big, 1]);
+  assert.equal(encoded[0], 0x92);
+  assert.equal(encoded[1], 0xdb); // str32
+  assert.equal(encoded.readUInt32BE(2), 70000);
+  assert.equal(encoded[encoded.length - 1], 0x01);
+
+  // The scratch buffer is reused: earlier results must not change
+  const first = msgpack.encode('first');
+  msgpack.encode('second');
+  assert.deepEqual([...first], [0xa5, ...Buffer.from('first')]);
+});
+
+const market = (id, type, status, odds, extra = {}) => ({ id, type, title: `Mercado ${id}`, status, odds, ...extra });
+
+const match = () => ({
+  fixture: {
+      id: 1035041,
+      date: '2026-10-17T18:00:00+00:00',
+      status: { short: 'IN_PLAY', raw: '2H', period: '2H', elapsed: 67, second: 12, extra: null }
+  },
+  league: { id: 71, name: 'Série A', logo: 'https://media.api-sports.io/football/leagues/71.png' },
+  teams: {
+      home: { id: 127, name: 'Flamengo', logo: 'https://media.api-sports.io/football/teams/127.png' },
+      away: { id: 121, name: 'São Paulo — a team name well past thirty-one bytes', logo: '' }
+  },
+  goals: { home: 2, away: 1 },
+  serverTimestamp: 1792261373690,
+  markets: {
+      'Apostas de 1 Min': [market('f1_1035041_67', 'flash_1', 'OPEN', { yes: 33.9, no: 1.01 }, { windowStart: 67, windowEnd: 68, progress: 20.5 })],
+      'Resultado': [market('x_1035041', '1x2_rest', 'SUSPENDED', { home: 1.12, draw: 7.06, away: 50 })],
+      'Total': [market('t_1035041', 'total_goals', 'WIN', { over: 2.37, under: 1.59 })]
+  }
+});
+
+test('match_update round-trips through the frontend decoder', async () => {
+  const { decode } = await frontendWire;
+  const payload = match();
+  const decoded = decode('match_update', new Uint8Array(wireCodec.encode('match_update', payload)));
+  assert.deepEqual(plain(decoded), plain(payload));
+});
+
+test('statuses outside the tables travel as strings', async () => {
+  const { decode } = await frontendWire;
+  const payload = match();
+  payload.fixture.status.short = 'ABANDONED';
+  payload.markets.Total[0].status = 'VOID';
+  const decoded = decode('match_update', new Uint8Array(wireCodec.encode('match_update', payload)));
+  assert.equal(decoded.fixture.status.short, 'ABANDONED');
+  assert.equal(decoded.markets.Total[0].status, 'VOID');
+});
+
+test('flash_patch and flash_update round-trip', async () => {
+  const { decode } = await frontendWire;
+  const { markets } = match();
+
+  const patch = {
+      fixtureId: 1035041,
+      seq: 812,
+      timer: 4032,
+      changes: [
+          { id: 'f1_1035041_67', status: 'SUSPENDED' },
+          { id: 'x_1035041', progress: 12.5, odds: { home: 1.2, draw: 6.5, away: 21 } }
+      ]
+  };
+  assert.deepEqual(plain(decode('flash_patch', new Uint8Array(wireCodec.encode('flash_patch', patch)))), patch);
+
+  const relayout = { fixtureId: 1035041, seq: 813, markets };
+  assert.deepEqual(plain(decode('flash_patch', new Uint8Array(wireCodec.encode('flash_patch', relayout)))), plain(relayout));
+
+  const update = { timer: 4033, markets };
+  assert.deepEqual(plain(decode('flash_update', new Uint8Array(wireCodec.encode('flash_update', update)))), plain(update));
+});
+
+test('lobby_patch round-trips added rows without markets and sparse changed rows', async () => {
+  const { decode } = await frontendWire;
+  const added = match();
+  delete added.markets;
+  delete added.serverTimestamp;
+
+  const patch = {
+      serverTimestamp: 1792261373690,
+      added: [added],
+      changed: [
+          { id: 1, elapsed: 68 },
+          { id: 2, short: 'FINISHED', raw: 'FT', home: 3, away: 0 },
+          { id: 3, second: 0, extra: 4 }
+      ],
+      removed: [7, 8]
+  };
+  assert.deepEqual(plain(decode('lobby_patch', new Uint8Array(wireCodec.encode('lobby_patch', patch)))), plain(patch));
+});
+
+test('events without a layout and JSON frames pass through untouched', async () => {
+  const { decode } = await frontendWire;
+  const payload = { fixtureId: 1, seq: 2 };
+  assert.equal(wireCodec.hasLayout('bet_accepted'), false);
+  assert.equal(decode('flash_patch', payload), payload);
+});
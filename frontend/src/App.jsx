@@ -5,9 +5,50 @@ import { ToastContainer, toast } from 'react-toastify';
 import 'react-toastify/dist/ReactToastify.css';
 import MatchTimer from './components/MatchTimer';
 import MatchDetails from './components/MatchDetails';
+import { CODEC, WANTS_BINARY, decode } from './wire';
 
 const SOCKET_URL = 'http://localhost:3001';
 
+// Apply a flash_patch change list ({ id, status?, progress?, odds? }) to the grouped markets
+const applyMarketChanges = (markets, changes) => {
+  if (!markets) return markets;
+  const byId = new Map(changes.map(c => [c.id, c]));
+  const patch = (market) => byId.has(market.id) ? { ...market, ...byId.get(market.id) } : market;
+
+  if (Array.isArray(markets)) return markets.map(patch);
+  const next = {};
+  Object.entries(markets).forEach(([group, list]) => {
+    next[group] = Array.isArray(list) ? list.map(patch) : list;
+  });
+  return next;
+};
+
+// Stamp when a clock was received: MatchTimer runs the seconds locally from there
+const withSyncedClock = (match, syncedAt = Date.now()) => ({
+  ...match,
+  fixture: { ...match.fixture, status: { ...match.fixture.status, syncedAt } }
+});
+
+// Apply a lobby_patch ({ added, changed: [{ id, short?, raw?, elapsed?, second?, extra?, home?, away? }], removed })
+const applyLobbyPatch = (list, { added, changed, removed }) => {
+  const byId = new Map(list.map(m => [m.fixture.id, m]));
+  const now = Date.now();
+
+  removed.forEach(id => byId.delete(id));
+  added.forEach(match => byId.set(match.fixture.id, withSyncedClock(match, now)));
+  changed.forEach(({ id, home, away, ...status }) => {
+    const match = byId.get(id);
+    if (!match) return;
+    const next = {
+      ...match,
+      fixture: { ...match.fixture, status: { ...match.fixture.status, ...status } },
+      goals: { home: home ?? match.goals.home, away: away ?? match.goals.away }
+    };
+    byId.set(id, status.elapsed !== undefined ? withSyncedClock(next, now) : next);
+  });
+  return Array.from(byId.values());
+};
+
 // --- Main Components ---
 
 const MatchCard = ({ match, onJoin }) => {
@@ -69,7 +110,9 @@ function App() {
 
   // Flash State
   const [flashTimer, setFlashTimer] = useState(0);
-  const [flashMarkets, setFlashMarkets] = useState({ current: null });
+  const [flashMarkets, setFlashMarkets] = useState(null);
+  const flashSeqRef = useRef(null); // last applied flash_patch seq (null = waiting for snapshot)
+  const activeFixtureRef = useRef(null);
 
   // Wallet State
   const [balance, setBalance] = useState(1000.00);
@@ -94,19 +137,47 @@ function App() {
   }, []);
 
   useEffect(() => {
-    const newSocket = io(SOCKET_URL);
+    const newSocket = io(SOCKET_URL, {
+        transports: ['websocket'], // Backend may run clustered (no sticky sessions)
+        ...(WANTS_BINARY && { auth: { codec: CODEC } }) // binary frames for the hot streams
+    });
     setSocket(newSocket);
 
+    newSocket.on('wire_codec', ({ codec }) => {
+      console.log(`Wire codec: ${codec}`);
+    });
+
     newSocket.on('connect', () => {
       console.log('Connected to backend');
+      if (activeFixtureRef.current === null) newSocket.emit('lobby_subscribe'); // (re)subscribe the list view
     });
 
-    // Flash Updates (High Frequency)
-    newSocket.on('flash_update', (data) => {
+    // Flash Updates (High Frequency): full snapshot on join/resync, then sequenced patches
+    newSocket.on('flash_snapshot', (data) => {
+        if (data.fixtureId != activeFixtureRef.current) return;
+        flashSeqRef.current = data.seq;
         setFlashTimer(data.timer);
         setFlashMarkets(data.markets);
     });
 
+    newSocket.on('flash_patch', (payload) => {
+        const data = decode('flash_patch', payload);
+        if (data.fixtureId != activeFixtureRef.current) return;
+        if (flashSeqRef.current === null || data.seq <= flashSeqRef.current) return; // awaiting snapshot or stale
+
+        if (data.seq !== flashSeqRef.current + 1) {
+            // Gap detected: drop local state and ask for a fresh snapshot
+            flashSeqRef.current = null;
+            newSocket.emit('flash_resync', data.fixtureId);
+            return;
+        }
+
+        flashSeqRef.current = data.seq;
+        if (data.timer !== undefined) setFlashTimer(data.timer);
+        if (data.markets) setFlashMarkets(data.markets);
+        else if (data.changes) setFlashMarkets(prev => applyMarketChanges(prev, data.changes));
+    });
+
     // Betting Events
     newSocket.on('bet_accepted', (data) => {
         setBalance(data.newBalance); // Sync Authoritative Balance
@@ -119,39 +190,43 @@ function App() {
     });
 
     // Bet Resolution (Handle Balance Update Here)
-    newSocket.on('bet_resolved', (data) => {
+    // Server batches every bet settled in the same tick into one payload per socket
+    newSocket.on('bets_resolved', (data) => {
         if (data.newBalance !== undefined) {
             setBalance(data.newBalance); // Sync Authoritative Balance
         }
 
-        if (data.bet.status === 'WIN') {
-            toast.success(`💰 GANHOU! Recebeu R$ ${data.payout.toFixed(2)}`, { theme: "dark", autoClose: 5000 });
-        } else {
-            toast.info(`❌ PERDEU a aposta. (Sem lucro)`, { theme: "dark", autoClose: 3000 });
-        }
+        data.results.forEach(({ bet, payout }) => {
+            if (bet.status === 'WIN') {
+                toast.success(`💰 GANHOU! Recebeu R$ ${payout.toFixed(2)}`, { theme: "dark", autoClose: 5000 });
+            } else {
+                toast.info(`❌ PERDEU a aposta. (Sem lucro)`, { theme: "dark", autoClose: 3000 });
+            }
+        });
     });
 
     // Standard Match Update (Score)
-    newSocket.on('match_update', (match) => {
+    newSocket.on('match_update', (payload) => {
+        const match = decode('match_update', payload);
         setMatchInfo({
             home: match.teams.home.name,
             away: match.teams.away.name,
             score: match.goals,
-            fixture: match.fixture,
+            fixture: withSyncedClock(match).fixture,
             serverTimestamp: match.serverTimestamp,
             markets: match.markets
         });
     });
 
-    // Global Matches Update (for List View)
-    newSocket.on('matches_update', (updatedMatches) => {
-        setMatchList(prevList => {
-            const listMap = new Map(prevList.map(m => [m.fixture.id, m]));
-            updatedMatches.forEach(updatedMatch => {
-                listMap.set(updatedMatch.fixture.id, updatedMatch);
-            });
-            return Array.from(listMap.values());
-        });
+    // List View: snapshot on lobby_subscribe, then throttled diffs (score, status, minute)
+    newSocket.on('lobby_snapshot', ({ matches }) => {
+        const now = Date.now();
+        setMatchList(matches.map(match => withSyncedClock(match, now)));
+    });
+
+    newSocket.on('lobby_patch', (payload) => {
+        const patch = decode('lobby_patch', payload);
+        setMatchList(prevList => applyLobbyPatch(prevList, patch));
     });
 
     return () => newSocket.close();
@@ -180,8 +255,11 @@ function App() {
           });
           setActiveFixtureId(fixtureId);
           setEvents(match.events || []);
-          setFlashMarkets({ current: null });
+          setFlashMarkets(null);
+          activeFixtureRef.current = fixtureId;
+          flashSeqRef.current = null;
 
+          socket.emit('lobby_unsubscribe');
           socket.emit('join_game', fixtureId);
           setView('game');
       }
@@ -190,7 +268,9 @@ function App() {
   const handleLeaveGame = () => {
       if (!socket) return;
       socket.emit('leave_game', activeFixtureId);
+      socket.emit('lobby_subscribe');
       setActiveFixtureId(null);
+      activeFixtureRef.current = null;
       setView('list');
   };
 
@@ -103,6 +103,8 @@ const MarketGroup = ({ market, onBet, isFinished, match, socket, setBalance, pla
         // 3. Construct Bet Object
         const betData = {
             id: Math.random().toString(36).substring(7),
+            // Same key on any re-send: the server answers a retry without debiting twice
+            idempotencyKey: `${Date.now().toString(36)}-${Math.random().toString(36).substring(2)}`,
             matchId: match.fixture.id, // Using correct path to ID
             marketId: market.id,
             windowEnd: market.windowEnd,
@@ -247,24 +249,27 @@ const MarketGroup = ({ market, onBet, isFinished, match, socket, setBalance, pla
     );
 };
 
-const MatchDetails = ({ matchInfo, flashTimer, events, onBack, onBet, socket, balance, setBalance }) => {
+const MatchDetails = ({ matchInfo, flashTimer, flashMarkets, events, onBack, onBet, socket, balance, setBalance }) => {
     const [isFinished, setIsFinished] = useState(false);
     const [openCategories, setOpenCategories] = useState({});
     const [placedBets, setPlacedBets] = useState([]);
     const [betAmount, setBetAmount] = useState(10);
     const hasRedirected = useRef(false);
 
+    // Prefer the live flash stream; fall back to the markets attached to the match
+    const markets = flashMarkets || matchInfo?.markets;
+
     // Initialize Accordion State (Open first 2 categories)
     useEffect(() => {
-        if (matchInfo?.markets) {
-            const keys = Object.keys(matchInfo.markets);
+        if (markets) {
+            const keys = Object.keys(markets);
             const initial = {};
             keys.forEach((k, i) => {
                 if (i < 2) initial[k] = true;
             });
             setOpenCategories(prev => Object.keys(prev).length === 0 ? initial : prev);
         }
-    }, [matchInfo]);
+    }, [markets]);
 
     const toggleCategory = (cat) => {
         setOpenCategories(prev => ({ ...prev, [cat]: !prev[cat] }));
@@ -328,9 +333,9 @@ const MatchDetails = ({ matchInfo, flashTimer, events, onBack, onBet, socket, ba
              />
 
              {/* Markets Accordion */}
-             {matchInfo.markets && typeof matchInfo.markets === 'object' && !Array.isArray(matchInfo.markets) ? (
+             {markets && typeof markets === 'object' && !Array.isArray(markets) ? (
                  <div className="space-y-2">
-                     {Object.entries(matchInfo.markets).map(([category, markets]) => (
+                     {Object.entries(markets).map(([category, categoryMarkets]) => (
                          <Accordion
                             key={category}
                             title={category}
@@ -338,7 +343,7 @@ const MatchDetails = ({ matchInfo, flashTimer, events, onBack, onBet, socket, ba
                             onToggle={() => toggleCategory(category)}
                          >
                              <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-3">
-                                 {Array.isArray(markets) && markets.map(market => (
+                                 {Array.isArray(categoryMarkets) && categoryMarkets.map(market => (
                                      <MarketGroup
                                         key={market.id}
                                         market={market}
@@ -1,8 +1,34 @@
+import { useState, useEffect } from 'react';
+
+// Seconds run locally from the last clock the server sent (status.syncedAt, stamped on receipt);
+// the server only pushes a new clock when the minute, score or status changes.
+function useNow(running) {
+    const [now, setNow] = useState(Date.now());
+    useEffect(() => {
+        if (!running) return;
+        const id = setInterval(() => setNow(Date.now()), 1000);
+        return () => clearInterval(id);
+    }, [running]);
+    return now;
+}
+
 export default function MatchTimer({ match }) {
-    if (!match || !match.fixture || !match.fixture.status) return null;
+    const clock = match?.fixture?.status;
+    const running = clock?.short === 'IN_PLAY' && typeof clock.syncedAt === 'number';
+    const now = useNow(running);
 
-    const { status, elapsed, second, extra } = match.fixture.status;
-    const rawStatus = match.fixture.status.raw || match.fixture.status.short;
+    if (!clock) return null;
+
+    const { status, extra } = clock;
+    const rawStatus = clock.raw || clock.short;
+
+    let elapsed = clock.elapsed;
+    let second = clock.second || 0;
+    if (running) {
+        const total = second + Math.max(0, Math.floor((now - clock.syncedAt) / 1000));
+        elapsed += Math.floor(total / 60);
+        second = total % 60;
+    }
 
     // Estados parados
     if (rawStatus === 'HT') return <span className="font-bold text-yellow-500">INTERVALO</span>;
@@ -0,0 +1,169 @@
+// Binary wire codec for the hot Socket.IO streams (match_update, flash_patch, flash_update, lobby_patch).
+// Opt in with VITE_WIRE_CODEC=msgpack: the socket connects with auth { codec: CODEC } and the server
+// answers 'wire_codec'. Handlers pass every payload through decode(), so JSON frames (the fallback,
+// or a server that doesn't know the codec) go through untouched.
+// Layouts mirror backend/src/services/wireCodec.js.
+
+export const CODEC = 'msgpack/1';
+export const WANTS_BINARY = import.meta.env?.VITE_WIRE_CODEC === 'msgpack'; // env is absent outside Vite (backend tests)
+
+const MATCH_STATUS = ['SCHEDULED', 'IN_PLAY', 'PAUSED', 'FINISHED'];
+const MARKET_STATUS = ['OPEN', 'SUSPENDED', 'CLOSED', 'WIN', 'LOSS'];
+const ODDS_KEYS = [['yes', 'no'], ['home', 'draw', 'away'], ['over', 'under']];
+const LOBBY_FIELDS = ['short', 'raw', 'elapsed', 'second', 'extra', 'home', 'away'];
+
+const textDecoder = new TextDecoder();
+
+// --- MessagePack (the subset the server writes: nil, bool, ints, float64, str, array, map) ---
+
+function unpack(bytes) {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  let pos = 0;
+
+  const str = (length) => {
+    const value = textDecoder.decode(bytes.subarray(pos, pos + length));
+    pos += length;
+    return value;
+  };
+  const array = (length) => {
+    const value = new Array(length);
+    for (let i = 0; i < length; i++) value[i] = read();
+    return value;
+  };
+  const map = (length) => {
+    const value = {};
+    for (let i = 0; i < length; i++) {
+      const key = read();
+      value[key] = read();
+    }
+    return value;
+  };
+
+  function read() {
+    const byte = bytes[pos++];
+    if (byte < 0x80) return byte;
+    if (byte >= 0xe0) return byte - 0x100;
+    if ((byte & 0xe0) === 0xa0) return str(byte & 0x1f);
+    if ((byte & 0xf0) === 0x90) return array(byte & 0x0f);
+    if ((byte & 0xf0) === 0x80) return map(byte & 0x0f);
+
+    let value;
+    switch (byte) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xcc: return bytes[pos++];
+      case 0xcd: value = view.getUint16(pos); pos += 2; return value;
+      case 0xce: value = view.getUint32(pos); pos += 4; return value;
+      case 0xd0: value = view.getInt8(pos); pos += 1; return value;
+      case 0xd1: value = view.getInt16(pos); pos += 2; return value;
+      case 0xd2: value = view.getInt32(pos); pos += 4; return value;
+      case 0xcb: value = view.getFloat64(pos); pos += 8; return value;
+      case 0xd9: return str(bytes[pos++]);
+      case 0xda: value = view.getUint16(pos); pos += 2; return str(value);
+      case 0xdb: value = view.getUint32(pos); pos += 4; return str(value);
+      case 0xdc: value = view.getUint16(pos); pos += 2; return array(value);
+      case 0xdd: value = view.getUint32(pos); pos += 4; return array(value);
+      case 0xde: value = view.getUint16(pos); pos += 2; return map(value);
+      case 0xdf: value = view.getUint32(pos); pos += 4; return map(value);
+      default: throw new Error(`Unsupported MessagePack type 0x${byte.toString(16)}`);
+    }
+  }
+
+  return read();
+}
+
+// --- Layouts ---
+
+const fromTable = (table, value) => (typeof value === 'number' ? table[value] : value);
+
+function readOdds(packed) {
+  if (!packed) return undefined;
+  const keys = ODDS_KEYS[packed[0]];
+  const odds = {};
+  keys.forEach((key, i) => { odds[key] = packed[i + 1] / 100; });
+  return odds;
+}
+
+const readProgress = (progress) => (progress === null ? undefined : progress / 10);
+
+function readMarket([id, type, title, status, progress, windowStart, windowEnd, odds]) {
+  const market = { id, type, title, status: fromTable(MARKET_STATUS, status) };
+  if (progress !== null) market.progress = readProgress(progress);
+  if (windowStart !== null) market.windowStart = windowStart;
+  if (windowEnd !== null) market.windowEnd = windowEnd;
+  if (odds) market.odds = readOdds(odds);
+  return market;
+}
+
+function readMarkets(packed) {
+  if (!packed) return undefined;
+  const markets = {};
+  packed.forEach(([group, list]) => { markets[group] = list.map(readMarket); });
+  return markets;
+}
+
+const readTeam = ([id, name, logo]) => ({ id, name, logo });
+
+function readMatch(packed) {
+  const [id, date, status, raw, elapsed, second, extra, home, away, serverTimestamp, league, homeTeam, awayTeam, markets] = packed;
+  const match = {
+    fixture: {
+      id,
+      date,
+      status: { short: fromTable(MATCH_STATUS, status), raw, period: raw, elapsed, second, extra }
+    },
+    league: { id: league[0], name: league[1], logo: league[2] },
+    teams: { home: readTeam(homeTeam), away: readTeam(awayTeam) },
+    goals: { home, away }
+  };
+  if (serverTimestamp !== null) match.serverTimestamp = serverTimestamp;
+  if (markets) match.markets = readMarkets(markets);
+  return match;
+}
+
+function readChange([id, status, progress, odds]) {
+  const change = { id };
+  if (status !== null) change.status = fromTable(MARKET_STATUS, status);
+  if (progress !== null) change.progress = readProgress(progress);
+  if (odds) change.odds = readOdds(odds);
+  return change;
+}
+
+function readLobbyRow(packed) {
+  const row = { id: packed[0] };
+  const mask = packed[1];
+  let next = 2;
+  LOBBY_FIELDS.forEach((field, bit) => {
+    if (!(mask & (1 << bit))) return;
+    const value = packed[next++];
+    row[field] = field === 'short' ? fromTable(MATCH_STATUS, value) : value;
+  });
+  return row;
+}
+
+const LAYOUTS = {
+  match_update: readMatch,
+  flash_patch: ([fixtureId, seq, timer, markets, changes]) => {
+    const patch = { fixtureId, seq };
+    if (timer !== null) patch.timer = timer;
+    if (markets) patch.markets = readMarkets(markets);
+    if (changes) patch.changes = changes.map(readChange);
+    return patch;
+  },
+  flash_update: ([timer, markets]) => ({ timer, markets: readMarkets(markets) }),
+  lobby_patch: ([serverTimestamp, added, changed, removed]) => ({
+    serverTimestamp,
+    added: added.map(readMatch),
+    changed: changed.map(readLobbyRow),
+    removed
+  })
+};
+
+export function decode(event, payload) {
+  let bytes = null;
+  if (payload instanceof ArrayBuffer) bytes = new Uint8Array(payload);
+  else if (ArrayBuffer.isView(payload)) bytes = new Uint8Array(payload.buffer, payload.byteOffset, payload.byteLength);
+  if (!bytes || !LAYOUTS[event]) return payload;
+  return LAYOUTS[event](unpack(bytes));
+}
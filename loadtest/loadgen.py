@@ -0,0 +1,331 @@
+"""Headless Socket.IO load generator for the flash-betting backend.
+
+Opens thousands of asyncio Socket.IO clients against a local server, spreads
+them over fixtures with join_game, fires place_bet at a fixed total rate and
+reports:
+
+  - bet_accepted / bet_rejected latency (place_bet -> response)
+  - settlement latency (first match_update past a bet's window -> bets_resolved)
+  - flash_patch / flash_update inter-arrival times (patches only go out when a
+    market or the timer changes, so this is a distribution, not lateness; the
+    server's own tick timing is flashbets_tick_duration_seconds on /metrics)
+  - dropped messages (patch seq gaps, unanswered bets)
+
+Runs against the debug fixture 999999 (always live) or against fixtures
+replayed with FEED_MODE=replay; no external services are needed.
+
+    pip install -r loadtest/requirements.txt
+    python loadtest/loadgen.py --clients 2000 --bet-rate 200 --duration 180
+
+Every socket is auto-logged in as the same MVP user, so the default stake is
+tiny to keep the shared balance from running out during long runs.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import urllib.request
+import uuid
+from collections import Counter, defaultdict
+
+import socketio
+
+DEBUG_FIXTURE = 999999
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class Stats:
+    def __init__(self):
+        self.accept_latency = []
+        self.reject_latency = []
+        self.resolve_latency = []
+        self.flash_interarrival = []
+        self.reject_reasons = Counter()
+        self.counters = Counter()
+        # fixture -> minute -> first wall time a match_update showed it
+        self.minute_seen = defaultdict(dict)
+
+    def summary(self):
+        def dist(values, scale=1000.0):
+            if not values:
+                return {"count": 0}
+            return {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * scale, 2),
+                "p99_ms": round(percentile(values, 99) * scale, 2),
+                "p999_ms": round(percentile(values, 99.9) * scale, 2),
+                "max_ms": round(max(values) * scale, 2),
+            }
+
+        return {
+            "bet_accepted": dist(self.accept_latency),
+            "bet_rejected": dist(self.reject_latency),
+            "bet_resolved": dist(self.resolve_latency),
+            "flash_interarrival": dist(self.flash_interarrival),
+            "reject_reasons": dict(self.reject_reasons),
+            "counters": dict(self.counters),
+        }
+
+
+class LoadClient:
+    def __init__(self, index, url, fixture_id, stats, args):
+        self.index = index
+        self.url = url
+        self.fixture_id = fixture_id
+        self.stats = stats
+        self.args = args
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.markets = {}  # market id -> market (OPEN ones from the latest snapshot/patch)
+        self.seq = None
+        self.last_flash_at = None
+        self.pending = {}  # idempotencyKey -> send time of bets waiting for bet_accepted/bet_rejected
+        self.connected = False
+        self.register_handlers()
+
+    def register_handlers(self):
+        sio = self.sio
+        stats = self.stats
+
+        @sio.event
+        async def connect():
+            self.connected = True
+            stats.counters["connected"] += 1
+            await sio.emit("join_game", self.fixture_id)
+
+        @sio.event
+        async def disconnect():
+            if self.connected:
+                stats.counters["disconnected"] += 1
+            self.connected = False
+
+        @sio.on("flash_snapshot")
+        async def on_snapshot(data):
+            if data.get("fixtureId") != self.fixture_id:
+                return
+            stats.counters["flash_snapshot"] += 1
+            self.seq = data["seq"]
+            self.markets = {m["id"]: m for m in flatten(data.get("markets"))}
+            self.mark_flash()
+
+        @sio.on("flash_patch")
+        async def on_patch(data):
+            if data.get("fixtureId") != self.fixture_id:
+                return
+            stats.counters["flash_patch"] += 1
+            if self.seq is not None and data["seq"] != self.seq + 1:
+                stats.counters["flash_patch_gaps"] += 1
+                await sio.emit("flash_resync", self.fixture_id)
+                self.seq = None
+                return
+            self.seq = data["seq"]
+            if "markets" in data:
+                self.markets = {m["id"]: m for m in flatten(data["markets"])}
+            for change in data.get("changes", []):
+                market = self.markets.get(change["id"])
+                if market:
+                    market.update(change)
+            self.mark_flash()
+
+        @sio.on("flash_update")
+        async def on_flash_update(data):
+            stats.counters["flash_update"] += 1
+            self.mark_flash()
+
+        @sio.on("match_update")
+        async def on_match_update(match):
+            fixture = match["fixture"]
+            minute = fixture["status"].get("elapsed")
+            if isinstance(minute, int):
+                stats.minute_seen[fixture["id"]].setdefault(minute, time.monotonic())
+
+        @sio.on("bet_accepted")
+        async def on_accepted(data):
+            self.answer(data, stats.accept_latency, "bet_accepted")
+
+        @sio.on("bet_rejected")
+        async def on_rejected(data):
+            stats.reject_reasons[data.get("reason", "?")] += 1
+            self.answer(data, stats.reject_latency, "bet_rejected")
+
+        @sio.on("bets_resolved")
+        async def on_resolved(data):
+            for result in data.get("results", []):
+                self.resolved(result["bet"])
+
+        @sio.on("bet_resolved")
+        async def on_resolved_legacy(data):
+            stats.counters["bet_resolved_legacy"] += 1
+
+    def mark_flash(self):
+        now = time.monotonic()
+        if self.last_flash_at is not None:
+            self.stats.flash_interarrival.append(now - self.last_flash_at)
+        self.last_flash_at = now
+
+    def answer(self, data, bucket, event):
+        self.stats.counters[event] += 1
+        sent_at = self.pending.pop(data.get("idempotencyKey"), None)
+        if sent_at is not None:
+            bucket.append(time.monotonic() - sent_at)
+        else:
+            self.stats.counters["unexpected_" + event] += 1
+
+    def resolved(self, bet):
+        self.stats.counters["bets_resolved"] += 1
+        window_end = bet.get("windowEnd")
+        if not isinstance(window_end, (int, float)):
+            return
+        # The bet became due on the first update showing a minute past its window
+        seen = self.stats.minute_seen.get(bet.get("matchId"), {})
+        due = [t for minute, t in seen.items() if minute > window_end]
+        if due:
+            self.stats.resolve_latency.append(time.monotonic() - min(due))
+
+    def expire_pending(self):
+        cutoff = time.monotonic() - self.args.bet_timeout
+        for key in [k for k, sent_at in self.pending.items() if sent_at < cutoff]:
+            del self.pending[key]
+            self.stats.counters["bets_unanswered"] += 1
+
+    async def place_bet(self):
+        if not self.connected:
+            return False
+        open_markets = [m for m in self.markets.values()
+                        if m.get("status") == "OPEN" and isinstance(m.get("windowEnd"), (int, float))]
+        if not open_markets:
+            return False
+
+        market = random.choice(open_markets)
+        option = random.choice(["YES", "NO"])
+        odd = market["odds"]["yes" if option == "YES" else "no"]
+        key = uuid.uuid4().hex
+        self.pending[key] = time.monotonic()
+        self.stats.counters["bets_sent"] += 1
+        await self.sio.emit("place_bet", {
+            "matchId": self.fixture_id,
+            "marketId": market["id"],
+            "windowEnd": market["windowEnd"],
+            "type": market["type"],
+            "option": option,
+            "amount": self.args.amount,
+            "odd": odd,
+            "idempotencyKey": key,
+        })
+        return True
+
+    async def connect(self):
+        try:
+            await self.sio.connect(self.url, transports=["websocket"], wait_timeout=10)
+        except Exception:
+            self.stats.counters["connect_errors"] += 1
+
+
+def flatten(markets):
+    if not markets:
+        return []
+    if isinstance(markets, list):
+        return markets
+    return [m for group in markets.values() for m in group]
+
+
+def discover_fixtures(url):
+    try:
+        with urllib.request.urlopen(url.rstrip("/") + "/matches", timeout=5) as response:
+            matches = json.load(response)
+    except Exception:
+        return [DEBUG_FIXTURE]
+    live = [m["fixture"]["id"] for m in matches if m["fixture"]["status"]["short"] == "IN_PLAY"]
+    return live or [DEBUG_FIXTURE]
+
+
+async def run(args):
+    fixtures = [int(f) for f in args.fixtures.split(",")] if args.fixtures else discover_fixtures(args.url)
+    print(f"Fixtures: {fixtures}")
+
+    stats = Stats()
+    clients = [LoadClient(i, args.url, fixtures[i % len(fixtures)], stats, args) for i in range(args.clients)]
+
+    # Ramp up connections evenly over --ramp seconds
+    print(f"Connecting {args.clients} clients over {args.ramp}s...")
+    delay = args.ramp / max(1, args.clients)
+    connecting = []
+    for client in clients:
+        connecting.append(asyncio.create_task(client.connect()))
+        await asyncio.sleep(delay)
+    await asyncio.gather(*connecting)
+    print(f"Connected: {stats.counters['connected']} (errors: {stats.counters['connect_errors']})")
+
+    # Open-loop bet generator: --bet-rate bets per second spread over random clients
+    started = time.monotonic()
+    interval = 1.0 / args.bet_rate if args.bet_rate > 0 else None
+    next_bet = started
+    last_report = started
+
+    while time.monotonic() - started < args.duration:
+        now = time.monotonic()
+        if interval is not None:
+            while next_bet <= now:
+                client = random.choice(clients)
+                if not await client.place_bet():
+                    stats.counters["bets_skipped_no_market"] += 1
+                next_bet += interval
+
+        if now - last_report >= args.report_every:
+            for client in clients:
+                client.expire_pending()
+            print_progress(stats, now - started)
+            last_report = now
+
+        await asyncio.sleep(min(interval or 0.05, 0.05))
+
+    # Let in-flight bets and settlements land
+    await asyncio.sleep(args.drain)
+    for client in clients:
+        client.expire_pending()
+        client.stats.counters["bets_unanswered"] += len(client.pending)
+        client.pending.clear()
+
+    await asyncio.gather(*(c.sio.disconnect() for c in clients if c.connected), return_exceptions=True)
+
+    report = stats.summary()
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def print_progress(stats, elapsed):
+    accepted = percentile(stats.accept_latency, 99)
+    p99 = f"{accepted * 1000:.1f}ms" if accepted is not None else "-"
+    c = stats.counters
+    print(f"[{elapsed:6.1f}s] sent={c['bets_sent']} accepted={c['bet_accepted']} "
+          f"rejected={c['bet_rejected']} resolved={c['bets_resolved']} accept_p99={p99} "
+          f"patch_gaps={c['flash_patch_gaps']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:3001")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--fixtures", help="comma-separated fixture ids (default: live fixtures from /matches, else 999999)")
+    parser.add_argument("--bet-rate", type=float, default=50, help="bets per second across all clients")
+    parser.add_argument("--amount", type=float, default=0.01, help="stake per bet")
+    parser.add_argument("--duration", type=float, default=120, help="seconds of bet traffic")
+    parser.add_argument("--ramp", type=float, default=10, help="seconds to open all connections")
+    parser.add_argument("--drain", type=float, default=5, help="seconds to wait for responses after the run")
+    parser.add_argument("--bet-timeout", type=float, default=5, help="seconds before an unanswered bet counts as dropped")
+    parser.add_argument("--report-every", type=float, default=5)
+    parser.add_argument("--json", help="also write the final report to this file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()